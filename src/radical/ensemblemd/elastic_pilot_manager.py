@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+"""This module defines and implements the ElasticPilotManager class.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import time
+import threading
+import radical.pilot
+import radical.utils as ru
+
+# Seconds between two checks of the unit backlog.
+POLL_INTERVAL = 10.0
+
+# Another pilot is only submitted for a backlog of at least this fraction of
+# the cores of the context's pilot.
+MIN_BACKLOG_FRACTION = 0.5
+
+# Unit states after which a unit doesn't occupy any cores anymore.
+FINAL_STATES = [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]
+
+
+#-------------------------------------------------------------------------------
+#
+class ElasticPilotManager(threading.Thread):
+    """The ElasticPilotManager grows and shrinks the set of pilots of an
+       execution context with the ComputeUnit backlog.
+
+       Every POLL_INTERVAL seconds, the manager sums up the cores of the units
+       that the unit scheduler couldn't place on any pilot yet. If all pilots
+       are active and the backlog is at least MIN_BACKLOG_FRACTION of the
+       context's pilot, another pilot with the description of the context's
+       pilot is submitted, sized to the backlog. Additional pilots that have
+       run no units for 'idle_timeout' seconds, e.g., during a
+       single-instance analysis step, are canceled. The first pilot is never
+       canceled. Additional pilots are submitted without cleanup, so that
+       the sandboxes of their units, which later steps may still reference,
+       aren't removed when the pilot is canceled.
+
+       The manager tracks the unfinished units with a unit state callback,
+       so that it doesn't have to check every unit that was ever submitted.
+
+       The list of pilots of the context is replaced, not changed, under the
+       context's lock, so that the failure policy and the execution plugins
+       always see a consistent list. The pilots exchange files through the
+       staging area of the first pilot.
+    """
+
+    #---------------------------------------------------------------------------
+    #
+    def __init__(self, context, max_pilots, idle_timeout):
+        """Creates a new ElasticPilotManager for 'context', which must be
+           allocated.
+        """
+        super(ElasticPilotManager, self).__init__(name="ElasticPilotManager")
+        self.daemon = True
+
+        self._context      = context
+        self._max_pilots   = max_pilots
+        self._idle_timeout = idle_timeout
+
+        self._terminate    = threading.Event()
+        self._lock         = threading.Lock()
+        self._units        = dict()   # uid -> (unit, cores) of the unfinished units
+        self._pilot_cores  = dict([(pilot.uid, pdesc.cores) for pilot, pdesc in
+                                   zip(context._pilots, context._create_pilot_descriptions())])
+        self._idle_since   = dict()
+
+        self._logger  = ru.get_logger('radical.enmd.ElasticPilotManager')
+
+        context._umgr.register_callback(self._unit_state_cb)
+
+    # --------------------------------------------------------------------------
+    #
+    def get_logger(self):
+        return self._logger
+
+    #---------------------------------------------------------------------------
+    #
+    def stop(self):
+        """Stops the manager and waits for it to terminate.
+        """
+        self._terminate.set()
+        if self.is_alive():
+            self.join()
+
+    #---------------------------------------------------------------------------
+    #
+    def _unit_state_cb(self, unit, state):
+        """Tracks the units that haven't finished yet.
+        """
+        with self._lock:
+            if state in FINAL_STATES:
+                self._units.pop(unit.uid, None)
+            elif unit.uid not in self._units:
+                self._units[unit.uid] = (unit, unit.description.cores or 1)
+
+    #---------------------------------------------------------------------------
+    #
+    def run(self):
+        while not self._terminate.is_set():
+            try:
+                self.adapt()
+            except Exception, ex:
+                self.get_logger().exception("Pilot adaptation failed: {0}".format(ex))
+            self._terminate.wait(POLL_INTERVAL)
+
+    #---------------------------------------------------------------------------
+    #
+    def adapt(self):
+        """Checks the backlog once and submits or cancels pilots.
+        """
+        ctx = self._context
+
+        backlog    = 0
+        busy_cores = dict([(uid, 0) for uid in self._pilot_cores])
+
+        with self._lock:
+            units = self._units.values()
+
+        for unit, cores in units:
+            if unit.state in FINAL_STATES:
+                continue
+            if unit.pilot_id is None:
+                backlog += cores
+            elif unit.pilot_id in busy_cores:
+                busy_cores[unit.pilot_id] += cores
+
+        self.get_logger().debug("Backlog: {0} cores, busy cores: {1}".format(backlog, busy_cores))
+
+        if backlog > 0:
+            self._idle_since.clear()
+            self._grow(backlog)
+        else:
+            self._shrink(busy_cores)
+
+    #---------------------------------------------------------------------------
+    #
+    def _grow(self, backlog):
+        """Submits another pilot if the backlog fills it.
+        """
+        ctx = self._context
+
+        if len(ctx._pilots) >= self._max_pilots:
+            return
+
+        # As long as a pilot is still waiting in the queue, the backlog
+        # doesn't tell whether the pilots are too small.
+        for pilot in ctx._pilots:
+            if pilot.state not in [radical.pilot.ACTIVE] + FINAL_STATES:
+                return
+
+        pdesc = ctx._create_pilot_descriptions()[0]
+        if backlog < MIN_BACKLOG_FRACTION * pdesc.cores:
+            return
+        pdesc.cores = min(backlog, pdesc.cores)
+        pdesc.cleanup = False
+
+        self.get_logger().info("Backlog of {0} cores, submitting another {1}-core pilot on {2}.".format(
+            backlog, pdesc.cores, pdesc.resource))
+        ctx._reporter.info("Adding a {0}-core pilot on {1}".format(pdesc.cores, pdesc.resource))
+
+        pilot = ctx._pmgr.submit_pilots(pdesc)
+
+        # Units that link shared files may be scheduled to the new pilot.
+        if ctx._shared_uploads is not None:
+            ctx._shared_uploads.stage(pilot)
+
+        with ctx._replace_lock:
+            ctx._get_unit_manager(pdesc.resource).add_pilots(pilot)
+            ctx._pilots = ctx._pilots + [pilot]
+        self._pilot_cores[pilot.uid] = pdesc.cores
+
+    #---------------------------------------------------------------------------
+    #
+    def _shrink(self, busy_cores):
+        """Cancels the additional pilots that have been idle for longer than
+           the idle timeout.
+        """
+        ctx = self._context
+        now = time.time()
+
+        for pilot in list(ctx._pilots[1:]):
+            if pilot.state != radical.pilot.ACTIVE or busy_cores.get(pilot.uid, 0) > 0:
+                self._idle_since.pop(pilot.uid, None)
+                continue
+
+            idle_since = self._idle_since.setdefault(pilot.uid, now)
+            if now - idle_since < self._idle_timeout:
+                continue
+
+            self.get_logger().info("Pilot {0} idle for {1} seconds, canceling it.".format(
+                pilot.uid, int(now - idle_since)))
+            ctx._reporter.info("Removing idle pilot {0}".format(pilot.uid))
+
+            with ctx._replace_lock:
+                ctx._get_unit_manager(ctx._resource_key).remove_pilots(pilot.uid)
+                ctx._pmgr.cancel_pilots(pilot.uid)
+                ctx._pilots = [p for p in ctx._pilots if p is not pilot]
+            self._pilot_cores.pop(pilot.uid, None)
+            self._idle_since.pop(pilot.uid, None)
@@ -138,6 +138,18 @@ class Engine(object):
             except Exception as e:
                 self._logger.warning(" > Skipping execution plug-in {0}: loading failed: '{1}'".format(plugin_module_name, e))
 
+    #---------------------------------------------------------------------------
+    #
+    def has_execution_plugin_for_pattern(self, pattern_name, context_name):
+        """Returns True if an execution plug-in for a given pattern and
+           context exists.
+        """
+        for candidate_plugin in self._execution_plugins:
+            if (candidate_plugin.get_info()['pattern'] == pattern_name) and \
+               (candidate_plugin.get_info()['context_type'] == context_name):
+                return True
+        return False
+
     #---------------------------------------------------------------------------
     #
     def get_execution_plugin_for_pattern(self, pattern_name, context_name, plugin_name):
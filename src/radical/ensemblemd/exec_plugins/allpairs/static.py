@@ -9,13 +9,20 @@ __copyright__ = "Copyright 2014, http://radical.rutgers.edu"
 __license__   = "MIT"
 
 import os
+import sys
 import ast
+import time
 import traceback
 import saga
 import datetime
 import radical.pilot
-from radical.ensemblemd.exceptions import NotImplementedError
+from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.bundling import BundledUnit, get_uids
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import ABORT, SKIP, FAILED_STATES, get_deadline, wait_units
+from radical.ensemblemd.exec_plugins.staging import STAGING_AREA
+from radical.ensemblemd.utils.pairs import window_blocks
 
 # ------------------------------------------------------------------------------
 #
@@ -27,6 +34,9 @@ _PLUGIN_INFO = {
 
 _PLUGIN_OPTIONS = []
 
+# Seconds between two checks for newly initialized elements.
+ELEMENT_POLL_INTERVAL = 1.0
+
 #-------------------------------------------------------------------------------
 #
 class Plugin(PluginBase):
@@ -60,20 +70,9 @@ class Plugin(PluginBase):
                 # In Case the pilot fails report Error messsage
                 self.get_logger().error("Task {0} FAILED.".format(unit.uid))
                 self.get_logger().error("Error: {0}".format(unit.stderr))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(1)
-
-        def comparisons (set1,set2):
-            ret = list ()
-            if set2 == None:
-                for i in range (1, (len(set1)+1)):
-                    for j in range (1, len(set2)+1):
-                        ret.append ([i, j])
-            else:
-                for i in range (1, (len(set1)+1)):
-                    for j in range (i+1, len(set1)+1):
-                        ret.append ([i, j])
-            return ret
+                if resource._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(1)
 
         #-----------------------------------------------------------------------
         # Starting Plugin Execution
@@ -82,6 +81,7 @@ class Plugin(PluginBase):
         self.get_logger().debug("Set 1 is {0}".format(pattern.set1_elements()))
         self.get_logger().debug("Set 2 is {0}".format(pattern.set2_elements()))
         NumElementsSet1 = len(pattern.set1_elements())
+        NumElementsSet2 = None
         Permutations = pattern.permutations
         if pattern.set2_elements() is None:
             self.get_logger().info("Number of Elements {0}".format(NumElementsSet1))
@@ -98,186 +98,232 @@ class Plugin(PluginBase):
             self._reporter.header("Executing All Pairs Pattern on the set {0}-{1} with {2} cores on {3}".format(pattern.set1_elements(),pattern.set2_elements(),resource._cores,resource._resource_key))
 
 
-        STAGING_AREA = 'staging:///'
-        
-
         self.get_logger().info("Waiting for pilot on {0} to go Active".format(resource._resource_key))
         self._reporter.info("Job waiting on queue...".format(resource._resource_key))
-        resource._pmgr.wait_pilots(resource._pilot.uid,'Active')
+        resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')
         self._reporter.ok("\nJob is now running !".format(resource._resource_key))
 
+        #-----------------------------------------------------------------------
+        # Creates the CU description of an element initialization kernel. The
+        # element file is linked into the staging area, from where the
+        # comparisons pick it up.
+        def element_cud(kernel):
+            link_out_data=kernel.get_arg("--filename=")
+            resource._bind_kernel(kernel, exchange=True)
+            self.get_logger().debug("Kernels : {0}, Name: {1}".format(kernel,dir(kernel)))
+            OUTPUT_FILE           = {'source':link_out_data,
+                                     'target':os.path.join(STAGING_AREA,link_out_data),
+                                     'action':radical.pilot.LINK}
+            cudesc                = radical.pilot.ComputeUnitDescription()
+            cudesc.pre_exec       = kernel._cu_def_pre_exec
+            cudesc.executable     = kernel._cu_def_executable
+            cudesc.arguments      = kernel.arguments
+            cudesc.mpi            = kernel.uses_mpi
+            cudesc.cores          = kernel.cores
+            cudesc.output_staging = [OUTPUT_FILE]
+            self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Output: {4}".format(cudesc.pre_exec,
+                kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.output_staging))
+            return cudesc
+
+        #-----------------------------------------------------------------------
+        # Creates the CU description of a comparison kernel. Window elements
+        # that are referenced by both windows are only linked once. Elements
+        # from the result cache are linked from the cache.
+        def comparison_cud(kernel, i, j):
+            try:
+                link_input1=ast.literal_eval(kernel.get_arg("--inputfile1="))
+            except:
+                link_input1=[kernel.get_arg("--inputfile1=")]
+            try:
+                link_input2=ast.literal_eval(kernel.get_arg("--inputfile2="))
+            except:
+                link_input2=[kernel.get_arg("--inputfile2=")]
+            link_output=kernel.get_arg("--outputfile=")
+            resource._bind_kernel(kernel, exchange=True)
+            self.get_logger().debug("Link Input 1 = {0}".format(link_input1))
+            self.get_logger().debug("Link Input 2 = {0}".format(link_input2))
+
+            INPUT_FILES = list()
+            for link_input in link_input1 + link_input2:
+                if link_input not in [dd['target'] for dd in INPUT_FILES]:
+                    INPUT_FILES.append({'source': element_sources.get(link_input, os.path.join(STAGING_AREA,link_input)),
+                                        'target' : link_input,
+                                        'action' : radical.pilot.LINK})
+
+            cudesc                = radical.pilot.ComputeUnitDescription()
+            cudesc.name           = "comp; {el11};{el21}".format(el11=i,el21=j)
+            cudesc.pre_exec       = kernel._cu_def_pre_exec
+            cudesc.executable     = kernel._cu_def_executable
+            cudesc.arguments      = kernel.arguments
+            cudesc.mpi            = kernel.uses_mpi
+            cudesc.cores          = kernel.cores
+
+            if kernel._cu_def_input_data is None:
+                cudesc.input_staging  = INPUT_FILES
+            else:
+                cudesc.input_staging  = kernel._cu_def_input_data+INPUT_FILES
+            cudesc.output_staging = [link_output]
+            self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Input: {4} Output: {5}".format(cudesc.pre_exec,
+                kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.input_staging,cudesc.output_staging))
+            return cudesc
+
+        # The paths of the element files that are linked from the result
+        # cache, by file name.
+        element_sources = dict()
+
         try:
-            
+
             resource._umgr.register_callback(unit_state_cb)
-            CUDesc_list = list()
+
+            # Elements whose initialization units are in the result cache,
+            # e.g., from an earlier run on the same inputs, aren't initialized
+            # again. The cache key covers the executable, the arguments and
+            # the inputs of the unit, not just the name of the element file.
+            cache = getattr(resource, '_result_cache', None)
+            if pattern.reuse_cached_elements is True:
+                if cache is None:
+                    raise EnsemblemdError(
+                        msg="Reusing cached elements requires an execution context with a result_cache.")
+                cached_keys = cache.list_entries(resource._pilot)
+            else:
+                cached_keys = set()
+
+            #-------------------------------------------------------------------
+            # Element initialization. Elements are keyed by (set, element).
+            element_cuds     = dict()
+            element_runtimes = dict()
+            ready_elements   = set()
+
+            def add_element(key, kernel):
+                cudesc = element_cud(kernel)
+                cache_key = cache.get_key(cudesc) if cached_keys else None
+                if cache_key is not None and cache_key in cached_keys:
+                    filename = kernel.get_arg("--filename=")
+                    element_sources[filename] = os.path.join(cache.path, cache_key, filename)
+                    ready_elements.add(key)
+                else:
+                    element_cuds[key] = cudesc
+                    element_runtimes[key] = kernel.max_runtime
+
             self.get_logger().info("Creating the Elements of Set 1")
-            
             for i in range(1,NumElementsSet1+1):
-                kernel = pattern.set1element_initialization(element=i)
-                link_out_data=kernel.get_arg("--filename=")
-                kernel._bind_to_resource(resource._resource_key)
-                self.get_logger().debug("Kernels : {0}, Name: {1}".format(kernel,dir(kernel)))
-            #     #Output File Staging. The file after it is created in the folder of each CU, is moved to the folder defined in
-            #     #the start of the script
-                OUTPUT_FILE           = {'source':link_out_data,
-                                         'target':os.path.join(STAGING_AREA,link_out_data),
-                                         'action':radical.pilot.LINK}
-                cudesc                = radical.pilot.ComputeUnitDescription()
-                cudesc.pre_exec       = kernel._cu_def_pre_exec
-                cudesc.executable     = kernel._cu_def_executable
-                cudesc.arguments      = kernel.arguments
-                cudesc.mpi            = kernel.uses_mpi
-                cudesc.output_staging = [OUTPUT_FILE]
-                #self.get_logger().info("Target {0} to : {0}".format(kernel._cu_def_output_data))
-                self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Output: {4}".format(cudesc.pre_exec,
-                    kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.output_staging))
-                CUDesc_list.append(cudesc)
-            
+                add_element((1, i), pattern.set1element_initialization(element=i))
+
             if pattern.set2_elements() is not None:
                 self.get_logger().info("Creating the Elements of Set 2")
-            
                 for i in range(1,NumElementsSet2+1):
-                    kernel = pattern.set2element_initialization(element=i)
-                    link_out_data=kernel.get_arg("--filename=")
-                    kernel._bind_to_resource(resource._resource_key)
-                    self.get_logger().debug("Kernels : {0}, Name: {1}".format(kernel,dir(kernel)))
-                #     #Output File Staging. The file after it is created in the folder of each CU, is moved to the folder defined in
-                #     #the start of the script
-                    OUTPUT_FILE           = {'source':link_out_data,
-                                             'target':os.path.join(STAGING_AREA,link_out_data),
-                                             'action':radical.pilot.LINK}
-                    cudesc                = radical.pilot.ComputeUnitDescription()
-                    cudesc.pre_exec       = kernel._cu_def_pre_exec
-                    cudesc.executable     = kernel._cu_def_executable
-                    cudesc.arguments      = kernel.arguments
-                    cudesc.mpi            = kernel.uses_mpi
-                    cudesc.output_staging = [OUTPUT_FILE]
-                    #self.get_logger().info("Target {0} to : {0}".format(kernel._cu_def_output_data))
-                    self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Output: {4}".format(cudesc.pre_exec,
-                        kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.output_staging))
-                    CUDesc_list.append(cudesc)
-            
-            Units = resource._umgr.submit_units(CUDesc_list)
-            
-            self._reporter.info("\nWaiting to create the elements of set 2 ")
-            uids = [cu.uid for cu in Units]
-            resource._umgr.wait_units(uids)
-            self._reporter.ok('>> done')
-            CUDesc_list = list()
-            all_cus = []
-            
+                    add_element((2, i), pattern.set2element_initialization(element=i))
+
+            if ready_elements:
+                self.get_logger().info("Reusing {0} element(s) from the result cache.".format(len(ready_elements)))
+                self._reporter.info("\nReusing {0} cached element(s)".format(len(ready_elements)))
+
+            #-------------------------------------------------------------------
+            # Comparisons. Each comparison block depends on the elements of
+            # its two windows.
             windowsize1 = pattern._windowsize1
             windowsize2 = pattern._windowsize2
-            #journal = dict()
-            
-            #step_timings = {
-            #    "name": "AllPairs",
-            #    "timings": {}
-            #}
-            
+
             step_start_time_abs = datetime.datetime.now()
-            
-            for i in range(1,NumElementsSet1+1,windowsize1):
-                
+            deadline = get_deadline(resource)
+
+            # The last window of a set is shorter if the window size doesn't
+            # divide the size of the set.
+            blocks = list()
+            for window1, window2 in window_blocks(NumElementsSet1, windowsize1, NumElementsSet2, windowsize2):
+                kernel = pattern.element_comparison(elements1=window1, elements2=window2)
                 if pattern.set2_elements() is None:
-                
-                    for j in range(i,NumElementsSet1+1,windowsize1):
-                        kernel = pattern.element_comparison(elements1=range(i,i+windowsize1), 
-                            elements2=range(j,j+windowsize1))
-                        try:
-                            link_input1=ast.literal_eval(kernel.get_arg("--inputfile1="))
-                        except:
-                            link_input1=[kernel.get_arg("--inputfile1=")]
-                        try:
-                            link_input2=ast.literal_eval(kernel.get_arg("--inputfile2="))
-                        except:
-                            link_input2=[kernel.get_arg("--inputfile2=")]
-                        link_output=kernel.get_arg("--outputfile=")
-                        kernel._bind_to_resource(resource._resource_key)
-                        self.get_logger().info("Kernels : {0}, Name: {1}".format(kernel,dir(kernel)))
-                    #     #Output File Staging. The file after it is created in the folder of each CU, is moved to the folder defined in
-                    #     #the start of the script
-                        self.get_logger().debug("i = {0}, j = {1}, window size = {2}".format(i,j,windowsize1))
-                        self.get_logger().debug("Link Input 1 = {0}".format(link_input1))
-                        self.get_logger().debug("Link Input 2 = {0}".format(link_input2))
-                        INPUT_FILE1           = [{'source': os.path.join(STAGING_AREA,link_input1[k-1]),
-                                                'target' : link_input1[k-1],
-                                                'action' : radical.pilot.LINK} for k in range(1,windowsize1+1)]
-                
-                        if i != j:
-                            INPUT_FILE2           = [{'source': os.path.join(STAGING_AREA, link_input2[k-1]),
-                                                    'target' : link_input2[k-1],
-                                                    'action' : radical.pilot.LINK} for k in range(1,windowsize1+1)]
-                        else:
-                            INPUT_FILE2       = []
-                        cudesc                = radical.pilot.ComputeUnitDescription()
-                        cudesc.name           = "comp; {el11};{el21}".format(el11=i,el21=j)
-                        cudesc.pre_exec       = kernel._cu_def_pre_exec
-                        cudesc.executable     = kernel._cu_def_executable
-                        cudesc.arguments      = kernel.arguments
-                        cudesc.mpi            = kernel.uses_mpi
-                        self.get_logger().debug("Input File 1: {0}".format(INPUT_FILE1))
-                        self.get_logger().debug("Input File 2: {0}".format(INPUT_FILE2))
-                
-                        if kernel._cu_def_input_data is None:
-                            self.get_logger().debug("Input Staging without Kernel CU DEF Input Data")
-                            cudesc.input_staging  = INPUT_FILE1+INPUT_FILE2
-                        else:
-                            self.get_logger().debug("Input Staging with Kernel CU DEF Input Data")
-                            cudesc.input_staging  = kernel._cu_def_input_data+INPUT_FILE1+INPUT_FILE2
-                        cudesc.output_staging = [link_output]
-                        self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Input: {4} Output: {5}".format(cudesc.pre_exec,
-                            kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.input_staging,cudesc.output_staging))
-                        all_cus.append(cudesc)
-            
+                    required = set([(1, el) for el in window1 + window2])
                 else:
-            
-                    for j in range(1,NumElementsSet2+1,windowsize2):
-                        kernel = pattern.element_comparison(elements1=range(i,i+windowsize1), 
-                            elements2=range(j,j+windowsize2))
-                        try:
-                            link_input1=ast.literal_eval(kernel.get_arg("--inputfile1="))
-                        except:
-                            link_input1=[kernel.get_arg("--inputfile1=")]
-                        try:
-                            link_input2=ast.literal_eval(kernel.get_arg("--inputfile2="))
-                        except:
-                            link_input2=[kernel.get_arg("--inputfile2=")]
-                        link_output=kernel.get_arg("--outputfile=")
-                        kernel._bind_to_resource(resource._resource_key)
-                        self.get_logger().info("Kernels : {0}, Name: {1}".format(kernel,dir(kernel)))
-                    #     #Output File Staging. The file after it is created in the folder of each CU, is moved to the folder defined in
-                    #     #the start of the script
-                        INPUT_FILE1           = [{'source': os.path.join(STAGING_AREA,link_input1[k-1]),
-                                                'target' : link_input1[k-1],
-                                                'action' : radical.pilot.LINK} for k in range(1,windowsize1+1)]
-                        INPUT_FILE2           = [{'source': os.path.join(STAGING_AREA, link_input2[k-1]),
-                                                'target' : link_input2[k-1],
-                                                'action' : radical.pilot.LINK} for k in range(1,windowsize2+1)]
-                        cudesc                = radical.pilot.ComputeUnitDescription()
-                        cudesc.name           = "comp; {el11};{el21}".format(el11=i,el21=j)
-                        cudesc.pre_exec       = kernel._cu_def_pre_exec
-                        cudesc.executable     = kernel._cu_def_executable
-                        cudesc.arguments      = kernel.arguments
-                        cudesc.mpi            = kernel.uses_mpi
-            
-                        if kernel._cu_def_input_data is None:
-                            self.get_logger().debug("Input Staging without Kernel CU DEF Input Data")
-                            cudesc.input_staging=INPUT_FILE1+INPUT_FILE2
-                        else:
-                            self.get_logger().debug("Input Staging with Kernel CU DEF Input Data")
-                            cudesc.input_staging  = kernel._cu_def_input_data+INPUT_FILE1+INPUT_FILE2
-                        cudesc.output_staging = [link_output]
-                        self.get_logger().debug("Pre Exec: {0} Executable: {1} Arguments: {2} MPI: {3} Input: {4} Output: {5}".format(cudesc.pre_exec,
-                            kernel._cu_def_executable,cudesc.arguments,cudesc.mpi,cudesc.input_staging,cudesc.output_staging))
-                        all_cus.append(cudesc)
-            
-            sub_unit=resource._umgr.submit_units(all_cus)
-            
-            #self.get_logger().debug(sub_unit)
-            self._reporter.info("\nWaiting for analysis step to complete.")
-            uids = [cu.uid for cu in sub_unit]
-            resource._umgr.wait_units(uids)
+                    required = set([(1, el) for el in window1] + [(2, el) for el in window2])
+                blocks.append((comparison_cud(kernel, window1[0], window2[0]), required, kernel.max_runtime))
+
+            #-------------------------------------------------------------------
+            # Dataflow between the two phases: the comparisons of a block are
+            # submitted as soon as the elements of both of its windows exist,
+            # instead of waiting for all elements to be initialized.
+            element_keys   = sorted(element_cuds.keys())
+            element_descs  = [element_cuds[key] for key in element_keys]
+            element_limits = [element_runtimes[key] for key in element_keys]
+            if element_descs:
+                element_units = submit_units(resource, element_descs)
+            else:
+                element_units = list()
+
+            self._reporter.info("\nWaiting for the elements and comparisons to complete.")
+
+            comp_cuds     = list()
+            comp_runtimes = list()
+            comp_units    = list()
+            pending       = blocks
+            failed        = False
+            started       = dict()   # uid -> time an element was first seen executing
+            while pending and not failed:
+                now = time.time()
+
+                # The step times out and the elements are limited to their
+                # max_runtime like in the waits of the failure policy, which
+                # handles the canceled elements.
+                if deadline is not None and now > deadline:
+                    remaining = [unit for unit in element_units + comp_units
+                                 if unit.state not in [radical.pilot.DONE] + FAILED_STATES]
+                    resource._umgr.cancel_units(get_uids(remaining))
+                    raise EnsemblemdError(
+                        msg="Step timed out, canceled {0} unfinished unit(s).".format(len(remaining)))
+
+                for key, unit, limit in zip(element_keys, element_units, element_limits):
+                    if key in ready_elements:
+                        continue
+                    if unit.state == radical.pilot.DONE:
+                        ready_elements.add(key)
+                    elif unit.state in FAILED_STATES:
+                        failed = True
+                    elif unit.state == radical.pilot.EXECUTING and limit and not isinstance(unit, BundledUnit):
+                        started.setdefault(unit.uid, now)
+                        if now - started[unit.uid] > limit:
+                            self.get_logger().warning("Unit {0} exceeded its max_runtime of {1}s, canceling it.".format(
+                                unit.uid, limit))
+                            resource._umgr.cancel_units(unit.uid)
+                            failed = True
+
+                ready = [block for block in pending if block[1] <= ready_elements]
+                if ready:
+                    self.get_logger().debug("Submitting {0} comparison(s).".format(len(ready)))
+                    comp_cuds.extend([block[0] for block in ready])
+                    comp_runtimes.extend([block[2] for block in ready])
+                    comp_units.extend(submit_units(resource, [block[0] for block in ready]))
+                    pending = [block for block in pending if not block[1] <= ready_elements]
+
+                if pending and not failed:
+                    waiting = [unit for key, unit in zip(element_keys, element_units) if key not in ready_elements]
+                    resource._umgr.wait_units(get_uids(waiting), timeout=ELEMENT_POLL_INTERVAL)
+
+            # Once an element has failed, the remaining elements are waited
+            # for together, so that the failure policy can retry them.
+            try:
+                element_units = wait_units(resource, element_units, element_descs, element_limits, deadline)
+            except EnsemblemdError:
+                resource._umgr.cancel_units(get_uids([unit for unit in comp_units
+                                                      if unit.state not in [radical.pilot.DONE] + FAILED_STATES]))
+                raise
+            for key, unit in zip(element_keys, element_units):
+                if unit.state == radical.pilot.DONE:
+                    ready_elements.add(key)
+
+            ready = [block for block in pending if block[1] <= ready_elements]
+            if ready:
+                comp_cuds.extend([block[0] for block in ready])
+                comp_runtimes.extend([block[2] for block in ready])
+                comp_units.extend(submit_units(resource, [block[0] for block in ready]))
+            pending = [block for block in pending if not block[1] <= ready_elements]
+            if pending and resource._failure_policy != SKIP:
+                raise EnsemblemdError(
+                    msg="{0} comparison(s) can't run because elements failed.".format(len(pending)))
+            if pending:
+                self.get_logger().warning("Skipping {0} comparison(s) of failed elements.".format(len(pending)))
+                self._reporter.warn("Skipping {0} comparison(s) of failed elements".format(len(pending)))
+
+            comp_units = wait_units(resource, comp_units, comp_cuds, comp_runtimes, deadline)
             self._reporter.ok('>> done')
 
             step_end_time_abs = datetime.datetime.now()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+"""Archive staging of many small files.
+
+ComputeUnits that stage many small files spend most of their staging time
+on the per-file latency of the transfers. If the execution context has
+``archive_staging`` set, the transfers of a ComputeUnit in each direction
+are packed into a single compressed tar archive once the unit stages at
+least that many files:
+
+    * the local input files of a unit are packed on the client into one
+      archive that is uploaded instead, and unpacked in the unit sandbox by
+      a ``pre_exec`` command.
+    * the downloaded output files of a unit are packed in the sandbox by a
+      ``post_exec`` command into one archive that is downloaded instead,
+      and unpacked to their targets on the client once the unit is done.
+
+Links, copies and transfers from or to other URLs, and files whose path in
+the sandbox is absolute or leaves the sandbox with ``..``, are staged as
+before. The local input archive of a unit is removed once the unit has
+been waited for.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import pipes
+import shutil
+import tarfile
+import tempfile
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list, _copy_description
+from radical.ensemblemd.exec_plugins.staging import _get_upload_path, _is_download
+
+# The names of the archives in the unit sandboxes.
+INPUT_ARCHIVE  = "enmd_inputs.tar.gz"
+OUTPUT_ARCHIVE = "enmd_outputs.tar.gz"
+
+FINAL_STATES = [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]
+
+# ------------------------------------------------------------------------------
+#
+def _in_sandbox(path):
+    """Returns True if 'path' is a relative path that stays in the sandbox.
+    """
+    path = os.path.normpath(path)
+    return not os.path.isabs(path) and path != os.pardir and not path.startswith(os.pardir + os.sep)
+
+# ------------------------------------------------------------------------------
+#
+class ArchiveStaging(object):
+    """ArchiveStaging packs the staging of ComputeUnits with at least
+       'min_files' files in one direction into archives. The local archives
+       are kept in a temporary directory until :meth:`close` is called.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, min_files=2):
+        if min_files < 2:
+            raise EnsemblemdError(
+                msg="Archive staging needs a minimum of at least 2 files, got {0}.".format(min_files))
+
+        self._min_files = min_files
+        self._logger    = ru.get_logger('radical.enmd.archive_staging')
+        self._lock      = threading.Lock()
+        self._dir       = None
+        self._count     = 0
+
+        # The packed outputs and the input archives of the submitted
+        # units, by id(unit).
+        self._pending   = dict()
+        self._inputs    = dict()
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_path(self, name):
+        """Returns a new path for the local archive 'name'.
+        """
+        with self._lock:
+            if self._dir is None:
+                self._dir = tempfile.mkdtemp(prefix='enmd_archives_')
+            self._count += 1
+            return os.path.join(self._dir, "{0}_{1}".format(self._count, name))
+
+    # --------------------------------------------------------------------------
+    #
+    def pack_inputs(self, cud):
+        """Returns a copy of 'cud' that uploads its local input files in a
+           single archive, and the local path of the archive. Returns 'cud'
+           itself and None if it uploads less than 'min_files' files.
+        """
+        packed = list()
+        others = list()
+        for directive in _as_list(cud.input_staging):
+            path = _get_upload_path(_as_directive(directive))
+            if path is None or not _in_sandbox(_as_directive(directive)['target']):
+                others.append(directive)
+            else:
+                packed.append((path, os.path.normpath(_as_directive(directive)['target'])))
+
+        if len(packed) < self._min_files:
+            return cud, None
+
+        archive = self._get_path(INPUT_ARCHIVE)
+        tar = tarfile.open(archive, 'w:gz')
+        try:
+            for path, target in packed:
+                tar.add(path, arcname=target)
+        finally:
+            tar.close()
+
+        unpack = "tar xzf {0} && rm -f {0}".format(INPUT_ARCHIVE)
+
+        copy = _copy_description(cud)
+        copy.input_staging = others + [{'source': archive,
+                                        'target': INPUT_ARCHIVE,
+                                        'action': radical.pilot.TRANSFER}]
+        copy.pre_exec = [unpack] + _as_list(cud.pre_exec)
+        return copy, archive
+
+    # --------------------------------------------------------------------------
+    #
+    def pack_outputs(self, cud):
+        """Returns a copy of 'cud' that downloads its output files in a single
+           archive, and the local path of the archive with the list of
+           (source, target) pairs of the packed files. Returns 'cud' itself
+           and None if it downloads less than 'min_files' files.
+        """
+        packed = list()
+        others = list()
+        for directive in _as_list(cud.output_staging):
+            if _is_download(_as_directive(directive)) and _in_sandbox(_as_directive(directive)['source']):
+                directive = _as_directive(directive)
+                target = directive['target']
+                if target.startswith('file://'):
+                    target = saga.Url(target).path
+                packed.append((os.path.normpath(directive['source']), target))
+            else:
+                others.append(directive)
+
+        if len(packed) < self._min_files:
+            return cud, None
+
+        pack = "tar czf {0} {1}".format(
+            OUTPUT_ARCHIVE, " ".join([pipes.quote(source) for source, target in packed]))
+
+        archive = self._get_path(OUTPUT_ARCHIVE)
+
+        copy = _copy_description(cud)
+        copy.output_staging = others + [{'source': OUTPUT_ARCHIVE,
+                                         'target': archive,
+                                         'action': radical.pilot.TRANSFER}]
+        copy.post_exec = _as_list(cud.post_exec) + [pack]
+        return copy, (archive, packed)
+
+    # --------------------------------------------------------------------------
+    #
+    def add_unit(self, unit, input_archive, outputs):
+        """Records the 'input_archive' of 'unit', as returned by
+           :meth:`pack_inputs`, and its packed 'outputs', as returned by
+           :meth:`pack_outputs`.
+        """
+        with self._lock:
+            if input_archive is not None:
+                self._inputs[id(unit)] = (unit, input_archive)
+            if outputs is not None:
+                archive, packed = outputs
+                self._pending[id(unit)] = (unit, archive, packed)
+
+    # --------------------------------------------------------------------------
+    #
+    def remove_inputs(self, units):
+        """Removes the local input archives of 'units', which were waited for,
+           and of all other units that are final, e.g., failed units that
+           were resubmitted.
+        """
+        removed = list()
+        with self._lock:
+            for unit in units:
+                if id(unit) in self._inputs:
+                    removed.append(self._inputs.pop(id(unit))[1])
+            for unit_id, (unit, archive) in self._inputs.items():
+                if unit.state in FINAL_STATES:
+                    removed.append(self._inputs.pop(unit_id)[1])
+
+        for archive in removed:
+            try:
+                os.remove(archive)
+            except OSError, ex:
+                self._logger.debug("Can't remove input archive {0}: {1}".format(archive, ex))
+
+    # --------------------------------------------------------------------------
+    #
+    def unpack_outputs(self, units):
+        """Unpacks the downloaded output archives of the successful 'units'
+           to the targets of the packed files.
+        """
+        archives = list()
+        with self._lock:
+            for unit in units:
+                if id(unit) in self._pending:
+                    archives.append(self._pending.pop(id(unit)))
+
+            for unit_id, (unit, archive, packed) in self._pending.items():
+                if unit.state in [radical.pilot.FAILED, radical.pilot.CANCELED]:
+                    del self._pending[unit_id]
+
+        for unit, archive, packed in archives:
+            if unit.state != radical.pilot.DONE:
+                continue
+
+            if not os.path.exists(archive):
+                raise EnsemblemdError(
+                    msg="Output archive {0} of unit {1} wasn't downloaded.".format(archive, unit.uid))
+
+            tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(archive))
+            try:
+                tar = tarfile.open(archive, 'r:gz')
+                try:
+                    tar.extractall(tmp_dir)
+                finally:
+                    tar.close()
+
+                for source, target in packed:
+                    target = os.path.abspath(target)
+                    if os.path.isdir(target) and not os.path.isdir(os.path.join(tmp_dir, source)):
+                        target = os.path.join(target, os.path.basename(source))
+                    if not os.path.isdir(os.path.dirname(target)):
+                        os.makedirs(os.path.dirname(target))
+                    if os.path.isdir(target):
+                        shutil.rmtree(target)
+                    shutil.move(os.path.join(tmp_dir, source), target)
+            finally:
+                shutil.rmtree(tmp_dir)
+                os.remove(archive)
+
+            self._logger.debug("Unpacked {0} output file(s) of unit {1}.".format(len(packed), unit.uid))
+
+    # --------------------------------------------------------------------------
+    #
+    def close(self):
+        """Removes the local archives.
+        """
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
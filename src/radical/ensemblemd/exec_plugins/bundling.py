@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+"""Task bundling for the execution plugins.
+
+Many short, single-node ComputeUnits are dominated by the per-CU overhead.
+If the execution context has bundling enabled, :func:`submit_units` packs
+up to ``bundle_size`` CUs with the same number of cores into a single CU
+that runs them with the ``bundle_executor.py`` script. Every bundled CU
+runs in its own ``task_<k>`` subdirectory of the bundle's sandbox, and its
+input staging is redirected into that subdirectory.
+
+CUs with output staging aren't bundled: the output staging of a bundle
+fails as a whole if a single task didn't produce its output files, and the
+outputs of the tasks that succeeded would be lost.
+
+The CUs are submitted in the order of their packing plan (see
+:mod:`radical.ensemblemd.exec_plugins.packing`). :func:`submit_units`
+returns one unit per submitted description, in order. Units that were
+bundled are represented by :class:`BundledUnit` objects, which the plugins
+can use like ComputeUnits.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exec_plugins import packing
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list
+from radical.ensemblemd.kernel_plugins.scripts import get_script_path
+from radical.ensemblemd.kernel_plugins.scripts.bundle_executor import encode_tasks
+from radical.ensemblemd.kernel_plugins.scripts.bundle_executor import parse_status
+
+BUNDLE_EXECUTOR = "bundle_executor.py"
+
+TASK_DIR = "task_{0}"
+
+# ------------------------------------------------------------------------------
+#
+def _prefix_directive(directive, key, prefix):
+    """Returns a copy of the staging directive with 'prefix' prepended to its
+       'key' path ('source' or 'target').
+    """
+    directive = _as_directive(directive)
+    directive[key] = os.path.join(prefix, directive[key])
+    return directive
+
+# ------------------------------------------------------------------------------
+#
+def create_bundle(cuds, cores):
+    """Returns a ComputeUnitDescription that runs 'cuds' on 'cores' cores.
+    """
+    tasks         = list()
+    input_staging = [{'source': get_script_path(BUNDLE_EXECUTOR),
+                      'target': BUNDLE_EXECUTOR}]
+
+    for k, cud in enumerate(cuds):
+        workdir = TASK_DIR.format(k)
+        tasks.append({
+            "workdir"     : workdir,
+            "pre_exec"    : _as_list(cud.pre_exec),
+            "executable"  : cud.executable,
+            "arguments"   : _as_list(cud.arguments),
+            "post_exec"   : _as_list(cud.post_exec),
+            "environment" : cud.environment or {},
+            "cores"       : cud.cores or 1
+        })
+        for directive in _as_list(cud.input_staging):
+            input_staging.append(_prefix_directive(directive, 'target', workdir))
+
+    bundle                = radical.pilot.ComputeUnitDescription()
+    bundle.name           = "bundle; {0}".format(cuds[0].name)
+    bundle.executable     = "python"
+    bundle.arguments      = [BUNDLE_EXECUTOR,
+                             "--cores={0}".format(cores),
+                             "--tasks={0}".format(encode_tasks(tasks))]
+    bundle.cores          = cores
+    bundle.mpi            = False
+    bundle.input_staging  = input_staging
+    bundle.output_staging = None
+    return bundle
+
+# ------------------------------------------------------------------------------
+#
+def can_bundle(cud, bundle_cores):
+    """Returns True if 'cud' can be executed in a bundle of 'bundle_cores'
+       cores.
+    """
+    if cud.mpi or (cud.cores or 1) > bundle_cores:
+        return False
+    return not _as_list(cud.output_staging)
+
+# ------------------------------------------------------------------------------
+#
+class BundledUnit(object):
+    """A BundledUnit represents a ComputeUnit that was executed as task 'k'
+       of a bundle. Its state, exit code and working directory are those of
+       the task; all other attributes, including stdout and stderr, are
+       those of the bundle's unit. The output of the task is in the files
+       STDOUT and STDERR in its working directory. If the bundle's unit
+       fails, all of its tasks fail.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, bundle, k):
+        self._bundle = bundle
+        self._k      = k
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def bundle(self):
+        """Returns the ComputeUnit of the bundle.
+        """
+        return self._bundle
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def exit_code(self):
+        """Returns the exit code of the task or None if it isn't known yet.
+        """
+        exit_codes = parse_status(self._bundle.stdout)
+        if exit_codes is None or self._k >= len(exit_codes):
+            return None
+        return exit_codes[self._k]
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def state(self):
+        state = self._bundle.state
+        if state == radical.pilot.DONE:
+            # The executor always succeeds once it has reported the exit
+            # codes of the tasks.
+            if self.exit_code == 0:
+                return radical.pilot.DONE
+            return radical.pilot.FAILED
+        return state
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def working_directory(self):
+        return os.path.join(self._bundle.working_directory, TASK_DIR.format(self._k), '')
+
+    # --------------------------------------------------------------------------
+    #
+    def __getattr__(self, name):
+        return getattr(self._bundle, name)
+
+# ------------------------------------------------------------------------------
+#
+def submit_units(resource, cuds, routes=None):
+    """Submits 'cuds' to the unit manager of 'resource' and returns one unit
+       per description, in order. If the execution context has bundling
+       enabled, non-MPI descriptions without output staging with the same
+       number of cores and the same route are submitted in bundles.
+    """
+    bundle_size = getattr(resource, '_bundle_size', None)
+    if not bundle_size or bundle_size <= 1 or len(cuds) <= 1:
+        return packing.submit_units(resource, cuds, routes)
+
+    if routes is None:
+        routes = [None] * len(cuds)
+
+    bundle_cores = getattr(resource, '_bundle_cores', None) or 1
+
+    # Group the bundleable descriptions by their number of cores and their
+    # route, keeping their order.
+    groups = dict()
+    single = list()
+    for index, cud in enumerate(cuds):
+        if not can_bundle(cud, bundle_cores):
+            single.append(index)
+        else:
+            groups.setdefault((cud.cores or 1, routes[index]), list()).append(index)
+
+    # Each submitted description runs the descriptions with the indices in
+    # 'members'. Groups of one are submitted as they are.
+    descriptions = list()
+    members      = list()
+    for index in single:
+        descriptions.append(cuds[index])
+        members.append([index])
+    for task_cores, route in sorted(groups, key=lambda group: (group[0], sorted(group[1] or []))):
+        indices = groups[(task_cores, route)]
+        for first in range(0, len(indices), bundle_size):
+            bundle = indices[first:first+bundle_size]
+            if len(bundle) == 1:
+                descriptions.append(cuds[bundle[0]])
+                members.append([bundle[0]])
+            else:
+                cores = max(task_cores, min(bundle_cores, task_cores * len(bundle)))
+                descriptions.append(create_bundle([cuds[index] for index in bundle], cores))
+                members.append(bundle)
+
+    ru.get_logger('radical.enmd.bundling').info(
+        "Submitting {0} CUs as {1} CUs.".format(len(cuds), len(descriptions)))
+
+    if [route for route in routes if route is not None]:
+        submitted = packing.submit_units(resource, descriptions, [routes[bundle[0]] for bundle in members])
+    else:
+        submitted = packing.submit_units(resource, descriptions)
+
+    units = [None] * len(cuds)
+    for unit, bundle in zip(submitted, members):
+        if len(bundle) == 1:
+            units[bundle[0]] = unit
+        else:
+            for k, index in enumerate(bundle):
+                units[index] = BundledUnit(unit, k)
+    return units
+
+# ------------------------------------------------------------------------------
+#
+def get_uids(units):
+    """Returns the unique uids of the (bundle) units to wait for. Units that
+       weren't submitted have no uid.
+    """
+    uids = list()
+    seen = set()
+    for unit in units:
+        if unit.uid is not None and unit.uid not in seen:
+            seen.add(unit.uid)
+            uids.append(unit.uid)
+    return uids
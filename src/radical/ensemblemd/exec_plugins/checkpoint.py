@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""Checkpoints of the execution state of a pattern.
+
+A :class:`Checkpoint` records which steps of a pattern have completed,
+together with the working directories and the ComputeUnit ids of their
+units, in a local JSON file. The file is rewritten after every completed
+step. If a run dies, it can be resumed from the last completed step: the
+completed steps are skipped and their working directories are used to
+resolve the data references (``$PREV_ANALYSIS`` and friends) of the
+remaining steps.
+
+Resuming only works as long as the sandboxes of the completed steps still
+exist on the resource, i.e., if the previous run wasn't cleaned up.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import json
+import copy
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+
+# ------------------------------------------------------------------------------
+#
+class Checkpoint(object):
+    """A Checkpoint of the pattern 'pattern_name' executed on 'resource_key'.
+       'parameters' is a dictionary of the pattern parameters that must be
+       the same for a checkpoint to be resumed. If 'path' is None, the
+       checkpoint is kept in memory only.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, path, pattern_name, resource_key, parameters=None):
+        self._path   = path
+        self._logger = ru.get_logger('radical.enmd.checkpoint')
+        self._state  = {
+            "pattern"      : pattern_name,
+            "resource"     : resource_key,
+            "parameters"   : parameters or {},
+            "steps"        : [],
+            "working_dirs" : {},
+            "units"        : {}
+        }
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def path(self):
+        """Returns the path of the checkpoint file.
+        """
+        return self._path
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def steps(self):
+        """Returns the list of completed steps in order.
+        """
+        return list(self._state["steps"])
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def working_dirs(self):
+        """Returns a copy of the working directories of the completed steps.
+        """
+        return copy.deepcopy(self._state["working_dirs"])
+
+    # --------------------------------------------------------------------------
+    #
+    def get_unit_ids(self, step):
+        """Returns the ComputeUnit ids of the completed 'step'.
+        """
+        return list(self._state["units"].get(step, []))
+
+    # --------------------------------------------------------------------------
+    #
+    def is_completed(self, step):
+        """Returns True if 'step' has completed.
+        """
+        return step in self._state["steps"]
+
+    # --------------------------------------------------------------------------
+    #
+    def load(self):
+        """Loads the completed steps from the checkpoint file. Returns False
+           if there is no checkpoint file. Raises an EnsemblemdError if the
+           checkpoint belongs to another pattern, resource or set of
+           parameters.
+        """
+        if self._path is None or not os.path.exists(self._path):
+            return False
+
+        with open(self._path, 'r') as f:
+            try:
+                state = json.load(f)
+            except ValueError as ex:
+                raise EnsemblemdError(
+                    msg="Can't read checkpoint file {0}: {1}".format(self._path, ex))
+
+        for key in ["pattern", "resource", "parameters"]:
+            if state.get(key) != self._state[key]:
+                raise EnsemblemdError(
+                    msg="Checkpoint file {0} can't be resumed: {1} is {2}, expected {3}.".format(
+                        self._path, key, state.get(key), self._state[key]))
+
+        self._state["steps"]        = state.get("steps", [])
+        self._state["working_dirs"] = state.get("working_dirs", {})
+        self._state["units"]        = state.get("units", {})
+
+        self._logger.info("Loaded checkpoint {0} with {1} completed step(s).".format(
+            self._path, len(self._state["steps"])))
+        return True
+
+    # --------------------------------------------------------------------------
+    #
+    def complete(self, step, working_dirs, unit_ids=None):
+        """Records that 'step' has completed with the units 'unit_ids' and
+           saves the checkpoint together with the current 'working_dirs'.
+        """
+        if step not in self._state["steps"]:
+            self._state["steps"].append(step)
+        self._state["units"][step]  = list(unit_ids or [])
+        self._state["working_dirs"] = copy.deepcopy(working_dirs)
+        self.save()
+
+    # --------------------------------------------------------------------------
+    #
+    def save(self):
+        """Writes the checkpoint file. The file is replaced atomically, so
+           that a run that dies while it is written leaves the previous
+           checkpoint intact.
+        """
+        if self._path is None:
+            return
+
+        tmp_path = "{0}.tmp".format(self._path)
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.rename(tmp_path, self._path)
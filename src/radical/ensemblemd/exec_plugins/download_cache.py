@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""A shared cache for the ``download_input_data`` of the kernels.
+
+The ``download_input_data`` of a kernel is downloaded by a ``curl``
+command in the pre_exec of every ComputeUnit, so an ensemble downloads the
+same files from the web server once per instance. If the execution
+context has a download cache, the URLs of a step are instead fetched once
+into a cache directory on the resource by a single ComputeUnit that runs
+the ``url_cache.py`` script, and the ComputeUnits of the step link the
+cached files into their sandboxes.
+
+The fetch task revalidates cached entries with their ETag and size, and
+serializes concurrent fetches of the same URL with a lock file. Every URL
+is fetched at most once per cache directory and execution context; URLs
+that can't be cached are downloaded by the ComputeUnits as before.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import re
+import urlparse
+import hashlib
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.kernel import CURL_DOWNLOAD, CURL_DOWNLOAD_RENAME
+from radical.ensemblemd.exec_plugins.staging import get_exchange_pilot, get_staging_area_url
+from radical.ensemblemd.exec_plugins.staging import _as_list, _copy_description
+from radical.ensemblemd.kernel_plugins.scripts import get_script_path
+from radical.ensemblemd.kernel_plugins.scripts.url_cache import parse_status, FETCHED, VALID
+
+URL_CACHE = "url_cache.py"
+
+# The cache directory in the staging area of the pilot.
+CACHE_DIR = "enmd_url_cache"
+
+_CURL_DOWNLOAD = re.compile("^{0}$".format(
+    re.escape(CURL_DOWNLOAD).replace(re.escape("{0}"), r"(\S+)")))
+_CURL_DOWNLOAD_RENAME = re.compile("^{0}$".format(
+    re.escape(CURL_DOWNLOAD_RENAME).replace(re.escape("{0}"), r"(\S+)").replace(re.escape("{1}"), r"(\S+)")))
+
+# ------------------------------------------------------------------------------
+#
+def parse_download(command):
+    """Returns the URL and the target file of the download_input_data
+       pre_exec 'command' or None if 'command' isn't a download.
+    """
+    match = _CURL_DOWNLOAD.match(command)
+    if match is not None:
+        url = match.group(1)
+        return url, os.path.basename(urlparse.urlparse(url).path)
+
+    match = _CURL_DOWNLOAD_RENAME.match(command)
+    if match is not None:
+        return match.group(1), match.group(2)
+
+    return None
+
+# ------------------------------------------------------------------------------
+#
+def get_entry_name(url):
+    """Returns the name of the cache entry of 'url'.
+    """
+    basename = os.path.basename(urlparse.urlparse(url).path) or "index"
+    return "{0}_{1}".format(hashlib.sha1(url).hexdigest()[:16], basename)
+
+# ------------------------------------------------------------------------------
+#
+class DownloadCache(object):
+    """A DownloadCache in the directory 'path' on the resource. If 'path' is
+       None, the cache is kept in the staging area of the pilot.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, path=None):
+        self._path   = path
+        self._logger = ru.get_logger('radical.enmd.download_cache')
+        self._lock   = threading.Lock()
+        self._cached = set()    # (cache path, URL) of the URLs that were cached by this context
+        self._failed = set()    # (cache path, URL) of the URLs that couldn't be cached
+
+    # --------------------------------------------------------------------------
+    #
+    def get_path(self, resource):
+        """Returns the path of the cache directory on the resource.
+        """
+        if self._path is not None:
+            return self._path
+        return os.path.join(get_staging_area_url(get_exchange_pilot(resource)).path, CACHE_DIR)
+
+    # --------------------------------------------------------------------------
+    #
+    def create_fetch_description(self, path, urls):
+        """Returns a description that fetches 'urls' into the cache directory
+           'path'.
+        """
+        arguments = [URL_CACHE, "--cache-dir={0}".format(path)]
+        for url in urls:
+            arguments.extend([get_entry_name(url), url])
+
+        fetch                = radical.pilot.ComputeUnitDescription()
+        fetch.name           = "url_cache"
+        fetch.executable     = "python"
+        fetch.arguments      = arguments
+        fetch.cores          = 1
+        fetch.mpi            = False
+        fetch.input_staging  = [{'source': get_script_path(URL_CACHE),
+                                 'target': URL_CACHE}]
+        fetch.output_staging = None
+        return fetch
+
+    # --------------------------------------------------------------------------
+    #
+    def fetch(self, resource, path, urls):
+        """Fetches 'urls' into the cache directory 'path' with a single
+           ComputeUnit and waits for it.
+        """
+        unit = resource._umgr.submit_units(self.create_fetch_description(path, urls))
+        resource._umgr.wait_units(unit.uid)
+
+        status = parse_status(unit.stdout)
+        with self._lock:
+            for url in urls:
+                if status.get(get_entry_name(url)) in [FETCHED, VALID]:
+                    self._cached.add((path, url))
+                else:
+                    self._failed.add((path, url))
+
+        fetched = len([url for url in urls if status.get(get_entry_name(url)) == FETCHED])
+        self._logger.info("Cached {0} of {1} URL(s), {2} fetched, in unit {3}.".format(
+            len([url for url in urls if (path, url) in self._cached]), len(urls), fetched, unit.uid))
+
+    # --------------------------------------------------------------------------
+    #
+    def link_downloads(self, resource, cuds):
+        """Returns 'cuds' with the downloads in their pre_exec replaced by
+           links to the cache. The URLs that aren't cached yet are fetched
+           first.
+        """
+        path      = self.get_path(resource)
+        downloads = list()
+        for cud in cuds:
+            downloads.append([parse_download(command) for command in _as_list(cud.pre_exec)])
+
+        with self._lock:
+            new_urls = list()
+            for cud_downloads in downloads:
+                for download in cud_downloads:
+                    if download is not None and (path, download[0]) not in self._cached \
+                       and (path, download[0]) not in self._failed and download[0] not in new_urls:
+                        new_urls.append(download[0])
+
+        if new_urls:
+            self.fetch(resource, path, new_urls)
+
+        linked = list()
+        for cud, cud_downloads in zip(cuds, downloads):
+            pre_exec = list()
+            links    = list()
+            for command, download in zip(_as_list(cud.pre_exec), cud_downloads):
+                if download is not None and (path, download[0]) in self._cached:
+                    links.append({'source': os.path.join(path, get_entry_name(download[0])),
+                                  'target': download[1],
+                                  'action': radical.pilot.LINK})
+                else:
+                    pre_exec.append(command)
+
+            if not links:
+                linked.append(cud)
+                continue
+
+            copy = _copy_description(cud)
+            copy.pre_exec = pre_exec
+            copy.input_staging = _as_list(cud.input_staging) + links
+            linked.append(copy)
+
+        return linked
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""Failure handling for the execution plugins.
+
+The failure policy of an execution context determines what happens to the
+ComputeUnits of a step that fail:
+
+    * ``abort``    -- the pattern execution is aborted (default).
+    * ``retry``    -- failed units are resubmitted, up to ``max_retries``
+                      times.
+    * ``resubmit`` -- like ``retry``, but pilots that failed are replaced
+                      by new pilots first, so that the units are
+                      resubmitted to another pilot.
+    * ``skip``     -- failed units are logged and skipped; the pattern
+                      continues with the remaining units. Units of later
+                      steps that stage their input from a skipped unit are
+                      skipped as well (:mod:`.skipped_units`).
+
+Units that are canceled because they exceeded the ``max_runtime`` of their
+kernel are handled like failed units.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import time
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins import speculation
+from radical.ensemblemd.exec_plugins.submission import submit_units
+
+ABORT    = "abort"
+RETRY    = "retry"
+RESUBMIT = "resubmit"
+SKIP     = "skip"
+
+POLICIES = [ABORT, RETRY, RESUBMIT, SKIP]
+
+FAILED_STATES = [radical.pilot.FAILED, radical.pilot.CANCELED]
+
+# ------------------------------------------------------------------------------
+#
+def get_deadline(resource):
+    """Returns the time at which a step that starts now times out, or None
+       if 'resource' has no step timeout.
+    """
+    step_timeout = getattr(resource, '_step_timeout', None)
+    if step_timeout:
+        return time.time() + step_timeout
+    return None
+
+# ------------------------------------------------------------------------------
+#
+def wait_units(resource, units, cuds, max_runtimes=None, deadline=None):
+    """Waits for 'units', which were submitted from the descriptions 'cuds',
+       and handles the failed units according to the failure policy of
+       'resource'. Units that execute for longer than their entry in
+       'max_runtimes' are canceled and handled like failed units. Returns
+       the final units in the order of 'cuds'. Raises an EnsemblemdError if
+       units still fail after all retries or if the step times out. The
+       step times out after the step timeout of 'resource', or at the time
+       'deadline' if it is given.
+    """
+    units = list(units)
+
+    if deadline is None:
+        deadline = get_deadline(resource)
+
+    units = speculation.wait_units(resource, units, cuds, max_runtimes, deadline)
+    units = _handle_failures(resource, units, cuds, max_runtimes, deadline)
+
+    # Record the resources and the nodes that produced the working
+    # directories.
+    router = getattr(resource, '_router', None)
+    if router is not None:
+        router.record(resource, units)
+    producer_nodes = getattr(resource, '_producer_nodes', None)
+    if producer_nodes is not None:
+        producer_nodes.record(units)
+
+    # Download the outputs that were deferred to the transfer manager, unpack
+    # the output archives and remove the input archives.
+    transfers = getattr(resource, '_transfer_manager', None)
+    if transfers is not None:
+        transfers.download_outputs(units)
+    archives = getattr(resource, '_archive_staging', None)
+    if archives is not None:
+        archives.unpack_outputs(units)
+        archives.remove_inputs(units)
+
+    # Start the downloads that don't need to be waited for.
+    background = getattr(resource, '_background_downloads', None)
+    if background is not None:
+        background.enqueue(resource, units, cuds)
+    return units
+
+# ------------------------------------------------------------------------------
+#
+def _handle_failures(resource, units, cuds, max_runtimes, deadline):
+    """Handles the failed 'units' according to the failure policy of
+       'resource' and returns the final units.
+    """
+    logger  = ru.get_logger('radical.enmd.failure_policy')
+    policy  = getattr(resource, '_failure_policy', ABORT)
+    retries = 0
+
+    while True:
+        failed = [i for i, unit in enumerate(units) if unit.state in FAILED_STATES]
+
+        if not failed:
+            return units
+
+        for i in failed:
+            logger.error("Unit {0} failed: {1}".format(units[i].uid or units[i].name, units[i].stderr))
+
+        if policy == ABORT:
+            # Failed units have aborted the execution in the state callback
+            # of the plugin already, canceled units haven't.
+            canceled = [i for i in failed if units[i].state == radical.pilot.CANCELED]
+            if canceled:
+                raise EnsemblemdError(
+                    msg="{0} unit(s) were canceled.".format(len(canceled)))
+            return units
+
+        if policy == SKIP:
+            skipped_units = getattr(resource, '_skipped_units', None)
+            if skipped_units is not None:
+                skipped_units.record([units[i] for i in failed])
+            logger.warning("Skipping {0} failed unit(s).".format(len(failed)))
+            resource._reporter.warn("Skipping {0} failed unit(s)".format(len(failed)))
+            return units
+
+        if retries >= resource._max_retries:
+            raise EnsemblemdError(
+                msg="{0} unit(s) still failed after {1} retries.".format(len(failed), retries))
+
+        if policy == RESUBMIT:
+            resource._replace_failed_pilots()
+
+        if not [pilot for pilot in resource._pilots if pilot.state not in
+                [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]]:
+            raise EnsemblemdError(
+                msg="Can't resubmit {0} failed unit(s): no pilot left.".format(len(failed)))
+
+        retries += 1
+        logger.info("Resubmitting {0} failed unit(s), retry {1} of {2}.".format(
+            len(failed), retries, resource._max_retries))
+        resource._reporter.info("\nResubmitting {0} failed unit(s)".format(len(failed)))
+
+        failed_cuds = [cuds[i] for i in failed]
+        resubmitted = submit_units(resource, failed_cuds)
+        if max_runtimes:
+            failed_runtimes = [max_runtimes[i] for i in failed]
+        else:
+            failed_runtimes = None
+        resubmitted = speculation.wait_units(resource, resubmitted, failed_cuds, failed_runtimes, deadline)
+        for i, unit in zip(failed, resubmitted):
+            units[i] = unit
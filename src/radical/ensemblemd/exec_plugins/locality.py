@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""Data locality of the ComputeUnit working directories.
+
+:class:`ProducerNodes` records on which node each ComputeUnit was executed,
+by the path of its working directory. The unit schedulers of radical.pilot
+can't pin a ComputeUnit to a node, so the record doesn't influence where
+units are placed. Instead, if the execution context has
+``node_local_inputs`` enabled, ComputeUnits that link files from these
+working directories, e.g. analysis units that link the outputs of the
+simulations via ``$SIMULATION_ITERATION_X_INSTANCE_Y``, make these links
+with the ``node_cache.py`` script in their pre_exec, on the node they land
+on. Files that were produced on the same node are linked directly, since
+they are likely still in the page cache. All other files are copied once
+per node into a bounded node-local cache and linked from there, so that
+the units on a node share a single read from the shared file system.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import pipes
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list, _copy_description
+from radical.ensemblemd.kernel_plugins.scripts import get_script_path
+
+NODE_CACHE = "node_cache.py"
+
+# ------------------------------------------------------------------------------
+#
+class ProducerNodes(object):
+    """ProducerNodes records the node that produced each working directory.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self):
+        self._logger = ru.get_logger('radical.enmd.locality')
+        self._lock   = threading.Lock()
+        self._nodes  = dict()   # working directory path -> node
+
+    # --------------------------------------------------------------------------
+    #
+    def record(self, units):
+        """Records the nodes of the successful 'units'. Units that don't
+           report their execution location are skipped.
+        """
+        with self._lock:
+            for unit in units:
+                if unit.state != radical.pilot.DONE or not unit.working_directory:
+                    continue
+                locations = getattr(unit, 'execution_locations', None)
+                if not locations:
+                    continue
+                path = os.path.normpath(saga.Url(unit.working_directory).path)
+                self._nodes[path] = str(locations[0]).split(':')[0]
+
+    # --------------------------------------------------------------------------
+    #
+    def get_node(self, path):
+        """Returns the node that produced the file or working directory
+           'path' or None if it isn't known.
+        """
+        path = os.path.normpath(path)
+        with self._lock:
+            while path not in ['/', '']:
+                if path in self._nodes:
+                    return self._nodes[path]
+                path = os.path.dirname(path)
+        return None
+
+    # --------------------------------------------------------------------------
+    #
+    def localize(self, cud):
+        """Returns a copy of 'cud' that links the files from recorded working
+           directories through the node-local cache, or 'cud' itself if it
+           doesn't link any.
+        """
+        arguments = list()
+        others    = list()
+        for directive in _as_list(cud.input_staging):
+            link = _as_directive(directive)
+            path = saga.Url(link['source']).path
+            node = self.get_node(path) if link.get('action') == radical.pilot.LINK else None
+            if node is None:
+                others.append(directive)
+                continue
+            arguments.extend([path, os.path.normpath(link['target']), node])
+
+        if not arguments:
+            return cud
+
+        self._logger.debug("Linking {0} input(s) of {1} through the node-local cache.".format(
+            len(arguments) // 3, cud.name))
+
+        command = "python {0} {1}".format(NODE_CACHE, " ".join([pipes.quote(arg) for arg in arguments]))
+
+        copy = _copy_description(cud)
+        copy.input_staging = others + [{'source': get_script_path(NODE_CACHE),
+                                        'target': NODE_CACHE}]
+        copy.pre_exec = [command] + _as_list(cud.pre_exec)
+        return copy
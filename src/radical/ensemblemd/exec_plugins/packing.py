@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""Core-aware packing of ComputeUnits into a pilot.
+
+The agent scheduler places ComputeUnits in the order in which they are
+submitted. If small units are submitted first, a large (MPI) unit often has
+to wait until enough of them have finished at the same time, and the cores
+they free up in the meantime stay idle. :func:`plan` orders the units by a
+first-fit decreasing list schedule against the size of the pilot: the
+largest units are placed first and smaller units backfill the remaining
+cores. The plan also estimates the makespan and the core utilization.
+
+Runtimes are not known in advance. Unless estimates are given, all units
+are assumed to take the same time and the makespan is reported in units
+of that time.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import heapq
+import radical.utils as ru
+
+# ------------------------------------------------------------------------------
+#
+class PackingPlan(object):
+    """A PackingPlan holds the submission order of a list of units and the
+       estimated makespan of that order.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, order, start_times, makespan, utilization):
+        self.order       = order
+        self.start_times = start_times
+        self.makespan    = makespan
+        self.utilization = utilization
+
+# ------------------------------------------------------------------------------
+#
+def plan(cores, pilot_cores, runtimes=None):
+    """Returns the PackingPlan for units with the given numbers of 'cores'
+       on a pilot with 'pilot_cores' cores. Units that are larger than the
+       pilot are planned as if they used the whole pilot.
+    """
+    if runtimes is None:
+        runtimes = [1.0] * len(cores)
+
+    cores = [max(1, min(c or 1, pilot_cores)) for c in cores]
+
+    # First fit decreasing: at every point in time, the pending units are
+    # tried from the largest to the smallest and every unit that fits is
+    # started.
+    pending     = sorted(range(len(cores)), key=lambda i: -cores[i])
+    start_times = [None] * len(cores)
+    running     = list()
+    free        = pilot_cores
+    now         = 0.0
+    makespan    = 0.0
+
+    while pending:
+        waiting = list()
+        for i in pending:
+            if cores[i] <= free:
+                start_times[i] = now
+                free -= cores[i]
+                heapq.heappush(running, (now + runtimes[i], cores[i]))
+                makespan = max(makespan, now + runtimes[i])
+            else:
+                waiting.append(i)
+        pending = waiting
+
+        if pending:
+            now, released = heapq.heappop(running)
+            free += released
+            while running and running[0][0] <= now:
+                free += heapq.heappop(running)[1]
+
+    order = sorted(range(len(cores)), key=lambda i: (start_times[i], -cores[i]))
+
+    if makespan > 0:
+        utilization = sum([c * r for c, r in zip(cores, runtimes)]) / float(pilot_cores * makespan)
+    else:
+        utilization = 0.0
+
+    return PackingPlan(order, start_times, makespan, utilization)
+
+# ------------------------------------------------------------------------------
+#
+def submit_units(resource, cuds, routes=None):
+    """Submits 'cuds' to the unit manager of 'resource' in the order of
+       their PackingPlan and returns the units in the order of 'cuds'. If
+       'routes' are given, each description is placed on one of the
+       resources of its route.
+    """
+    if len(cuds) <= 1 or len(set([cud.cores for cud in cuds])) <= 1:
+        order = range(len(cuds))
+    else:
+        packing = plan([cud.cores for cud in cuds], resource._cores)
+        ru.get_logger('radical.enmd.packing').info(
+            "Planned makespan of {0} CUs on {1} cores: {2} unit runtimes, {3:.0f}% core utilization.".format(
+                len(cuds), resource._cores, packing.makespan, 100 * packing.utilization))
+        order = packing.order
+
+    if routes is None:
+        submitted = resource._umgr.submit_units([cuds[i] for i in order])
+    else:
+        submitted = resource._umgr.submit_units([cuds[i] for i in order], [routes[i] for i in order])
+
+    units = [None] * len(cuds)
+    for unit, i in zip(submitted, order):
+        units[i] = unit
+    return units
@@ -18,6 +18,9 @@ import radical.pilot
 
 from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import ABORT, wait_units
+from radical.ensemblemd.exec_plugins.staging import link_read_only_inputs, _as_directive
 
 
 # ------------------------------------------------------------------------------
@@ -79,8 +82,9 @@ class Plugin(PluginBase):
 
             if state == radical.pilot.FAILED:
                 self.get_logger().error("Task with ID {0} failed: STDERR: {1}, STDOUT: {2} LAST LOG: {3}".format(unit.uid, unit.stderr, unit.stdout, unit.log[-1]))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(1)
+                if resource._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(1)
 
         self._reporter.ok('>>ok')
         pipeline_instances = pattern.instances
@@ -97,7 +101,7 @@ class Plugin(PluginBase):
 
         self.get_logger().info("Waiting for pilot on {0} to go Active".format(resource._resource_key))
         self._reporter.info("Job waiting on queue...".format(resource._resource_key))
-        resource._pmgr.wait_pilots(resource._pilot.uid,'Active')
+        resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')
         self._reporter.ok("\nJob is now running !".format(resource._resource_key))
 
         profiling = int(os.environ.get('RADICAL_ENMD_PROFILING',0))
@@ -136,12 +140,13 @@ class Plugin(PluginBase):
                     break
 
                 p_units=[]
+                p_runtimes=[]
                 all_step_cus = []
 
                 for instance in range(1, pipeline_instances+1):
 
                     kernel = s_meth(instance)
-                    kernel._bind_to_resource(resource._resource_key)
+                    resource._bind_kernel(kernel)
 
                     cud = radical.pilot.ComputeUnitDescription()
                     cud.name = "step_{0}".format(step)
@@ -235,6 +240,7 @@ class Plugin(PluginBase):
                                         'action': radical.pilot.COPY
                                     }
                             data_in.append(temp)
+                        data_in = link_read_only_inputs(data_in, kernel._kernel._read_only_input_data)
 
                     if cud.input_staging is None:
                         cud.input_staging = data_in
@@ -311,11 +317,24 @@ class Plugin(PluginBase):
                         cud.output_staging += data_out
                     #------------------------------------------------------------------------------------------------------------------
 
+                    #------------------------------------------------------------------------------------------------------------------
+                    # background_download_output_data
+                    data_out = []
+                    if kernel._kernel._background_download_output_data is not None:
+                        for i in range(0,len(kernel._kernel._background_download_output_data)):
+                            var=resolve_placeholder_vars(working_dirs, instance, pipeline_steps, kernel._kernel._background_download_output_data[i])
+                            data_out.append(_as_directive(var))
+
+                    if data_out:
+                        cud = resource._background_downloads.add_directives(cud, data_out)
+                    #------------------------------------------------------------------------------------------------------------------
+
 
                     if kernel.cores is not None:
                         cud.cores = kernel.cores
 
                     p_units.append(cud)
+                    p_runtimes.append(kernel.max_runtime)
 
                 self.get_logger().debug("Created step_{0} CU: {1}.".format(step,cud.as_dict()))
                 
@@ -326,11 +345,9 @@ class Plugin(PluginBase):
                     enmd_overhead_dict['step_{0}'.format(step)]['wait_time'] = datetime.datetime.now()
 
 
-                p_cus = resource._umgr.submit_units(p_units)
+                p_cus = submit_units(resource, p_units)
+                p_cus = wait_units(resource, p_cus, p_units, p_runtimes)
                 all_step_cus.extend(p_cus)
-
-                uids = [cu.uid for cu in p_cus]
-                resource._umgr.wait_units(uids)
                 
 
                 self.get_logger().info("step_{0}/kernel {1}: completed.".format(step,kernel.name))
@@ -18,6 +18,8 @@ import datetime
 import radical.pilot
 from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import ABORT, wait_units
 
 # ------------------------------------------------------------------------------
 #
@@ -54,8 +56,9 @@ class Plugin(PluginBase):
 
             if state == radical.pilot.FAILED:
                 self.get_logger().error("ComputeUnit error: STDERR: {0}, STDOUT: {0}".format(unit.stderr, unit.stdout))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(1)
+                if resource._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(1)
 
         try:
 
@@ -93,7 +96,7 @@ class Plugin(PluginBase):
 
             # Pilot must be active
             self._reporter.info("Job waiting on queue...".format(resource._resource_key))
-            resource._pmgr.wait_pilots(resource._pilot.uid,'Active')
+            resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')
             self._reporter.ok("\nJob is now running !".format(resource._resource_key))
 
             resource._umgr.register_callback(unit_state_cb)
@@ -122,6 +125,7 @@ class Plugin(PluginBase):
                 # start of MD step preparation
                 #---------------------------------------------------------------
                 cus = []
+                runtimes = []
                 md_units = []
                 for r in replicas:
 
@@ -129,7 +133,7 @@ class Plugin(PluginBase):
                     pattern.build_input_file(r)
                     self.get_logger().info("Preparing replica %d for MD run" % r.id)
                     r_kernel = pattern.prepare_replica_for_md(r)
-                    r_kernel._bind_to_resource(resource._resource_key)
+                    resource._bind_kernel(r_kernel)
 
                     cu                = radical.pilot.ComputeUnitDescription()
                     cu.pre_exec       = r_kernel._cu_def_pre_exec
@@ -140,6 +144,7 @@ class Plugin(PluginBase):
                     cu.input_staging  = r_kernel._cu_def_input_data
                     cu.output_staging = r_kernel._cu_def_output_data
                     cus.append(cu)
+                    runtimes.append(r_kernel.max_runtime)
 
                 #---------------------------------------------------------------
                 # end of MD step preparation
@@ -153,9 +158,8 @@ class Plugin(PluginBase):
          
                 self.get_logger().info("Performing MD step for replicas")
                 self._reporter.info("\nCycle {0}: Waiting for MD step to complete".format(c))
-                md_units = resource._umgr.submit_units(cus)
-                uids = [cu.uid for cu in md_units]
-                resource._umgr.wait_units(uids)
+                md_units = submit_units(resource, cus)
+                md_units = wait_units(resource, md_units, cus, runtimes)
 
                 if do_profile == '1':
                     step_end_time_abs = datetime.datetime.utcnow()
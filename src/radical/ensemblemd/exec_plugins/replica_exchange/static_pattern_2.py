@@ -19,6 +19,9 @@ import datetime
 import radical.pilot
 from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import ABORT, wait_units
+from radical.ensemblemd.exec_plugins.staging import get_exchange_pilot, link_read_only_inputs
 
 # ------------------------------------------------------------------------------
 #
@@ -54,8 +57,9 @@ class Plugin(PluginBase):
 
             if state == radical.pilot.FAILED:
                 self.get_logger().error("ComputeUnit error: STDERR: {0}, STDOUT: {0}".format(unit.stderr, unit.stdout))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(1)
+                if resource._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(1)
 
         try:
             self._reporter.ok('>>ok')
@@ -104,7 +108,7 @@ class Plugin(PluginBase):
                             'action': radical.pilot.TRANSFER
                 }
 
-                resource._pilot.stage_in(sd_pilot)
+                get_exchange_pilot(resource).stage_in(sd_pilot)
 
                 sd_shared = {'source': 'staging:///%s' % shared_input_files[i],
                              'target': shared_input_files[i],
@@ -114,7 +118,7 @@ class Plugin(PluginBase):
 
             # Pilot must be active
             self._reporter.info("Job waiting on queue...".format(resource._resource_key))
-            resource._pmgr.wait_pilots(resource._pilot.uid,'Active')
+            resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')
             self._reporter.ok("\nJob is now running !".format(resource._resource_key))       
      
             resource._umgr.register_callback(unit_state_cb)
@@ -142,6 +146,7 @@ class Plugin(PluginBase):
                 # start of MD step preparation
                 #---------------------------------------------------------------
                 cus = []
+                runtimes = []
                 md_units = []
                 for r in replicas:
 
@@ -151,9 +156,9 @@ class Plugin(PluginBase):
                     r_kernel = pattern.prepare_replica_for_md(r)
 
                     if ((r_kernel._kernel.get_name()) == "md.amber"):
-                        r_kernel._bind_to_resource(resource._resource_key, pattern.name)
+                        resource._bind_kernel(r_kernel, pattern.name, exchange=True)
                     else:
-                        r_kernel._bind_to_resource(resource._resource_key)
+                        resource._bind_kernel(r_kernel, exchange=True)
 
                     # processing data directives
                     # need means to distinguish between copy and link
@@ -183,7 +188,7 @@ class Plugin(PluginBase):
                     if r_kernel._cu_def_input_data:
                         in_list = in_list + r_kernel._cu_def_input_data
                     if sd_shared_list:
-                        in_list = in_list + sd_shared_list
+                        in_list = in_list + link_read_only_inputs(sd_shared_list, r_kernel._kernel._read_only_input_data)
                     cu.input_staging  = in_list
 
                     out_list = []
@@ -193,6 +198,7 @@ class Plugin(PluginBase):
                         out_list = out_list + copy_out
                     cu.output_staging = out_list
                     cus.append(cu)
+                    runtimes.append(r_kernel.max_runtime)
 
                 #---------------------------------------------------------------
                 # end of MD step preparation
@@ -205,10 +211,9 @@ class Plugin(PluginBase):
                     step_performance_data['cycle_{0}'.format(c)]['md_step']['enmd_ov_duration'] = (enmd_ov_step_end_time_abs - step_start_time_abs).total_seconds() 
          
                 self.get_logger().info("Cycle %d: Performing MD step for replicas" % (c) )
-                md_units = resource._umgr.submit_units(cus)
+                md_units = submit_units(resource, cus)
                 self._reporter.info("\nCycle {0}: Waiting for MD step to complete".format(c))
-                uids = [cu.uid for cu in md_units]
-                resource._umgr.wait_units(uids)
+                md_units = wait_units(resource, md_units, cus, runtimes)
 
                 if do_profile == '1':
                     step_end_time_abs = datetime.datetime.utcnow()
@@ -240,11 +245,12 @@ class Plugin(PluginBase):
                 # start of Exchange step preparation 
                 #---------------------------------------------------------------
                 cus = []
+                runtimes = []
                 ex_units = []
                 for r in replicas:
                     self.get_logger().info("Cycle %d: Preparing replica %d for Exchange run" % ((c), r.id) )
                     ex_kernel = pattern.prepare_replica_for_exchange(r)
-                    ex_kernel._bind_to_resource(resource._resource_key)
+                    resource._bind_kernel(ex_kernel, exchange=True)
                     
                     cu                = radical.pilot.ComputeUnitDescription()
                     cu.name           = "ex ;{cycle} ;{replica}".format(cycle=c, replica=r.id)
@@ -256,6 +262,7 @@ class Plugin(PluginBase):
                     cu.input_staging  = ex_kernel._cu_def_input_data
                     cu.output_staging = ex_kernel._cu_def_output_data
                     cus.append(cu)
+                    runtimes.append(ex_kernel.max_runtime)
 
                 #---------------------------------------------------------------
                 # end of Exchange step preparation 
@@ -269,10 +276,9 @@ class Plugin(PluginBase):
                     step_performance_data['cycle_{0}'.format(c)]['ex_step']['enmd_ov_duration'] = (enmd_ov_step_end_time_abs - step_start_time_abs).total_seconds()  
 
                 self.get_logger().info("Cycle %d: Performing Exchange step for replicas" % (c) )
-                ex_units = resource._umgr.submit_units(cus)
+                ex_units = submit_units(resource, cus)
                 self._reporter.info("\nCycle {0}: Waiting for Exchange step to complete".format(c))
-                uids = [cu.uid for cu in ex_units]
-                resource._umgr.wait_units(uids)
+                ex_units = wait_units(resource, ex_units, cus, runtimes)
 
                 if do_profile == '1':
                     step_end_time_abs = datetime.datetime.utcnow()
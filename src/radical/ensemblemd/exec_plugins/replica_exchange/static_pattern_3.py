@@ -19,6 +19,9 @@ import traceback
 import radical.pilot
 from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import wait_units
+from radical.ensemblemd.exec_plugins.staging import get_exchange_pilot, link_read_only_inputs
 
 # ------------------------------------------------------------------------------
 #
@@ -92,7 +95,7 @@ class Plugin(PluginBase):
                             'action': radical.pilot.TRANSFER
                 }
 
-                resource._pilot.stage_in(sd_pilot)
+                get_exchange_pilot(resource).stage_in(sd_pilot)
 
                 sd_shared = {'source': 'staging:///%s' % shared_input_files[i],
                              'target': shared_input_files[i],
@@ -101,7 +104,7 @@ class Plugin(PluginBase):
                 sd_shared_list.append(sd_shared)
 
             # Pilot must be active
-            resource._pmgr.wait_pilots(resource._pilot.uid,'Active')       
+            resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')       
      
             if do_profile == '1':
                 pattern_start_time = datetime.datetime.utcnow()
@@ -129,15 +132,16 @@ class Plugin(PluginBase):
 
                 md_units = []
                 cus = []
+                runtimes = []
                 for r in replicas:
 
                     self.get_logger().info("Cycle %d: Preparing replica %d for MD-step" % ((c), r.id) )
                     r_kernel = pattern.prepare_replica_for_md(r)
 
                     if ((r_kernel._kernel.get_name()) == "md.amber"):
-                        r_kernel._bind_to_resource(resource._resource_key, pattern.name)
+                        resource._bind_kernel(r_kernel, pattern.name, exchange=True)
                     else:
-                        r_kernel._bind_to_resource(resource._resource_key)
+                        resource._bind_kernel(r_kernel, exchange=True)
 
                     # processing data directives
                     # need means to distinguish between copy and link
@@ -181,7 +185,7 @@ class Plugin(PluginBase):
                     if r_kernel._cu_def_input_data:
                         in_list = in_list + r_kernel._cu_def_input_data
                     if copy_in:
-                        in_list = in_list + copy_in
+                        in_list = in_list + link_read_only_inputs(copy_in, r_kernel._kernel._read_only_input_data)
                     cu.input_staging  = in_list
                     #-----------------------------------------------------------
                     out_list = []
@@ -192,6 +196,7 @@ class Plugin(PluginBase):
                     cu.output_staging = out_list
                     #-----------------------------------------------------------
                     cus.append(cu)
+                    runtimes.append(r_kernel.max_runtime)
                
                 if do_profile == '1':
                     enmd_ov_step_end_time_abs = datetime.datetime.utcnow()
@@ -201,14 +206,13 @@ class Plugin(PluginBase):
                     step_performance_data['cycle_{0}'.format(c)]['md_step']['enmd_ov_duration'] = (enmd_ov_step_end_time_abs - step_start_time_abs).total_seconds() 
 
                 # bulk submission
-                sub_replicas = resource._umgr.submit_units(cus)  
-                for r in sub_replicas:
-                    md_units.append(r)                 
+                sub_replicas = submit_units(resource, cus)
 
                 self.get_logger().info("Cycle %d: Performing MD-step for replicas" % (c) )
 
-                resource._umgr.wait_units()
-                #uids = [cu.uid for cu in cus]
+                sub_replicas = wait_units(resource, sub_replicas, cus, runtimes)
+                for r in sub_replicas:
+                    md_units.append(r)
 
                 if do_profile == '1':
                     step_end_time_abs = datetime.datetime.utcnow()
@@ -248,7 +252,7 @@ class Plugin(PluginBase):
 
                 gl_ex_kernel = pattern.prepare_global_ex_calc(GL, c, \
                                                                   replicas)
-                gl_ex_kernel._bind_to_resource(resource._resource_key)
+                resource._bind_kernel(gl_ex_kernel, exchange=True)
 
                 cu = radical.pilot.ComputeUnitDescription()
 
@@ -281,7 +285,7 @@ class Plugin(PluginBase):
                 if gl_ex_kernel._cu_def_input_data:
                     in_list = in_list + gl_ex_kernel._cu_def_input_data
                 if copy_in:
-                    in_list = in_list + copy_in
+                    in_list = in_list + link_read_only_inputs(copy_in, gl_ex_kernel._kernel._read_only_input_data)
                 cu.input_staging  = in_list
                 #---------------------------------------------------------------
                 out_list = []
@@ -306,8 +310,8 @@ class Plugin(PluginBase):
                     step_performance_data['cycle_{0}'.format(c)]['ex_step']['enmd_ov_duration'] = {}
                     step_performance_data['cycle_{0}'.format(c)]['ex_step']['enmd_ov_duration'] = (enmd_ov_step_end_time_abs - step_start_time_abs).total_seconds()  
 
-                sub_replica = resource._umgr.submit_units(cu)
-                resource._umgr.wait_units(sub_replica.uid)
+                sub_replica = submit_units(resource, [cu])
+                sub_replica = wait_units(resource, sub_replica, [cu], [gl_ex_kernel.max_runtime])[0]
 
                 ex_units.append(sub_replica)
                     
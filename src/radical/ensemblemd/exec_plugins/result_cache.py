@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+
+"""A content-addressed cache of ComputeUnit results.
+
+If the execution context has a result cache, the sandbox of every
+successful, non-MPI ComputeUnit is copied into a directory on the resource
+that is named after the unit's cache key. The key is a hash of the bound
+executable, its arguments, pre_exec, post_exec and environment, and the
+contents of its input files:
+
+    * the content of uploaded files is hashed on the client.
+    * linked or copied files from the sandbox of a unit that was cached
+      itself are identified by that unit's key and the path in its sandbox.
+      The key of a unit thus covers all the units its inputs came from.
+
+Units with other inputs, e.g. absolute paths or ``staging:///`` files on
+the resource, can't be identified and are always executed.
+
+When a unit with a key that is in the cache is submitted, a small unit
+that links or copies the cached files into its sandbox is submitted
+instead. It doesn't stage any input, but it performs the output staging of
+the original unit, and later steps can reference its sandbox like that of
+the original unit.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import json
+import saga
+import pipes
+import hashlib
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list, _copy_description
+
+LINK = "link"
+COPY = "copy"
+
+MODES = [LINK, COPY]
+
+# These files in a sandbox belong to the unit that created the sandbox.
+SANDBOX_FILES = ["STDOUT", "STDERR", "radical_pilot_cu_launch_script.sh"]
+
+# ------------------------------------------------------------------------------
+#
+class ResultCache(object):
+    """A ResultCache in the directory 'path' on the resource. With mode
+       ``link``, cached files are linked into the sandboxes of later units,
+       with mode ``copy`` they are copied.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, path, mode=LINK):
+        self._path   = path
+        self._mode   = mode
+        self._logger = ru.get_logger('radical.enmd.result_cache')
+        self._lock   = threading.Lock()
+
+        # The keys of the submitted units and the content hashes of the
+        # uploaded files, by (path, size, mtime).
+        self._units  = list()
+        self._hashes = dict()
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def path(self):
+        """Returns the path of the cache directory on the resource.
+        """
+        return self._path
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def mode(self):
+        """Returns the mode in which cached files are materialized.
+        """
+        return self._mode
+
+    # --------------------------------------------------------------------------
+    #
+    def _hash_file(self, path):
+        """Returns the content hash of the local file 'path' or None if it
+           isn't a file.
+        """
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        stat_key = (path, stat.st_size, stat.st_mtime)
+        if stat_key not in self._hashes:
+            sha1 = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha1.update(chunk)
+            self._hashes[stat_key] = sha1.hexdigest()
+        return self._hashes[stat_key]
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_sandbox_keys(self):
+        """Returns the keys of the successful units by their sandbox path.
+        """
+        with self._lock:
+            units = list(self._units)
+
+        sandboxes = dict()
+        for unit, key in units:
+            if unit.state == radical.pilot.DONE and unit.working_directory:
+                path = os.path.normpath(saga.Url(unit.working_directory).path)
+                sandboxes[path] = key
+        return sandboxes
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_input_id(self, directive, sandboxes):
+        """Returns the identity of the input 'directive' or None if it can't
+           be identified.
+        """
+        source = directive['source']
+
+        if directive.get('action') in [radical.pilot.LINK, radical.pilot.COPY]:
+            path = os.path.normpath(saga.Url(source).path)
+            sandbox = path
+            while sandbox not in ['/', '']:
+                sandbox = os.path.dirname(sandbox)
+                if sandbox in sandboxes:
+                    return "{0}/{1}".format(sandboxes[sandbox], os.path.relpath(path, sandbox))
+            return None
+
+        if '://' in source and not source.startswith('file://'):
+            return None
+
+        return self._hash_file(saga.Url(source).path)
+
+    # --------------------------------------------------------------------------
+    #
+    def get_key(self, cud, sandboxes=None):
+        """Returns the cache key of 'cud' or None if 'cud' can't be cached.
+        """
+        if cud.mpi:
+            return None
+
+        if sandboxes is None:
+            sandboxes = self._get_sandbox_keys()
+
+        inputs = list()
+        for directive in _as_list(cud.input_staging):
+            directive = _as_directive(directive)
+            input_id = self._get_input_id(directive, sandboxes)
+            if input_id is None:
+                return None
+            inputs.append([directive['target'], input_id])
+
+        description = {
+            "executable"  : cud.executable,
+            "arguments"   : [str(arg) for arg in _as_list(cud.arguments)],
+            "pre_exec"    : _as_list(cud.pre_exec),
+            "post_exec"   : _as_list(cud.post_exec),
+            "environment" : cud.environment or {},
+            "inputs"      : sorted(inputs)
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True)).hexdigest()
+
+    # --------------------------------------------------------------------------
+    #
+    def list_entries(self, pilot):
+        """Returns the set of keys in the cache directory on the resource of
+           'pilot'. An empty set is returned if the directory doesn't exist
+           yet or can't be accessed.
+        """
+        url = saga.Url(pilot.sandbox)
+        url.path = self._path
+
+        try:
+            cache_dir = saga.filesystem.Directory(url)
+            entries = set([str(entry).rstrip('/').split('/')[-1] for entry in cache_dir.list()])
+            cache_dir.close()
+            return entries
+        except Exception as ex:
+            self._logger.debug("Can't list result cache {0}: {1}".format(url, ex))
+            return set()
+
+    # --------------------------------------------------------------------------
+    #
+    def create_store_description(self, cud, key):
+        """Returns a copy of 'cud' that copies its sandbox into the cache
+           entry 'key' if it succeeds. The executable and arguments are
+           left as they are: the copy is appended to the post_exec and only
+           runs if the executable returned 0, which the launch script of
+           radical.pilot records in $RETVAL. In a bundle, the post_exec
+           only runs if the executable succeeded.
+        """
+        entry = pipes.quote(os.path.join(self._path, key))
+        tmp   = pipes.quote(os.path.join(self._path, "{0}.tmp.".format(key))) + "$$"
+        excludes = " ".join(["! -name {0}".format(name) for name in SANDBOX_FILES])
+
+        # The entry is renamed into place when it is complete, so that it
+        # is never listed half-written. A failed copy doesn't fail the unit.
+        store = ("if [ \"${{RETVAL:-0}}\" = 0 ]; then "
+                 "{{ mkdir -p {tmp} && "
+                 "find . -mindepth 1 -maxdepth 1 {excludes} -exec cp -RP {{}} {tmp}/ \\; && "
+                 "(mv -T {tmp} {entry} 2>/dev/null || rm -rf {tmp}); }} || true; fi").format(
+                     tmp=tmp, entry=entry, excludes=excludes)
+
+        store_cud           = _copy_description(cud)
+        store_cud.post_exec = _as_list(cud.post_exec) + [store]
+        return store_cud
+
+    # --------------------------------------------------------------------------
+    #
+    def create_restore_description(self, cud, key):
+        """Returns a description that materializes the cache entry 'key' in
+           its sandbox and performs the output staging of 'cud'.
+        """
+        entry = pipes.quote(os.path.join(self._path, key))
+        if self._mode == LINK:
+            restore = "cp -Rs {0}/. .".format(entry)
+        else:
+            restore = "cp -RP {0}/. .".format(entry)
+
+        restore_cud                = radical.pilot.ComputeUnitDescription()
+        restore_cud.name           = "cached; {0}".format(cud.name)
+        restore_cud.executable     = "/bin/sh"
+        restore_cud.arguments      = ["-c", restore]
+        restore_cud.cores          = 1
+        restore_cud.mpi            = False
+        restore_cud.input_staging  = None
+        restore_cud.output_staging = cud.output_staging
+        return restore_cud
+
+    # --------------------------------------------------------------------------
+    #
+    def prepare(self, pilot, cuds):
+        """Returns the descriptions to submit instead of 'cuds' and their
+           keys, in order. Key None means the unit isn't cached.
+        """
+        sandboxes = self._get_sandbox_keys()
+        keys      = [self.get_key(cud, sandboxes) for cud in cuds]
+
+        if not [key for key in keys if key is not None]:
+            return cuds, keys
+
+        entries      = self.list_entries(pilot)
+        descriptions = list()
+        hits         = 0
+
+        for cud, key in zip(cuds, keys):
+            if key is None:
+                descriptions.append(cud)
+            elif key in entries:
+                descriptions.append(self.create_restore_description(cud, key))
+                hits += 1
+            else:
+                descriptions.append(self.create_store_description(cud, key))
+
+        self._logger.info("{0} of {1} CUs are in the result cache.".format(hits, len(cuds)))
+        return descriptions, keys
+
+    # --------------------------------------------------------------------------
+    #
+    def add_units(self, units, keys):
+        """Records the 'keys' of the submitted 'units'.
+        """
+        with self._lock:
+            for unit, key in zip(units, keys):
+                if key is not None:
+                    self._units.append((unit, key))
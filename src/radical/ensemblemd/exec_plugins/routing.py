@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""Placement of ComputeUnits on the resources of a MultiClusterEnvironment.
+
+A kernel is bound to a resource: its executable, arguments and pre_exec
+come from the machine configuration of that resource. A unit can only run
+on the resources whose binding yields the same description. The
+:class:`Router` of a MultiClusterEnvironment binds every kernel to all of
+its resources, chooses the least loaded resource that the kernel is
+configured for, and remembers on which resources the resulting
+descriptions can run. On submission, it returns the route of every
+description, i.e., the set of resources it may be placed on:
+
+    * the resources that its kernel binding is valid for.
+    * the resource of the units whose sandboxes it stages input from.
+    * the resource of the exchange pilot if it exchanges files through the
+      staging area (:class:`~radical.ensemblemd.exec_plugins.staging.StagingExchange`).
+
+Descriptions that weren't created from a kernel can be placed on any
+resource, unless they are submitted to a specific resource, e.g., the
+cleanup units of the sandbox retention. The unit manager of the context
+places each unit on one of the resources of its route.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import threading
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError, NoKernelConfigurationError
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list
+
+# ------------------------------------------------------------------------------
+#
+def get_fingerprint(pre_exec, executable, arguments, mpi):
+    """Returns the fingerprint of a bound kernel or a description.
+    """
+    return (tuple(_as_list(pre_exec)), executable, tuple(_as_list(arguments)), bool(mpi))
+
+# ------------------------------------------------------------------------------
+#
+class Router(object):
+    """A Router places the units on the resources 'resource_cores', a
+       dictionary that maps each resource key to its number of cores.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, resource_cores):
+        self._resource_cores = resource_cores
+        self._logger         = ru.get_logger('radical.enmd.routing')
+        self._lock           = threading.Lock()
+        self._bound          = dict((key, 0) for key in resource_cores)   # key -> cores of the bound kernels
+        self._fingerprints   = dict()   # fingerprint -> set of resource keys
+        self._sandboxes      = dict()   # sandbox path -> resource key
+
+    # --------------------------------------------------------------------------
+    #
+    def bind_kernel(self, kernel, pattern_name=None, resource_key=None):
+        """Binds 'kernel' to the least loaded resource it is configured for,
+           or to 'resource_key' if it is given.
+        """
+        fingerprints = dict()
+        for key in sorted(self._resource_cores):
+            try:
+                kernel._bind_to_resource(key, pattern_name)
+            except NoKernelConfigurationError:
+                continue
+            fingerprints[key] = get_fingerprint(
+                kernel._cu_def_pre_exec, kernel._cu_def_executable, kernel.arguments, kernel.uses_mpi)
+
+        if resource_key is not None and resource_key not in fingerprints:
+            raise EnsemblemdError(
+                msg="Kernel {0} isn't configured for resource {1}.".format(kernel.name, resource_key))
+        if not fingerprints:
+            raise EnsemblemdError(
+                msg="Kernel {0} isn't configured for any of the resources {1}.".format(
+                    kernel.name, sorted(self._resource_cores)))
+
+        with self._lock:
+            if resource_key is None:
+                resource_key = min(sorted(fingerprints),
+                                   key=lambda key: self._bound[key] / float(self._resource_cores[key]))
+            self._bound[resource_key] += kernel.cores or 1
+            for key, fingerprint in fingerprints.items():
+                self._fingerprints.setdefault(fingerprint, set()).add(key)
+
+        kernel._bind_to_resource(resource_key, pattern_name)
+        self._logger.debug("Bound kernel {0} to {1}.".format(kernel.name, resource_key))
+
+    # --------------------------------------------------------------------------
+    #
+    def record(self, resource, units):
+        """Records the resources that 'units' were executed on.
+        """
+        with self._lock:
+            for unit in units:
+                if unit.uid is None or not unit.working_directory:
+                    continue
+                path = os.path.normpath(saga.Url(unit.working_directory).path)
+                self._sandboxes[path] = resource._umgr.get_resource_key(unit.uid)
+
+    # --------------------------------------------------------------------------
+    #
+    def get_resource_key(self, path):
+        """Returns the key of the resource that the sandbox 'path' is on or
+           None if it isn't a recorded sandbox.
+        """
+        with self._lock:
+            return self._sandboxes.get(os.path.normpath(path))
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_sandbox_keys(self, cud):
+        keys = set()
+        for directive in _as_list(cud.input_staging):
+            path = saga.Url(_as_directive(directive)['source']).path
+            if not path:
+                continue
+            path = os.path.normpath(path)
+            while path not in ['/', '']:
+                if path in self._sandboxes:
+                    keys.add(self._sandboxes[path])
+                    break
+                path = os.path.dirname(path)
+        return keys
+
+    # --------------------------------------------------------------------------
+    #
+    def get_routes(self, cuds, exchange=None):
+        """Returns the route of each of 'cuds', the set of resource keys it
+           can be placed on, or None if it can be placed on any resource.
+           Raises an EnsemblemdError if a description can't be placed.
+        """
+        routes = list()
+        with self._lock:
+            for cud in cuds:
+                route = self._fingerprints.get(
+                    get_fingerprint(cud.pre_exec, cud.executable, cud.arguments, cud.mpi))
+                constraints = list()
+                for key in self._get_sandbox_keys(cud):
+                    constraints.append((key, "it stages input from a sandbox on {0}".format(key)))
+                if exchange is not None and exchange.uses_exchange(cud):
+                    constraints.append((exchange.resource_key,
+                        "it exchanges files through the staging area on {0}".format(exchange.resource_key)))
+
+                keys = set([key for key, reason in constraints])
+                if len(keys) > 1:
+                    raise EnsemblemdError(
+                        msg="Unit {0} can't be placed: {1}.".format(
+                            cud.name, " and ".join([reason for key, reason in constraints])))
+                if keys:
+                    key, reason = constraints[0]
+                    if route is not None and key not in route:
+                        raise EnsemblemdError(
+                            msg="Unit {0} can't be placed: {1}, but its kernel is only configured for {2}.".format(
+                                cud.name, reason, sorted(route)))
+                    route = keys
+
+                if route is not None:
+                    route = frozenset(route)
+                routes.append(route)
+        return routes
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""Garbage collection of the sandboxes of earlier iterations.
+
+The simulation-analysis loop keeps the sandboxes of all iterations,
+because a later step could reference any of them via
+``$SIMULATION_ITERATION_X_INSTANCE_Y`` or
+``$ANALYSIS_ITERATION_X_INSTANCE_Y``. The other placeholders only reach
+back one step: ``$PREV_SIMULATION`` references the simulations of the
+same iteration and ``$PREV_ANALYSIS`` the analysis of the previous
+iteration.
+
+If the execution context has ``sandbox_retention`` set, the steps only
+reference the sandboxes of the last ``sandbox_retention`` iterations.
+Once the analysis of an iteration is done, the sandboxes of the
+iterations that fall out of that window are removed by a cleanup
+ComputeUnit, which runs on the resource while the loop continues. On a
+MultiClusterEnvironment, one cleanup unit is submitted to each resource
+that holds some of the sandboxes. The sandboxes of the pre-loop and
+post-loop steps are kept.
+
+Units that reference a removed sandbox are rejected with an
+EnsemblemdError on submission, instead of failing in their input staging.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list
+from radical.ensemblemd.exec_plugins.submission import submit_description
+
+# ------------------------------------------------------------------------------
+#
+class SandboxGC(object):
+    """SandboxGC removes the sandboxes of the iterations that are more than
+       'retention' iterations old.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, retention):
+        if retention < 1:
+            raise EnsemblemdError(
+                msg="The sandbox retention must be at least 1 iteration, got {0}.".format(retention))
+
+        self._retention = retention
+        self._logger    = ru.get_logger('radical.enmd.sandbox_gc')
+        self._lock      = threading.Lock()
+        self._removed   = dict()   # sandbox path -> iteration
+        self._units     = list()   # the submitted cleanup units
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def retention(self):
+        """Returns the number of iterations whose sandboxes are kept.
+        """
+        return self._retention
+
+    # --------------------------------------------------------------------------
+    #
+    def get_unreachable(self, working_dirs, iteration):
+        """Returns the list of (iteration, sandbox path) tuples of the
+           sandboxes in 'working_dirs' that can't be referenced anymore once
+           the analysis of 'iteration' is done.
+        """
+        unreachable = list()
+        with self._lock:
+            for key in sorted(working_dirs):
+                if not key.startswith('iteration_'):
+                    continue
+                n = int(key.split('_')[1])
+                if n > iteration - self._retention:
+                    continue
+                for path in sorted(working_dirs[key].values()):
+                    path = os.path.normpath(path)
+                    if path not in self._removed:
+                        unreachable.append((n, path))
+        return unreachable
+
+    # --------------------------------------------------------------------------
+    #
+    def create_cleanup_description(self, paths):
+        """Returns a description that removes the sandboxes 'paths'.
+        """
+        cleanup                = radical.pilot.ComputeUnitDescription()
+        cleanup.name           = "sandbox_gc"
+        cleanup.executable     = "/bin/rm"
+        cleanup.arguments      = ["-rf"] + list(paths)
+        cleanup.cores          = 1
+        cleanup.mpi            = False
+        cleanup.input_staging  = None
+        cleanup.output_staging = None
+        return cleanup
+
+    # --------------------------------------------------------------------------
+    #
+    def collect(self, resource, working_dirs, iteration):
+        """Removes the sandboxes in 'working_dirs' that can't be referenced
+           anymore once the analysis of 'iteration' is done. The sandboxes
+           are removed by one cleanup unit per resource that holds them,
+           which isn't waited for.
+        """
+        unreachable = self.get_unreachable(working_dirs, iteration)
+        if not unreachable:
+            return
+
+        # Group the sandboxes by the resource they are on.
+        router = getattr(resource, '_router', None)
+        groups = dict()
+        for n, path in unreachable:
+            if router is not None:
+                key = router.get_resource_key(path)
+            else:
+                key = None
+            groups.setdefault(key, list()).append((n, path))
+
+        for key in sorted(groups, key=lambda key: key or ''):
+            group = groups[key]
+            unit = submit_description(resource,
+                self.create_cleanup_description([path for n, path in group]), resource_key=key)
+
+            with self._lock:
+                for n, path in group:
+                    self._removed[path] = n
+                self._units.append(unit)
+
+            self._logger.info("Removing {0} sandbox(es) of iteration(s) {1} in unit {2}.".format(
+                len(group), sorted(set([n for n, path in group])), unit.uid))
+
+    # --------------------------------------------------------------------------
+    #
+    def check(self, cuds):
+        """Raises an EnsemblemdError if one of 'cuds' references a removed
+           sandbox.
+        """
+        with self._lock:
+            if not self._removed:
+                return
+            for cud in cuds:
+                for directive in _as_list(cud.input_staging):
+                    path = saga.Url(_as_directive(directive)['source']).path
+                    if not path:
+                        continue
+                    path = os.path.normpath(path)
+                    while path not in ['/', '']:
+                        if path in self._removed:
+                            raise EnsemblemdError(
+                                msg="Unit {0} references the sandbox {1} of iteration {2}, which was removed "
+                                    "because it is older than the sandbox retention of {3} iteration(s).".format(
+                                    cud.name, path, self._removed[path], self._retention))
+                        path = os.path.dirname(path)
+
+    # --------------------------------------------------------------------------
+    #
+    def close(self, resource):
+        """Waits for the cleanup units and returns the number of units that
+           failed.
+        """
+        with self._lock:
+            units = list(self._units)
+            self._units = list()
+
+        if not units:
+            return 0
+
+        resource._umgr.wait_units([unit.uid for unit in units])
+        failed = [unit for unit in units if unit.state != radical.pilot.DONE]
+        for unit in failed:
+            self._logger.error("Cleanup unit {0} failed: {1}".format(unit.uid, unit.stderr))
+        return len(failed)
@@ -16,6 +16,10 @@ import datetime
 import radical.pilot
 from radical.ensemblemd.exceptions import NotImplementedError, EnsemblemdError
 from radical.ensemblemd.exec_plugins.plugin_base import PluginBase
+from radical.ensemblemd.exec_plugins.submission import submit_units
+from radical.ensemblemd.exec_plugins.failure_policy import ABORT, wait_units
+from radical.ensemblemd.exec_plugins.staging import link_read_only_inputs, _as_directive
+from radical.ensemblemd.exec_plugins.checkpoint import Checkpoint
 
 
 # ------------------------------------------------------------------------------
@@ -137,8 +141,9 @@ class Plugin(PluginBase):
 
             if state == radical.pilot.FAILED:
                 self.get_logger().error("ComputeUnit error: STDERR: {0}, STDOUT: {0}".format(unit.stderr, unit.stdout))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(1)
+                if resource._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(1)
 
 
         self._reporter.ok('>>ok')
@@ -149,11 +154,24 @@ class Plugin(PluginBase):
         working_dirs = {}
         all_cus = []
 
+        checkpoint = Checkpoint(pattern.checkpoint_file, pattern.name, resource._resource_key, {
+            "simulation_instances": pattern._simulation_instances,
+            "analysis_instances":   pattern._analysis_instances})
+
+        if pattern.resume:
+            if checkpoint.load():
+                working_dirs = checkpoint.working_dirs
+                self.get_logger().info("Resuming from checkpoint {0} after step {1}.".format(checkpoint.path, checkpoint.steps[-1] if checkpoint.steps else None))
+                self._reporter.info("Resuming from checkpoint {0}.".format(checkpoint.path))
+            else:
+                self.get_logger().warning("No checkpoint {0} to resume from. Starting from the beginning.".format(checkpoint.path))
+                self._reporter.warn("No checkpoint to resume from. Starting from the beginning.")
+
         #print resource._pilot.description['cores']
 
         self.get_logger().info("Waiting for pilot on {0} to go Active".format(resource._resource_key))
         self._reporter.info("Job waiting on queue...".format(resource._resource_key))
-        resource._pmgr.wait_pilots(resource._pilot.uid,'Active')
+        resource._pmgr.wait_pilots([pilot.uid for pilot in resource._pilots], 'Active')
         self._reporter.ok("\nJob is now running !".format(resource._resource_key))
 
         profiling = int(os.environ.get('RADICAL_ENMD_PROFILING',0))
@@ -173,72 +191,78 @@ class Plugin(PluginBase):
             ########################################################################
             # execute pre_loop
             #
-            try:
+            if checkpoint.is_completed("pre_loop"):
+                self.get_logger().info("pre_loop completed in a previous run. Skipping.")
+                self._reporter.info("\npre_loop completed in a previous run. Skipping.")
+            else:
+                try:
 
-                ################################################################
-                # EXECUTE PRE-LOOP
+                    ################################################################
+                    # EXECUTE PRE-LOOP
 
-                if profiling == 1:
-                    probe_preloop_start = datetime.datetime.now()
-                    enmd_overhead_dict['preloop'] = od()
-                    enmd_overhead_dict['preloop']['start_time'] = probe_preloop_start
+                    if profiling == 1:
+                        probe_preloop_start = datetime.datetime.now()
+                        enmd_overhead_dict['preloop'] = od()
+                        enmd_overhead_dict['preloop']['start_time'] = probe_preloop_start
                 
-                pre_loop = pattern.pre_loop()
-                pre_loop._bind_to_resource(resource._resource_key)
+                    pre_loop = pattern.pre_loop()
+                    resource._bind_kernel(pre_loop)
 
-                cu = radical.pilot.ComputeUnitDescription()
-                cu.name = "pre_loop"
+                    cu = radical.pilot.ComputeUnitDescription()
+                    cu.name = "pre_loop"
 
-                cu.pre_exec       = pre_loop._cu_def_pre_exec
-                cu.executable     = pre_loop._cu_def_executable
-                cu.arguments      = pre_loop.arguments
-                cu.mpi            = pre_loop.uses_mpi
-                cu.input_staging  = pre_loop._cu_def_input_data
-                cu.output_staging = pre_loop._cu_def_output_data
+                    cu.pre_exec       = pre_loop._cu_def_pre_exec
+                    cu.executable     = pre_loop._cu_def_executable
+                    cu.arguments      = pre_loop.arguments
+                    cu.mpi            = pre_loop.uses_mpi
+                    cu.input_staging  = pre_loop._cu_def_input_data
+                    cu.output_staging = pre_loop._cu_def_output_data
 
-                self.get_logger().debug("Created pre_loop CU: {0}.".format(cu.as_dict()))
+                    self.get_logger().debug("Created pre_loop CU: {0}.".format(cu.as_dict()))
 
-                self.get_logger().info("Submitted ComputeUnit(s) for pre_loop step.")
-                self._reporter.info("\nWaiting for pre_loop step to complete.")
-                if profiling == 1:
-                    probe_preloop_wait = datetime.datetime.now()
-                    enmd_overhead_dict['preloop']['wait_time'] = probe_preloop_wait
+                    self.get_logger().info("Submitted ComputeUnit(s) for pre_loop step.")
+                    self._reporter.info("\nWaiting for pre_loop step to complete.")
+                    if profiling == 1:
+                        probe_preloop_wait = datetime.datetime.now()
+                        enmd_overhead_dict['preloop']['wait_time'] = probe_preloop_wait
 
-                unit = resource._umgr.submit_units(cu)
-                all_cus.append(unit)
-                resource._umgr.wait_units(unit.uid)
+                    units = submit_units(resource, [cu])
+                    units = wait_units(resource, units, [cu], [pre_loop.max_runtime])
+                    unit = units[0]
+                    all_cus.append(unit)
 
-                if profiling == 1:
-                    probe_preloop_res = datetime.datetime.now()
-                    enmd_overhead_dict['preloop']['res_time'] = probe_preloop_res
+                    if profiling == 1:
+                        probe_preloop_res = datetime.datetime.now()
+                        enmd_overhead_dict['preloop']['res_time'] = probe_preloop_res
 
-                self.get_logger().info("Pre_loop completed.")
+                    self.get_logger().info("Pre_loop completed.")
 
-                if unit.state != radical.pilot.DONE:
-                    raise EnsemblemdError("Pre-loop CU failed with error: {0}".format(unit.stdout))
-                working_dirs["pre_loop"] = saga.Url(unit.working_directory).path
+                    if unit.state != radical.pilot.DONE:
+                        raise EnsemblemdError("Pre-loop CU failed with error: {0}".format(unit.stdout))
+                    working_dirs["pre_loop"] = saga.Url(unit.working_directory).path
+                    checkpoint.complete("pre_loop", working_dirs, [unit.uid])
 
-                # Process CU information and append it to the dictionary
-                if profiling == 1:
-                    probe_preloop_done = datetime.datetime.now()
-                    enmd_overhead_dict['preloop']['stop_time'] = probe_preloop_done
-                    cu_dict['pre_loop'] = unit
+                    # Process CU information and append it to the dictionary
+                    if profiling == 1:
+                        probe_preloop_done = datetime.datetime.now()
+                        enmd_overhead_dict['preloop']['stop_time'] = probe_preloop_done
+                        cu_dict['pre_loop'] = unit
 
 
-                self._reporter.ok('>> done')
+                    self._reporter.ok('>> done')
                  
-            except Exception:
-                # Doesn't exist. That's fine as it is not mandatory.
-                self.get_logger().info("pre_loop() not defined. Skipping.")
-                self._reporter.info("\npre_loop() not defined. Skipping.")
-                pass
+                except Exception:
+                    # Doesn't exist. That's fine as it is not mandatory.
+                    self.get_logger().info("pre_loop() not defined. Skipping.")
+                    self._reporter.info("\npre_loop() not defined. Skipping.")
+                    pass
 
             ########################################################################
             # execute simulation analysis loop
             #
             for iteration in range(1, pattern.iterations+1):
 
-                working_dirs['iteration_{0}'.format(iteration)] = {}
+                working_dirs.setdefault('iteration_{0}'.format(iteration), {})
 
                 ################################################################
                 # EXECUTE SIMULATION STEPS
@@ -247,532 +271,592 @@ class Plugin(PluginBase):
                     enmd_overhead_dict['iter_{0}'.format(iteration)] = od()
                     cu_dict['iter_{0}'.format(iteration)] = od()
 
-                if isinstance(pattern.simulation_step(iteration=iteration, instance=1),list):
-                    num_sim_kerns = len(pattern.simulation_step(iteration=iteration, instance=1))
+                if checkpoint.is_completed('iteration_{0}/simulation'.format(iteration)):
+                    self.get_logger().info("Simulation step of iteration {0} completed in a previous run. Skipping.".format(iteration))
+                    self._reporter.info("\nSimulation step of iteration {0} completed in a previous run. Skipping.".format(iteration))
                 else:
-                    num_sim_kerns = 1
-                #print num_sim_kerns
+                    if isinstance(pattern.simulation_step(iteration=iteration, instance=1),list):
+                        num_sim_kerns = len(pattern.simulation_step(iteration=iteration, instance=1))
+                    else:
+                        num_sim_kerns = 1
+                    #print num_sim_kerns
 
-                all_sim_cus = []
-                if profiling == 1:
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']= od()
-                    cu_dict['iter_{0}'.format(iteration)]['sim']= list()
+                    all_sim_cus = []
+                    if profiling == 1:
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']= od()
+                        cu_dict['iter_{0}'.format(iteration)]['sim']= list()
 
-                for kern_step in range(0,num_sim_kerns):
+                    for kern_step in range(0,num_sim_kerns):
 
-                    if profiling == 1:
-                        probe_sim_start = datetime.datetime.now()
+                        if profiling == 1:
+                            probe_sim_start = datetime.datetime.now()
 
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]= od()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['start_time'] = probe_sim_start
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]= od()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['start_time'] = probe_sim_start
 
-                    s_units = []
-                    for s_instance in range(1, pattern._simulation_instances+1):
+                        s_units = []
+                        s_runtimes = []
+                        for s_instance in range(1, pattern._simulation_instances+1):
 
-                        if isinstance(pattern.simulation_step(iteration=iteration, instance=s_instance),list):
-                            sim_step = pattern.simulation_step(iteration=iteration, instance=s_instance)[kern_step]
-                        else:
-                            sim_step = pattern.simulation_step(iteration=iteration, instance=s_instance)
+                            if isinstance(pattern.simulation_step(iteration=iteration, instance=s_instance),list):
+                                sim_step = pattern.simulation_step(iteration=iteration, instance=s_instance)[kern_step]
+                            else:
+                                sim_step = pattern.simulation_step(iteration=iteration, instance=s_instance)
 
-                        sim_step._bind_to_resource(resource._resource_key)
+                            resource._bind_kernel(sim_step)
 
-                        # Resolve all placeholders
-                        #if sim_step.link_input_data is not None:
-                        #    for i in range(len(sim_step.link_input_data)):
-                        #        sim_step.link_input_data[i] = resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step.link_input_data[i])
+                            # Resolve all placeholders
+                            #if sim_step.link_input_data is not None:
+                            #    for i in range(len(sim_step.link_input_data)):
+                            #        sim_step.link_input_data[i] = resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step.link_input_data[i])
 
 
-                        cud = radical.pilot.ComputeUnitDescription()
-                        cud.name = "sim ;{iteration} ;{instance}".format(iteration=iteration, instance=s_instance)
+                            cud = radical.pilot.ComputeUnitDescription()
+                            cud.name = "sim ;{iteration} ;{instance}".format(iteration=iteration, instance=s_instance)
 
-                        cud.pre_exec       = sim_step._cu_def_pre_exec
-                        cud.executable     = sim_step._cu_def_executable
-                        cud.arguments      = sim_step.arguments
-                        cud.mpi            = sim_step.uses_mpi
-                        cud.input_staging  = None
-                        cud.output_staging = None
+                            cud.pre_exec       = sim_step._cu_def_pre_exec
+                            cud.executable     = sim_step._cu_def_executable
+                            cud.arguments      = sim_step.arguments
+                            cud.mpi            = sim_step.uses_mpi
+                            cud.input_staging  = None
+                            cud.output_staging = None
 
-                        # INPUT DATA:
-                        #------------------------------------------------------------------------------------------------------------------
-                        # upload_input_data
-                        data_in = []
-                        if sim_step._kernel._upload_input_data is not None:
-                            if isinstance(sim_step._kernel._upload_input_data,list):
-                                pass
-                            else:
-                                sim_step._kernel._upload_input_data = [sim_step._kernel._upload_input_data]
-                            for i in range(0,len(sim_step._kernel._upload_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._upload_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip()
-                                        }
+                            # INPUT DATA:
+                            #------------------------------------------------------------------------------------------------------------------
+                            # upload_input_data
+                            data_in = []
+                            if sim_step._kernel._upload_input_data is not None:
+                                if isinstance(sim_step._kernel._upload_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip())
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # link_input_data
-                        data_in = []
-                        if sim_step._kernel._link_input_data is not None:
-                            if isinstance(sim_step._kernel._link_input_data,list):
-                                pass
+                                    sim_step._kernel._upload_input_data = [sim_step._kernel._upload_input_data]
+                                for i in range(0,len(sim_step._kernel._upload_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._upload_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip()
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip())
+                                            }
+                                    data_in.append(temp)
+
+                            if cud.input_staging is None:
+                                cud.input_staging = data_in
                             else:
-                                sim_step._kernel._link_input_data = [sim_step._kernel._link_input_data]
-                            for i in range(0,len(sim_step._kernel._link_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._link_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.LINK
-                                        }
+                                cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # link_input_data
+                            data_in = []
+                            if sim_step._kernel._link_input_data is not None:
+                                if isinstance(sim_step._kernel._link_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.LINK
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # copy_input_data
-                        data_in = []
-                        if sim_step._kernel._copy_input_data is not None:
-                            if isinstance(sim_step._kernel._copy_input_data,list):
-                                pass
+                                    sim_step._kernel._link_input_data = [sim_step._kernel._link_input_data]
+                                for i in range(0,len(sim_step._kernel._link_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._link_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.LINK
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.LINK
+                                            }
+                                    data_in.append(temp)
+
+                            if cud.input_staging is None:
+                                cud.input_staging = data_in
                             else:
-                                sim_step._kernel._copy_input_data = [sim_step._kernel._copy_input_data]
-                            for i in range(0,len(sim_step._kernel._copy_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._copy_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.COPY
-                                        }
+                                cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # copy_input_data
+                            data_in = []
+                            if sim_step._kernel._copy_input_data is not None:
+                                if isinstance(sim_step._kernel._copy_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.COPY
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # download input data
-                        if sim_step.download_input_data is not None:
-                            data_in  = sim_step.download_input_data
+                                    sim_step._kernel._copy_input_data = [sim_step._kernel._copy_input_data]
+                                for i in range(0,len(sim_step._kernel._copy_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._copy_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    data_in.append(temp)
+                                data_in = link_read_only_inputs(data_in, sim_step._kernel._read_only_input_data)
+
                             if cud.input_staging is None:
                                 cud.input_staging = data_in
                             else:
                                 cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        # OUTPUT DATA:
-                        #------------------------------------------------------------------------------------------------------------------
-                        # copy_output_data
-                        data_out = []
-                        if sim_step._kernel._copy_output_data is not None:
-                            if isinstance(sim_step._kernel._copy_output_data,list):
-                                pass
-                            else:
-                                sim_step._kernel._copy_output_data = [sim_step._kernel._copy_output_data]
-                            for i in range(0,len(sim_step._kernel._copy_output_data)):
-                                var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._copy_output_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.COPY
-                                        }
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # download input data
+                            if sim_step.download_input_data is not None:
+                                data_in  = sim_step.download_input_data
+                                if cud.input_staging is None:
+                                    cud.input_staging = data_in
+                                else:
+                                    cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            # OUTPUT DATA:
+                            #------------------------------------------------------------------------------------------------------------------
+                            # copy_output_data
+                            data_out = []
+                            if sim_step._kernel._copy_output_data is not None:
+                                if isinstance(sim_step._kernel._copy_output_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.COPY
-                                        }
-                                data_out.append(temp)
-
-                        if cud.output_staging is None:
-                            cud.output_staging = data_out
-                        else:
-                            cud.output_staging += data_out
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # download_output_data
-                        data_out = []
-                        if sim_step._kernel._download_output_data is not None:
-                            if isinstance(sim_step._kernel._download_output_data,list):
-                                pass
+                                    sim_step._kernel._copy_output_data = [sim_step._kernel._copy_output_data]
+                                for i in range(0,len(sim_step._kernel._copy_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._copy_output_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    data_out.append(temp)
+
+                            if cud.output_staging is None:
+                                cud.output_staging = data_out
                             else:
-                                sim_step._kernel._download_output_data = [sim_step._kernel._download_output_data]
-                            for i in range(0,len(sim_step._kernel._download_output_data)):
-                                var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._download_output_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip()
-                                        }
+                                cud.output_staging += data_out
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # download_output_data
+                            data_out = []
+                            if sim_step._kernel._download_output_data is not None:
+                                if isinstance(sim_step._kernel._download_output_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip())
-                                        }
-                                data_out.append(temp)
+                                    sim_step._kernel._download_output_data = [sim_step._kernel._download_output_data]
+                                for i in range(0,len(sim_step._kernel._download_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._download_output_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip()
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip())
+                                            }
+                                    data_out.append(temp)
+
+                            if cud.output_staging is None:
+                                cud.output_staging = data_out
+                            else:
+                                cud.output_staging += data_out
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # background_download_output_data
+                            data_out = []
+                            if sim_step._kernel._background_download_output_data is not None:
+                                for i in range(0,len(sim_step._kernel._background_download_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, s_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "simulation", sim_step._kernel._background_download_output_data[i])
+                                    data_out.append(_as_directive(var))
 
-                        if cud.output_staging is None:
-                            cud.output_staging = data_out
-                        else:
-                            cud.output_staging += data_out
-                        #------------------------------------------------------------------------------------------------------------------
+                            if data_out:
+                                cud = resource._background_downloads.add_directives(cud, data_out)
+                            #------------------------------------------------------------------------------------------------------------------
 
 
-                        if sim_step.cores is not None:
-                            cud.cores = sim_step.cores
+                            if sim_step.cores is not None:
+                                cud.cores = sim_step.cores
 
-                        s_units.append(cud)
+                            s_units.append(cud)
+                            s_runtimes.append(sim_step.max_runtime)
 
-                        if sim_step.get_instance_type == 'single':
-                            break
+                            if sim_step.get_instance_type == 'single':
+                                break
                         
-                    self.get_logger().debug("Created simulation CU: {0}.".format(cud.as_dict()))
+                        self.get_logger().debug("Created simulation CU: {0}.".format(cud.as_dict()))
                     
 
-                    self.get_logger().info("Submitted tasks for simulation iteration {0}.".format(iteration))
-                    self.get_logger().info("Waiting for simulations in iteration {0}/ kernel {1}: {2} to complete.".format(iteration,kern_step+1,sim_step.name))
+                        self.get_logger().info("Submitted tasks for simulation iteration {0}.".format(iteration))
+                        self.get_logger().info("Waiting for simulations in iteration {0}/ kernel {1}: {2} to complete.".format(iteration,kern_step+1,sim_step.name))
 
 
-                    self._reporter.info("\nIteration {0}: Waiting for simulation tasks: {1} to complete".format(iteration,sim_step.name))
-                    if profiling == 1:
-                        probe_sim_wait = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['wait_time'] = probe_sim_wait
-
-                    s_cus = resource._umgr.submit_units(s_units)
-                    all_cus.extend(s_cus)
-                    all_sim_cus.extend(s_cus)
+                        self._reporter.info("\nIteration {0}: Waiting for simulation tasks: {1} to complete".format(iteration,sim_step.name))
+                        if profiling == 1:
+                            probe_sim_wait = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['wait_time'] = probe_sim_wait
 
-                    uids = [cu.uid for cu in s_cus]
-                    resource._umgr.wait_units(uids)
+                        s_cus = submit_units(resource, s_units)
+                        s_cus = wait_units(resource, s_cus, s_units, s_runtimes)
+                        all_cus.extend(s_cus)
+                        all_sim_cus.extend(s_cus)
 
-                    if profiling == 1:
-                        probe_sim_res = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['res_time'] = probe_sim_res
+                        if profiling == 1:
+                            probe_sim_res = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['res_time'] = probe_sim_res
 
 
-                    self.get_logger().info("Simulations in iteration {0}/ kernel {1}: {2} completed.".format(iteration,kern_step+1,sim_step.name))
+                        self.get_logger().info("Simulations in iteration {0}/ kernel {1}: {2} completed.".format(iteration,kern_step+1,sim_step.name))
 
-                    failed_units = ""
-                    for unit in s_cus:
-                        if unit.state != radical.pilot.DONE:
-                            failed_units += " * Simulation task {0} failed with an error: {1}\n".format(unit.uid, unit.stderr)
+                        failed_units = ""
+                        for unit in s_cus:
+                            if unit.state != radical.pilot.DONE:
+                                failed_units += " * Simulation task {0} failed with an error: {1}\n".format(unit.uid, unit.stderr)
 
-                    if profiling == 1:
-                        probe_sim_done = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['stop_time'] = probe_sim_done
+                        if profiling == 1:
+                            probe_sim_done = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['kernel_{0}'.format(kern_step)]['stop_time'] = probe_sim_done
 
-                    self._reporter.ok('>> done')
+                        self._reporter.ok('>> done')
 
-                if profiling == 1:
-                    probe_post_sim_start = datetime.datetime.now()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post'] = od()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post']['start_time'] = probe_post_sim_start
-
-                # TODO: ensure working_dir <-> instance mapping
-                i = 0
-                for cu in s_cus:
-                    i += 1
-                    working_dirs['iteration_{0}'.format(iteration)]['simulation_{0}'.format(i)] = saga.Url(cu.working_directory).path
+                    if profiling == 1:
+                        probe_post_sim_start = datetime.datetime.now()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post'] = od()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post']['start_time'] = probe_post_sim_start
+
+                    # TODO: ensure working_dir <-> instance mapping
+                    i = 0
+                    for cu in s_cus:
+                        i += 1
+                        working_dirs['iteration_{0}'.format(iteration)]['simulation_{0}'.format(i)] = saga.Url(cu.working_directory).path
                 
-                if profiling == 1:
-                    probe_post_sim_end = datetime.datetime.now()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post']['stop_time'] = probe_post_sim_end
-                    cu_dict['iter_{0}'.format(iteration)]['sim'] = all_sim_cus
+                    if profiling == 1:
+                        probe_post_sim_end = datetime.datetime.now()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['sim']['post']['stop_time'] = probe_post_sim_end
+                        cu_dict['iter_{0}'.format(iteration)]['sim'] = all_sim_cus
+
+                    checkpoint.complete('iteration_{0}/simulation'.format(iteration), working_dirs, [cu.uid for cu in all_sim_cus])
 
                 ################################################################
                 # EXECUTE ANALYSIS STEPS
 
-                if isinstance(pattern.analysis_step(iteration=iteration, instance=1),list):
-                    num_ana_kerns = len(pattern.analysis_step(iteration=iteration, instance=1))
+                if checkpoint.is_completed('iteration_{0}/analysis'.format(iteration)):
+                    self.get_logger().info("Analysis step of iteration {0} completed in a previous run. Skipping.".format(iteration))
+                    self._reporter.info("\nAnalysis step of iteration {0} completed in a previous run. Skipping.".format(iteration))
                 else:
-                    num_ana_kerns = 1
-                #print num_ana_kerns
+                    if isinstance(pattern.analysis_step(iteration=iteration, instance=1),list):
+                        num_ana_kerns = len(pattern.analysis_step(iteration=iteration, instance=1))
+                    else:
+                        num_ana_kerns = 1
+                    #print num_ana_kerns
 
-                all_ana_cus = []
-                if profiling == 1:
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['ana'] = od()
-                    cu_dict['iter_{0}'.format(iteration)]['ana']= list()
+                    all_ana_cus = []
+                    if profiling == 1:
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana'] = od()
+                        cu_dict['iter_{0}'.format(iteration)]['ana']= list()
 
-                for kern_step in range(0,num_ana_kerns):
+                    for kern_step in range(0,num_ana_kerns):
 
-                    if profiling == 1:
-                        probe_ana_start = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]= od()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['start_time'] = probe_ana_start
-
-                    a_units = []
-                    for a_instance in range(1, pattern._analysis_instances+1):
-
-                        if isinstance(pattern.analysis_step(iteration=iteration, instance=a_instance),list):
-                            ana_step = pattern.analysis_step(iteration=iteration, instance=a_instance)[kern_step]
-                        else:
-                            ana_step = pattern.analysis_step(iteration=iteration, instance=a_instance)
-
-                        ana_step._bind_to_resource(resource._resource_key)
-
-                        # Resolve all placeholders
-                        #if ana_step.link_input_data is not None:
-                        #    for i in range(len(ana_step.link_input_data)):
-                        #        ana_step.link_input_data[i] = resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step.link_input_data[i])
-
-                        cud = radical.pilot.ComputeUnitDescription()
-                        cud.name = "ana ; {iteration}; {instance}".format(iteration=iteration, instance=a_instance)
-
-                        cud.pre_exec       = ana_step._cu_def_pre_exec
-                        cud.executable     = ana_step._cu_def_executable
-                        cud.arguments      = ana_step.arguments
-                        cud.mpi            = ana_step.uses_mpi
-                        cud.input_staging  = None
-                        cud.output_staging = None
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # upload_input_data
-                        data_in = []
-                        if ana_step._kernel._upload_input_data is not None:
-                            if isinstance(ana_step._kernel._upload_input_data,list):
-                                pass
+                        if profiling == 1:
+                            probe_ana_start = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]= od()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['start_time'] = probe_ana_start
+
+                        a_units = []
+                        a_runtimes = []
+                        for a_instance in range(1, pattern._analysis_instances+1):
+
+                            if isinstance(pattern.analysis_step(iteration=iteration, instance=a_instance),list):
+                                ana_step = pattern.analysis_step(iteration=iteration, instance=a_instance)[kern_step]
                             else:
-                                ana_step._kernel._upload_input_data = [ana_step._kernel._upload_input_data]
-                            for i in range(0,len(ana_step._kernel._upload_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._upload_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip()
-                                        }
+                                ana_step = pattern.analysis_step(iteration=iteration, instance=a_instance)
+
+                            resource._bind_kernel(ana_step)
+
+                            # Resolve all placeholders
+                            #if ana_step.link_input_data is not None:
+                            #    for i in range(len(ana_step.link_input_data)):
+                            #        ana_step.link_input_data[i] = resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step.link_input_data[i])
+
+                            cud = radical.pilot.ComputeUnitDescription()
+                            cud.name = "ana ; {iteration}; {instance}".format(iteration=iteration, instance=a_instance)
+
+                            cud.pre_exec       = ana_step._cu_def_pre_exec
+                            cud.executable     = ana_step._cu_def_executable
+                            cud.arguments      = ana_step.arguments
+                            cud.mpi            = ana_step.uses_mpi
+                            cud.input_staging  = None
+                            cud.output_staging = None
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # upload_input_data
+                            data_in = []
+                            if ana_step._kernel._upload_input_data is not None:
+                                if isinstance(ana_step._kernel._upload_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip())
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # link_input_data
-                        data_in = []
-                        if ana_step._kernel._link_input_data is not None:
-                            if isinstance(ana_step._kernel._link_input_data,list):
-                                pass
+                                    ana_step._kernel._upload_input_data = [ana_step._kernel._upload_input_data]
+                                for i in range(0,len(ana_step._kernel._upload_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._upload_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip()
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip())
+                                            }
+                                    data_in.append(temp)
+
+                            if cud.input_staging is None:
+                                cud.input_staging = data_in
                             else:
-                                ana_step._kernel._link_input_data = [ana_step._kernel._link_input_data]
-                            for i in range(0,len(ana_step._kernel._link_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._link_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.LINK
-                                        }
+                                cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # link_input_data
+                            data_in = []
+                            if ana_step._kernel._link_input_data is not None:
+                                if isinstance(ana_step._kernel._link_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.LINK
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # copy_input_data
-                        data_in = []
-                        if ana_step._kernel._copy_input_data is not None:
-                            if isinstance(ana_step._kernel._copy_input_data,list):
-                                pass
+                                    ana_step._kernel._link_input_data = [ana_step._kernel._link_input_data]
+                                for i in range(0,len(ana_step._kernel._link_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._link_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.LINK
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.LINK
+                                            }
+                                    data_in.append(temp)
+
+                            if cud.input_staging is None:
+                                cud.input_staging = data_in
                             else:
-                                ana_step._kernel._copy_input_data = [ana_step._kernel._copy_input_data]
-                            for i in range(0,len(ana_step._kernel._copy_input_data)):
-                                var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._copy_input_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.COPY
-                                        }
+                                cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # copy_input_data
+                            data_in = []
+                            if ana_step._kernel._copy_input_data is not None:
+                                if isinstance(ana_step._kernel._copy_input_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.COPY
-                                        }
-                                data_in.append(temp)
-
-                        if cud.input_staging is None:
-                            cud.input_staging = data_in
-                        else:
-                            cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # download input data
-                        if ana_step.download_input_data is not None:
-                            data_in  = ana_step.download_input_data
+                                    ana_step._kernel._copy_input_data = [ana_step._kernel._copy_input_data]
+                                for i in range(0,len(ana_step._kernel._copy_input_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._copy_input_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    data_in.append(temp)
+                                data_in = link_read_only_inputs(data_in, ana_step._kernel._read_only_input_data)
+
                             if cud.input_staging is None:
                                 cud.input_staging = data_in
                             else:
                                 cud.input_staging += data_in
-                        #------------------------------------------------------------------------------------------------------------------
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # download input data
+                            if ana_step.download_input_data is not None:
+                                data_in  = ana_step.download_input_data
+                                if cud.input_staging is None:
+                                    cud.input_staging = data_in
+                                else:
+                                    cud.input_staging += data_in
+                            #------------------------------------------------------------------------------------------------------------------
 
 
-                        #------------------------------------------------------------------------------------------------------------------
-                        # copy_output_data
-                        data_out = []
-                        if ana_step._kernel._copy_output_data is not None:
-                            if isinstance(ana_step._kernel._copy_output_data,list):
-                                pass
-                            else:
-                                ana_step._kernel._copy_output_data = [ana_step._kernel._copy_output_data]
-                            for i in range(0,len(ana_step._kernel._copy_output_data)):
-                                var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._copy_output_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip(),
-                                            'action': radical.pilot.COPY
-                                        }
+                            #------------------------------------------------------------------------------------------------------------------
+                            # copy_output_data
+                            data_out = []
+                            if ana_step._kernel._copy_output_data is not None:
+                                if isinstance(ana_step._kernel._copy_output_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip()),
-                                            'action': radical.pilot.COPY
-                                        }
-                                data_out.append(temp)
-
-                        if cud.output_staging is None:
-                            cud.output_staging = data_out
-                        else:
-                            cud.output_staging += data_out
-                        #------------------------------------------------------------------------------------------------------------------
-
-                        #------------------------------------------------------------------------------------------------------------------
-                        # download_output_data
-                        data_out = []
-                        if ana_step._kernel._download_output_data is not None:
-                            if isinstance(ana_step._kernel._download_output_data,list):
-                                pass
+                                    ana_step._kernel._copy_output_data = [ana_step._kernel._copy_output_data]
+                                for i in range(0,len(ana_step._kernel._copy_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._copy_output_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip(),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip()),
+                                                'action': radical.pilot.COPY
+                                            }
+                                    data_out.append(temp)
+
+                            if cud.output_staging is None:
+                                cud.output_staging = data_out
                             else:
-                                ana_step._kernel._download_output_data = [ana_step._kernel._download_output_data]
-                            for i in range(0,len(ana_step._kernel._download_output_data)):
-                                var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._download_output_data[i])
-                                if len(var.split('>')) > 1:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': var.split('>')[1].strip()
-                                        }
+                                cud.output_staging += data_out
+                            #------------------------------------------------------------------------------------------------------------------
+
+                            #------------------------------------------------------------------------------------------------------------------
+                            # download_output_data
+                            data_out = []
+                            if ana_step._kernel._download_output_data is not None:
+                                if isinstance(ana_step._kernel._download_output_data,list):
+                                    pass
                                 else:
-                                    temp = {
-                                            'source': var.split('>')[0].strip(),
-                                            'target': os.path.basename(var.split('>')[0].strip())
-                                        }
-                                data_out.append(temp)
+                                    ana_step._kernel._download_output_data = [ana_step._kernel._download_output_data]
+                                for i in range(0,len(ana_step._kernel._download_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._download_output_data[i])
+                                    if len(var.split('>')) > 1:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': var.split('>')[1].strip()
+                                            }
+                                    else:
+                                        temp = {
+                                                'source': var.split('>')[0].strip(),
+                                                'target': os.path.basename(var.split('>')[0].strip())
+                                            }
+                                    data_out.append(temp)
+
+                            if cud.output_staging is None:
+                                cud.output_staging = data_out
+                            else:
+                                cud.output_staging += data_out
+                            #------------------------------------------------------------------------------------------------------------------
 
-                        if cud.output_staging is None:
-                            cud.output_staging = data_out
-                        else:
-                            cud.output_staging += data_out
-                        #------------------------------------------------------------------------------------------------------------------
+                            #------------------------------------------------------------------------------------------------------------------
+                            # background_download_output_data
+                            data_out = []
+                            if ana_step._kernel._background_download_output_data is not None:
+                                for i in range(0,len(ana_step._kernel._background_download_output_data)):
+                                    var=resolve_placeholder_vars(working_dirs, a_instance, iteration, pattern._simulation_instances, pattern._analysis_instances, "analysis", ana_step._kernel._background_download_output_data[i])
+                                    data_out.append(_as_directive(var))
 
+                            if data_out:
+                                cud = resource._background_downloads.add_directives(cud, data_out)
+                            #------------------------------------------------------------------------------------------------------------------
 
-                        if ana_step.cores is not None:
-                            cud.cores = ana_step.cores
 
-                        a_units.append(cud)
+                            if ana_step.cores is not None:
+                                cud.cores = ana_step.cores
 
-                        if ana_step.get_instance_type == 'single':
-                            break
+                            a_units.append(cud)
+                            a_runtimes.append(ana_step.max_runtime)
 
-                    self.get_logger().debug("Created analysis CU: {0}.".format(cud.as_dict()))
+                            if ana_step.get_instance_type == 'single':
+                                break
+
+                        self.get_logger().debug("Created analysis CU: {0}.".format(cud.as_dict()))
                     
-                    self.get_logger().info("Submitted tasks for analysis iteration {0}.".format(iteration))
-                    self.get_logger().info("Waiting for analysis tasks in iteration {0}/kernel {1}: {2} to complete.".format(iteration,kern_step+1,ana_step.name))
+                        self.get_logger().info("Submitted tasks for analysis iteration {0}.".format(iteration))
+                        self.get_logger().info("Waiting for analysis tasks in iteration {0}/kernel {1}: {2} to complete.".format(iteration,kern_step+1,ana_step.name))
 
-                    self._reporter.info("\nIteration {0}: Waiting for analysis tasks: {1} to complete".format(iteration,ana_step.name))
-                    if profiling == 1:
-                        probe_ana_wait = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['wait_time'] = probe_ana_wait
+                        self._reporter.info("\nIteration {0}: Waiting for analysis tasks: {1} to complete".format(iteration,ana_step.name))
+                        if profiling == 1:
+                            probe_ana_wait = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['wait_time'] = probe_ana_wait
+
+
+                        a_cus = submit_units(resource, a_units)
+                        a_cus = wait_units(resource, a_cus, a_units, a_runtimes)
+                        all_cus.extend(a_cus)
+                        all_ana_cus.extend(a_cus)
 
+                        if profiling == 1:
+                            probe_ana_res = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['res_time'] = probe_ana_res
+                        
+                        self.get_logger().info("Analysis in iteration {0}/kernel {1}: {2} completed.".format(iteration,kern_step+1,ana_step.name))
+
+                        failed_units = ""
+                        for unit in a_cus:
+                            if unit.state != radical.pilot.DONE:
+                                failed_units += " * Analysis task {0} failed with an error: {1}\n".format(unit.uid, unit.stderr)
 
-                    a_cus = resource._umgr.submit_units(a_units)
-                    all_cus.extend(a_cus)
-                    all_ana_cus.extend(a_cus)
+                        if profiling == 1:
+                            probe_ana_done = datetime.datetime.now()
+                            enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['stop_time'] = probe_ana_done
 
-                    uids = [cu.uid for cu in a_cus]
-                    resource._umgr.wait_units(uids)
+                        self._reporter.ok('>> done')
 
                     if profiling == 1:
-                        probe_ana_res = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['res_time'] = probe_ana_res
-                        
-                    self.get_logger().info("Analysis in iteration {0}/kernel {1}: {2} completed.".format(iteration,kern_step+1,ana_step.name))
+                        probe_post_ana_start = datetime.datetime.now()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post'] = od()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post']['start_time'] = probe_post_ana_start
 
-                    failed_units = ""
-                    for unit in a_cus:
-                        if unit.state != radical.pilot.DONE:
-                            failed_units += " * Analysis task {0} failed with an error: {1}\n".format(unit.uid, unit.stderr)
+                    i = 0
+                    for cu in a_cus:
+                        i += 1
+                        working_dirs['iteration_{0}'.format(iteration)]['analysis_{0}'.format(i)] = saga.Url(cu.working_directory).path
 
                     if profiling == 1:
-                        probe_ana_done = datetime.datetime.now()
-                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['kernel_{0}'.format(kern_step)]['stop_time'] = probe_ana_done
+                        probe_post_ana_end = datetime.datetime.now()
+                        enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post']['stop_time'] = probe_post_ana_end
+                        cu_dict['iter_{0}'.format(iteration)]['ana'] = all_ana_cus
 
-                    self._reporter.ok('>> done')
+                    checkpoint.complete('iteration_{0}/analysis'.format(iteration), working_dirs, [cu.uid for cu in all_ana_cus])
 
-                if profiling == 1:
-                    probe_post_ana_start = datetime.datetime.now()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post'] = od()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post']['start_time'] = probe_post_ana_start
+                # Remove the sandboxes that the next steps can't reference.
+                sandbox_gc = getattr(resource, '_sandbox_gc', None)
+                if sandbox_gc is not None:
+                    sandbox_gc.collect(resource, working_dirs, iteration)
 
-                i = 0
-                for cu in a_cus:
-                    i += 1
-                    working_dirs['iteration_{0}'.format(iteration)]['analysis_{0}'.format(i)] = saga.Url(cu.working_directory).path
+                ################################################################
+                # CHECK CONVERGENCE AND ADAPT THE NEXT ITERATION
 
-                if profiling == 1:
-                    probe_post_ana_end = datetime.datetime.now()
-                    enmd_overhead_dict['iter_{0}'.format(iteration)]['ana']['post']['stop_time'] = probe_post_ana_end
-                    cu_dict['iter_{0}'.format(iteration)]['ana'] = all_ana_cus
+                if iteration < pattern.iterations:
+
+                    if pattern.check_convergence(iteration=iteration) is True:
+                        self.get_logger().info("Simulation-analysis loop converged after iteration {0}.".format(iteration))
+                        self._reporter.info("\nConverged after iteration {0}. Terminating the loop.".format(iteration))
+                        break
+
+                    instances = pattern.adapt_simulation_instances(iteration=iteration)
+                    if instances is not None and instances != pattern._simulation_instances:
+                        if not isinstance(instances, int) or instances < 1:
+                            raise EnsemblemdError("adapt_simulation_instances() returned an invalid number of instances: {0}".format(instances))
+                        self.get_logger().info("Changing the number of simulation instances from {0} to {1} in iteration {2}.".format(pattern._simulation_instances, instances, iteration+1))
+                        pattern._simulation_instances = instances
 
             self._reporter.header('Pattern execution successfully finished')
 
@@ -785,7 +869,7 @@ class Plugin(PluginBase):
                 iter = 'None'
                 step = 'pre_loop'
                 kern = 'None'
-                for key,val in enmd_overhead_dict['preloop'].items():
+                for key,val in enmd_overhead_dict.get('preloop', {}).items():
                     probe = key
                     timestamp = val
                     entry = '{0},{1},{2},{3},{4}\n'.format(iter,step,kern,probe,timestamp)
@@ -795,7 +879,7 @@ class Plugin(PluginBase):
 
                 for i in range(1,iters+1):
                     iter = 'iter_{0}'.format(i)
-                    for key1,val1 in enmd_overhead_dict[iter].items():
+                    for key1,val1 in enmd_overhead_dict.get(iter, {}).items():
                         step = key1
                         for key2,val2 in val1.items():
                             kern = key2
@@ -858,7 +942,7 @@ class Plugin(PluginBase):
 
                 for i in range(1,iters+1):
                     iter = 'iter_{0}'.format(i)
-                    for key,val in cu_dict[iter].items():
+                    for key,val in cu_dict.get(iter, {}).items():
                         step = key
                         cus = val
 
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Propagation of the units that the ``skip`` failure policy skipped.
+
+A unit that is skipped leaves no usable working directory behind. Units of
+later steps that stage their input from it would fail in their input
+staging, with an error that doesn't point at the skipped unit. The
+:class:`SkippedUnits` of an execution context records the working
+directories of the skipped units instead, and the units that reference one
+of them aren't submitted: they are represented by a :class:`SkippedUnit`
+in state CANCELED, which the failure policy skips in turn.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list
+
+# ------------------------------------------------------------------------------
+#
+class SkippedUnit(object):
+    """A SkippedUnit represents a ComputeUnit that wasn't submitted, because
+       the working directory 'sandbox' it stages its input from belongs to
+       a skipped unit. Its working directory is 'sandbox', so that the units
+       that stage their input from it are skipped as well.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, name, sandbox):
+        self.uid               = None
+        self.name              = name
+        self.state             = radical.pilot.CANCELED
+        self.exit_code         = None
+        self.stdout            = ""
+        self.stderr            = "Skipped, because its input {0} belongs to a skipped unit.".format(sandbox)
+        self.working_directory = sandbox
+
+# ------------------------------------------------------------------------------
+#
+class SkippedUnits(object):
+    """SkippedUnits records the working directories of the skipped units.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self):
+        self._logger    = ru.get_logger('radical.enmd.skipped_units')
+        self._lock      = threading.Lock()
+        self._sandboxes = set()
+
+    # --------------------------------------------------------------------------
+    #
+    def record(self, units):
+        """Records the working directories of the skipped 'units'.
+        """
+        with self._lock:
+            for unit in units:
+                if unit.working_directory:
+                    self._sandboxes.add(os.path.normpath(saga.Url(unit.working_directory).path))
+
+    # --------------------------------------------------------------------------
+    #
+    def get_skipped_input(self, cud):
+        """Returns the working directory of a skipped unit that 'cud' stages
+           its input from, or None.
+        """
+        with self._lock:
+            if not self._sandboxes:
+                return None
+            for directive in _as_list(cud.input_staging):
+                path = saga.Url(_as_directive(directive)['source']).path
+                if not path:
+                    continue
+                path = os.path.normpath(path)
+                while path not in ['/', '']:
+                    if path in self._sandboxes:
+                        return path
+                    path = os.path.dirname(path)
+        return None
+
+    # --------------------------------------------------------------------------
+    #
+    def split(self, cuds):
+        """Returns the list of SkippedUnits for 'cuds', with None for the
+           descriptions that can be submitted.
+        """
+        skipped = list()
+        for cud in cuds:
+            sandbox = self.get_skipped_input(cud)
+            if sandbox is None:
+                skipped.append(None)
+            else:
+                self._logger.warning("Skipping unit {0}: its input {1} belongs to a skipped unit.".format(
+                    cud.name, sandbox))
+                skipped.append(SkippedUnit(cud.name, sandbox))
+        return skipped
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+"""Speculative execution of straggling ComputeUnits.
+
+The steps of the patterns are synchronous: a step is done when its slowest
+unit is done, and a single unit on a noisy node can delay the whole step.
+If the execution context has speculation enabled, :func:`wait_units`
+watches the units of a step. Once ``speculation_fraction`` of them have
+finished executing, every unit that has been executing for longer than
+``speculation_factor`` times the median execution time of the finished
+units is duplicated, as long as there are enough free cores for the copy.
+
+The first copy of a unit that finishes executing wins, and the other copy
+is canceled. Speculative copies are submitted without output staging. If a
+copy wins, the output staging of the original unit is performed by a small
+unit that links the output files from the winner's sandbox, so that the
+outputs are only ever staged from the winner.
+
+The same loop enforces the runtime limits of the units: a unit that has
+been executing for longer than the ``max_runtime`` of its kernel is
+canceled, so that its cores are released, and is handled by the failure
+policy. If the context has a ``step_timeout``, all units of a step that
+haven't finished in time, including bundles and the output staging units
+of winning copies, are canceled and the step fails.
+
+Units that are part of a bundle are never duplicated, and only canceled
+with their bundle when the step times out. Kernels whose units may be
+bundled can't have a ``max_runtime``.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import time
+import saga
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins.bundling import BundledUnit, get_uids
+from radical.ensemblemd.exec_plugins.submission import submit_description
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _as_list
+
+# Seconds between two checks of the unit states.
+POLL_INTERVAL = 1.0
+
+# A unit in one of these states has finished executing.
+EXECUTED_STATES = ['AgentStagingOutputPending', 'AgentStagingOutput',
+                   radical.pilot.PENDING_OUTPUT_STAGING,
+                   radical.pilot.STAGING_OUTPUT,
+                   radical.pilot.DONE]
+
+FINAL_STATES = [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]
+
+# ------------------------------------------------------------------------------
+#
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+# ------------------------------------------------------------------------------
+#
+def create_copy(cud):
+    """Returns a speculative copy of 'cud' without output staging.
+    """
+    copy                = radical.pilot.ComputeUnitDescription()
+    copy.name           = "speculative; {0}".format(cud.name)
+    copy.pre_exec       = cud.pre_exec
+    copy.executable     = cud.executable
+    copy.arguments      = cud.arguments
+    copy.post_exec      = cud.post_exec
+    copy.environment    = cud.environment
+    copy.cores          = cud.cores
+    copy.mpi            = cud.mpi
+    copy.input_staging  = cud.input_staging
+    copy.output_staging = None
+    return copy
+
+# ------------------------------------------------------------------------------
+#
+def create_stage_out(cud, unit):
+    """Returns a description that performs the output staging of 'cud' with
+       the output files of 'unit'.
+    """
+    sandbox = saga.Url(unit.working_directory).path
+
+    input_staging = list()
+    for directive in _as_list(cud.output_staging):
+        source = _as_directive(directive)['source']
+        input_staging.append({
+            'source': os.path.join(sandbox, source),
+            'target': source,
+            'action': radical.pilot.LINK
+        })
+
+    stage_out                = radical.pilot.ComputeUnitDescription()
+    stage_out.name           = "stage_out; {0}".format(cud.name)
+    stage_out.executable     = "/bin/true"
+    stage_out.cores          = 1
+    stage_out.mpi            = False
+    stage_out.input_staging  = input_staging
+    stage_out.output_staging = cud.output_staging
+    return stage_out
+
+# ------------------------------------------------------------------------------
+#
+def wait_units(resource, units, cuds, max_runtimes=None, deadline=None):
+    """Waits for 'units', which were submitted from the descriptions 'cuds'.
+       If the execution context has speculation enabled, straggling units
+       are duplicated. Units that execute for longer than their entry in
+       'max_runtimes' are canceled. If the units haven't finished at the
+       time 'deadline', the remaining units are canceled and an
+       EnsemblemdError is raised. Returns the winning units in the order of
+       'cuds'.
+    """
+    speculate = getattr(resource, '_speculation', False)
+    if not max_runtimes or not [limit for limit in max_runtimes if limit]:
+        max_runtimes = None
+
+    if not speculate and max_runtimes is None and deadline is None:
+        resource._umgr.wait_units(get_uids(units))
+        return units
+
+    logger   = ru.get_logger('radical.enmd.speculation')
+    fraction = getattr(resource, '_speculation_fraction', None)
+    factor   = getattr(resource, '_speculation_factor', None)
+
+    units      = list(units)
+    copies     = dict()   # index -> speculative copy
+    stage_outs = dict()   # index -> output staging unit of a winning copy
+    started    = dict()   # uid -> time the unit was first seen executing
+    runtimes   = dict()   # uid -> execution time of the finished unit
+    finished   = set()    # indices that have a winner
+    canceled   = set()    # uids of the units that exceeded their runtime
+
+    # Bundled units can't be canceled on their own.
+    for index, unit in enumerate(units):
+        if isinstance(unit, BundledUnit):
+            finished.add(index)
+
+    while True:
+        now = time.time()
+
+        for index in range(len(units)):
+            if index in finished:
+                continue
+
+            for unit in [units[index], copies.get(index)]:
+                if unit is None:
+                    continue
+                if unit.state == radical.pilot.EXECUTING and unit.uid not in started:
+                    started[unit.uid] = now
+                if unit.state in EXECUTED_STATES and unit.uid in started and unit.uid not in runtimes:
+                    runtimes[unit.uid] = now - started[unit.uid]
+
+            original = units[index]
+            copy     = copies.get(index)
+
+            if original.state in EXECUTED_STATES:
+                winner, loser = original, copy
+            elif copy is not None and copy.state in EXECUTED_STATES:
+                winner, loser = copy, original
+            elif original.state in FINAL_STATES and (copy is None or copy.state in FINAL_STATES):
+                finished.add(index)
+                continue
+            else:
+                continue
+
+            finished.add(index)
+            if loser is not None and loser.state not in FINAL_STATES:
+                logger.info("Unit {0} finished first, canceling unit {1}.".format(winner.uid, loser.uid))
+                resource._umgr.cancel_units(loser.uid)
+
+            if winner is copy:
+                logger.info("Speculative unit {0} replaces unit {1}.".format(copy.uid, original.uid))
+                units[index] = copy
+                if cuds[index].output_staging:
+                    stage_outs[index] = submit_description(resource, create_stage_out(cuds[index], copy), copy)
+
+        if len(finished) == len(units):
+            # Bundled units and the output staging of the winners may still
+            # be in progress.
+            waiting = [unit for unit in units + stage_outs.values() if unit.state not in FINAL_STATES]
+            if not waiting:
+                for index, stage_out in stage_outs.items():
+                    if stage_out.state != radical.pilot.DONE:
+                        units[index] = stage_out
+                return units
+            if deadline is None:
+                resource._umgr.wait_units(get_uids(waiting))
+                continue
+        else:
+            waiting = [units[i] for i in range(len(units)) if i not in finished] + \
+                      [copies[i] for i in copies if i not in finished]
+
+        # Cancel everything that is left once the step has timed out.
+        if deadline is not None and now > deadline:
+            remaining = [unit for unit in units + copies.values() + stage_outs.values()
+                         if unit.state not in FINAL_STATES]
+            resource._umgr.cancel_units(get_uids(remaining))
+            raise EnsemblemdError(
+                msg="Step timed out, canceled {0} unfinished unit(s).".format(len(remaining)))
+
+        # Cancel the units that exceed their runtime limit.
+        if max_runtimes is not None:
+            for index in range(len(units)):
+                limit = max_runtimes[index]
+                if index in finished or not limit:
+                    continue
+                for unit in [units[index], copies.get(index)]:
+                    if unit is not None and unit.uid in started and unit.uid not in canceled \
+                       and unit.state == radical.pilot.EXECUTING and now - started[unit.uid] > limit:
+                        logger.warning("Unit {0} exceeded its max_runtime of {1}s, canceling it.".format(unit.uid, limit))
+                        resource._umgr.cancel_units(unit.uid)
+                        canceled.add(unit.uid)
+
+        # Duplicate the stragglers. Execution times are only known for the
+        # units that were seen executing.
+        executed = [unit for unit in units if unit.state in EXECUTED_STATES]
+        done     = [runtimes[unit.uid] for unit in executed if unit.uid in runtimes]
+        if speculate and done and len(executed) >= fraction * len(units):
+            median = _median(done)
+            busy   = sum([(cuds[i].cores or 1) for i in range(len(units))
+                          if units[i].state not in EXECUTED_STATES + FINAL_STATES]) + \
+                     sum([(cuds[i].cores or 1) for i in copies
+                          if copies[i].state not in EXECUTED_STATES + FINAL_STATES])
+            for index in range(len(units)):
+                if index in finished or index in copies:
+                    continue
+                unit  = units[index]
+                cores = cuds[index].cores or 1
+                if unit.uid not in started or now - started[unit.uid] <= factor * median:
+                    continue
+                if busy + cores > resource._cores:
+                    continue
+                logger.info("Unit {0} has been executing for {1:.0f}s (median {2:.0f}s), starting a speculative copy.".format(
+                    unit.uid, now - started[unit.uid], median))
+                copies[index] = submit_description(resource, create_copy(cuds[index]))
+                busy += cores
+
+        resource._umgr.wait_units(get_uids(waiting), timeout=POLL_INTERVAL)
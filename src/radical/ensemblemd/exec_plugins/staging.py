@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+
+"""Helpers for the pilot staging area (``staging:///``) that are shared by
+   the execution plugins.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import saga
+import pipes
+import hashlib
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+
+STAGING_AREA = 'staging:///'
+
+# Shared uploads are staged into the staging area with this prefix.
+SHARED_UPLOAD_PREFIX = 'enmd_shared'
+
+# The staging area is a directory with this name in the pilot sandbox.
+STAGING_AREA_DIR = 'staging_area'
+
+# ------------------------------------------------------------------------------
+#
+def get_staging_area_url(pilot):
+    """Returns the URL of the staging area of 'pilot' as a saga.Url.
+    """
+    url = saga.Url(pilot.sandbox)
+    url.path = os.path.join(url.path, STAGING_AREA_DIR)
+    return url
+
+# ------------------------------------------------------------------------------
+#
+def get_exchange_pilot(resource):
+    """Returns the pilot whose staging area the units of 'resource' exchange
+       files through.
+    """
+    exchange = getattr(resource, '_staging_exchange', None)
+    if exchange is not None:
+        return exchange.pilot
+    return resource._pilot
+
+# ------------------------------------------------------------------------------
+#
+class StagingExchange(object):
+    """A StagingExchange makes the staging area of one pilot, the exchange
+       pilot, the staging area of all pilots of an execution context.
+
+       ``staging:///`` refers to the staging area of the pilot a unit runs
+       on. If an execution context has more than one pilot, e.g., the
+       pilots of a MultiClusterEnvironment or the pilots that elastic
+       scaling or the ``resubmit`` failure policy add, a file that one unit
+       stages into the staging area isn't found by a unit on another pilot.
+       :meth:`rewrite` replaces ``staging:///`` in the LINK, COPY and MOVE
+       directives of a description by the path of the exchange pilot's
+       staging area, which the pilots on the resource of the exchange pilot
+       can access. Shared uploads, which are staged into every pilot, and
+       the directories in 'local_dirs' aren't rewritten.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, local_dirs=None):
+        self._local_dirs   = set(local_dirs or [])
+        self._pilot        = None
+        self._resource_key = None
+
+    # --------------------------------------------------------------------------
+    #
+    def set_pilot(self, pilot, resource_key):
+        """Makes 'pilot' on the resource 'resource_key' the exchange pilot.
+        """
+        self._pilot        = pilot
+        self._resource_key = resource_key
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def pilot(self):
+        """Returns the exchange pilot.
+        """
+        return self._pilot
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def resource_key(self):
+        """Returns the resource of the exchange pilot.
+        """
+        return self._resource_key
+
+    # --------------------------------------------------------------------------
+    #
+    def _is_exchanged(self, url):
+        if not url.startswith(STAGING_AREA):
+            return False
+        name = os.path.normpath(url[len(STAGING_AREA):])
+        if name.startswith(SHARED_UPLOAD_PREFIX):
+            return False
+        return name.split(os.sep)[0] not in self._local_dirs
+
+    # --------------------------------------------------------------------------
+    #
+    def _rewrite_directives(self, directives, key):
+        rewritten = list()
+        changed   = False
+        for directive in _as_list(directives):
+            directive = _as_directive(directive)
+            if directive.get('action') in [radical.pilot.LINK, radical.pilot.COPY, radical.pilot.MOVE] \
+               and self._is_exchanged(directive[key]):
+                directive[key] = os.path.join(get_staging_area_url(self._pilot).path,
+                                              directive[key][len(STAGING_AREA):])
+                changed = True
+            rewritten.append(directive)
+        return rewritten, changed
+
+    # --------------------------------------------------------------------------
+    #
+    def uses_exchange(self, cud):
+        """Returns True if 'cud' exchanges files through the staging area.
+        """
+        return self._rewrite_directives(cud.input_staging,  'source')[1] or \
+               self._rewrite_directives(cud.output_staging, 'target')[1]
+
+    # --------------------------------------------------------------------------
+    #
+    def rewrite(self, cud):
+        """Returns a copy of 'cud' that exchanges files through the staging
+           area of the exchange pilot, or 'cud' itself if it doesn't
+           exchange files through the staging area.
+        """
+        input_staging,  inputs_changed  = self._rewrite_directives(cud.input_staging,  'source')
+        output_staging, outputs_changed = self._rewrite_directives(cud.output_staging, 'target')
+        if not inputs_changed and not outputs_changed:
+            return cud
+
+        copy = _copy_description(cud)
+        if inputs_changed:
+            copy.input_staging = input_staging
+        if outputs_changed:
+            copy.output_staging = output_staging
+        return copy
+
+# ------------------------------------------------------------------------------
+#
+def link_read_only_inputs(directives, read_only):
+    """Returns 'directives' with the COPY directives of the 'read_only'
+       inputs turned into LINK directives. 'read_only' is a list of target
+       names or True for all inputs.
+    """
+    if not read_only:
+        return directives
+
+    if read_only is not True:
+        read_only = set([os.path.normpath(name) for name in read_only])
+
+    linked = list()
+    for directive in directives:
+        directive = _as_directive(directive)
+        if directive.get('action') == radical.pilot.COPY and \
+           (read_only is True or os.path.normpath(directive['target']) in read_only):
+            directive['action'] = radical.pilot.LINK
+        linked.append(directive)
+    return linked
+
+# ------------------------------------------------------------------------------
+#
+def reflink_copies(cud):
+    """Returns a copy of 'cud' that copies its absolute COPY inputs with
+       ``cp --reflink=auto`` in ``pre_exec``, so that file systems with
+       copy-on-write support don't duplicate the data. Returns 'cud' itself
+       if it doesn't copy any such input.
+    """
+    commands = list()
+    others   = list()
+    for directive in _as_list(cud.input_staging):
+        copy_directive = _as_directive(directive)
+        source = copy_directive['source']
+        if source.startswith('file://'):
+            source = saga.Url(source).path
+        if copy_directive.get('action') != radical.pilot.COPY or not os.path.isabs(source):
+            others.append(directive)
+            continue
+
+        target = os.path.normpath(copy_directive['target'])
+        if os.path.dirname(target):
+            commands.append("mkdir -p {0}".format(pipes.quote(os.path.dirname(target))))
+        commands.append("cp -R --reflink=auto {0} {1}".format(pipes.quote(source), pipes.quote(target)))
+
+    if not commands:
+        return cud
+
+    copy = _copy_description(cud)
+    copy.input_staging = others
+    copy.pre_exec = commands + _as_list(cud.pre_exec)
+    return copy
+
+# ------------------------------------------------------------------------------
+#
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+# ------------------------------------------------------------------------------
+#
+def _as_directive(directive):
+    """Returns a copy of the staging directive as a dictionary.
+    """
+    if isinstance(directive, basestring):
+        parts = [part.strip() for part in directive.split('>')]
+        if len(parts) == 1:
+            parts.append(os.path.basename(parts[0]))
+        return {'source': parts[0], 'target': parts[1]}
+    return dict(directive)
+
+# ------------------------------------------------------------------------------
+#
+def _copy_description(cud):
+    """Returns a copy of the ComputeUnitDescription 'cud'.
+    """
+    copy                = radical.pilot.ComputeUnitDescription()
+    copy.name           = cud.name
+    copy.pre_exec       = cud.pre_exec
+    copy.executable     = cud.executable
+    copy.arguments      = cud.arguments
+    copy.post_exec      = cud.post_exec
+    copy.environment    = cud.environment
+    copy.cores          = cud.cores
+    copy.mpi            = cud.mpi
+    copy.input_staging  = cud.input_staging
+    copy.output_staging = cud.output_staging
+    return copy
+
+# ------------------------------------------------------------------------------
+#
+def _is_download(directive):
+    """Returns True if the output staging 'directive' downloads a file to
+       the local machine.
+    """
+    if directive.get('action', radical.pilot.TRANSFER) != radical.pilot.TRANSFER:
+        return False
+    target = directive['target']
+    return target.startswith('file://') or '://' not in target
+
+# ------------------------------------------------------------------------------
+#
+def _get_upload_path(directive):
+    """Returns the local path of the file that 'directive' uploads or None
+       if it doesn't upload a local file.
+    """
+    if directive.get('action', radical.pilot.TRANSFER) != radical.pilot.TRANSFER:
+        return None
+
+    source = directive['source']
+    if source.startswith('file://'):
+        source = saga.Url(source).path
+    elif '://' in source:
+        return None
+
+    if not os.path.isfile(source):
+        return None
+    return os.path.abspath(source)
+
+# ------------------------------------------------------------------------------
+#
+class SharedUploads(object):
+    """SharedUploads keeps track of the local files that are uploaded once
+       into the staging areas of the pilots and linked into the sandboxes of
+       the ComputeUnits that use them.
+
+       A file is identified by its path, size and modification time. It is
+       shared as soon as it is used by more than one ComputeUnit, within one
+       step or across steps. If a 'transfer_manager' is given, all uploaded
+       files are shared and uploaded by its worker pool. If an
+       :class:`~radical.ensemblemd.exec_plugins.upload_manifest.UploadManifest`
+       is given, all uploaded files are shared, identified by their content
+       hash and uploaded into its upload directory instead of the staging
+       areas, and files that are listed in its manifest aren't uploaded
+       again.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, transfer_manager=None, manifest=None):
+        self._logger  = ru.get_logger('radical.enmd.staging')
+        self._lock    = threading.Lock()
+        self._seen    = set()    # names of the files that were uploaded before
+        self._sources = dict()   # name -> local path of the shared files
+        self._staged  = set()    # (location, name) of the staged files
+        self._staging = dict()   # (location, name) -> event of an upload in progress
+
+        self._transfers = transfer_manager
+        self._manifest  = manifest
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_name(self, path):
+        """Returns the name of the local file 'path' in the staging area.
+        """
+        if self._manifest is not None:
+            return self._manifest.get_name(path)
+        stat = os.stat(path)
+        key  = hashlib.sha1("{0}:{1}:{2}".format(path, stat.st_size, stat.st_mtime)).hexdigest()
+        return "{0}_{1}_{2}".format(SHARED_UPLOAD_PREFIX, key[:12], os.path.basename(path))
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_location(self, pilot):
+        """Returns the location that the shared files are staged into for
+           'pilot': the pilot's staging area, or the upload directory on its
+           resource.
+        """
+        if self._manifest is not None:
+            return str(self._manifest.get_url(pilot))
+        return pilot.uid
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_source(self, name):
+        """Returns the path that the shared file 'name' is linked from.
+        """
+        if self._manifest is not None:
+            return self._manifest.get_source(name)
+        return os.path.join(STAGING_AREA, name)
+
+    # --------------------------------------------------------------------------
+    #
+    def stage(self, pilot):
+        """Stages the shared files that aren't staged yet into the staging
+           area of 'pilot', or into the upload directory on its resource.
+           Files that another thread is staging into the same location are
+           waited for.
+        """
+        location = self._get_location(pilot)
+        with self._lock:
+            names   = list()
+            waiting = list()
+            for name in sorted(self._sources):
+                key = (location, name)
+                if key in self._staged:
+                    continue
+                if key in self._staging:
+                    waiting.append((name, self._staging[key]))
+                else:
+                    self._staging[key] = threading.Event()
+                    names.append(name)
+            sources = dict([(name, self._sources[name]) for name in names])
+
+        # The uploads are done outside of the lock, so that other pilots and
+        # steps don't wait for them.
+        try:
+            if names:
+                self._upload(pilot, names, sources)
+        finally:
+            with self._lock:
+                for name in names:
+                    self._staging.pop((location, name)).set()
+
+        for name, event in waiting:
+            event.wait()
+
+        with self._lock:
+            missing = [name for name, event in waiting
+                       if (location, name) not in self._staged]
+        if missing:
+            raise EnsemblemdError(
+                msg="{0} shared file(s) couldn't be staged into pilot {1}.".format(len(missing), pilot.uid))
+
+    # --------------------------------------------------------------------------
+    #
+    def _upload(self, pilot, names, sources):
+        """Uploads the shared files 'names', whose local paths are in
+           'sources', into the staging area of 'pilot', or into the upload
+           directory on its resource.
+        """
+        location = self._get_location(pilot)
+
+        skipped = set()
+        if self._manifest is not None:
+            skipped = self._manifest.get_staged(pilot, names)
+        uploads = [(sources[name], name) for name in names if name not in skipped]
+
+        if uploads and self._manifest is not None:
+            self._manifest.upload(pilot, uploads, self._transfers)
+            self._manifest.add(pilot, uploads)
+        elif uploads and self._transfers is not None:
+            self._transfers.upload(pilot, uploads)
+        elif uploads:
+            pilot.stage_in([{'source': path,
+                             'target': os.path.join(STAGING_AREA, name),
+                             'action': radical.pilot.TRANSFER} for path, name in uploads])
+
+        with self._lock:
+            for name in names:
+                self._staged.add((location, name))
+
+        size = sum([os.path.getsize(path) for path, name in uploads])
+        self._logger.info("Staged {0} shared file(s), {1:.1f} MB, into {2}.".format(
+            len(uploads), size / (1024.0 * 1024.0), location))
+        if skipped:
+            size = sum([os.path.getsize(sources[name]) for name in skipped])
+            self._logger.info("Skipped {0} unchanged file(s), {1:.1f} MB, that are in the manifest of {2}.".format(
+                len(skipped), size / (1024.0 * 1024.0), location))
+
+    # --------------------------------------------------------------------------
+    #
+    def deduplicate(self, pilots, cuds):
+        """Returns copies of 'cuds' in which the uploads of shared files are
+           replaced by links to the staging areas of 'pilots', or to the
+           upload directory on their resources. The shared files are staged
+           for the pilots first, including pilots that replaced failed
+           pilots since the files were first shared.
+        """
+        uploads = list()
+        counts  = dict()
+        for cud in cuds:
+            for index, directive in enumerate(_as_list(cud.input_staging)):
+                directive = _as_directive(directive)
+                path = _get_upload_path(directive)
+                if path is None:
+                    continue
+                name = self._get_name(path)
+                uploads.append((cud, index, directive, path, name))
+                counts[name] = counts.get(name, 0) + 1
+
+        links = dict()   # (id of cud, index) -> link directive
+        with self._lock:
+            for cud, index, directive, path, name in uploads:
+                if self._transfers is None and self._manifest is None and name not in self._sources \
+                   and counts[name] < 2 and name not in self._seen:
+                    self._seen.add(name)
+                    continue
+                self._sources[name] = path
+                links[(id(cud), index)] = {'source': self._get_source(name),
+                                           'target': directive['target'],
+                                           'action': radical.pilot.LINK}
+            shared = bool(self._sources)
+
+        if not shared:
+            return cuds
+
+        for pilot in pilots:
+            if pilot.state not in [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]:
+                self.stage(pilot)
+
+        if not links:
+            return cuds
+
+        copies = list()
+        for cud in cuds:
+            directives = _as_list(cud.input_staging)
+            if not [index for index in range(len(directives)) if (id(cud), index) in links]:
+                copies.append(cud)
+                continue
+            copy = _copy_description(cud)
+            copy.input_staging = [links.get((id(cud), index), directive)
+                                  for index, directive in enumerate(directives)]
+            copies.append(copy)
+
+        self._logger.info("Replaced {0} of {1} upload(s) by links to shared files.".format(len(links), len(uploads)))
+        return copies
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""The submission pipeline of the execution plugins.
+
+The execution plugins submit the ComputeUnits of a step with
+:func:`submit_units` and wait for them with
+:func:`radical.ensemblemd.exec_plugins.failure_policy.wait_units`. On the
+way to the unit manager, the descriptions pass through the features that
+the execution context enables, in this order:
+
+    1. descriptions that stage their input from the working directory of a
+       skipped unit are skipped as well (:mod:`.skipped_units`).
+    2. the route of each description is determined (:mod:`.routing`) and
+       files are exchanged through the staging area of the exchange pilot
+       (:mod:`.staging`).
+    3. the result cache materializes cached units from the cache
+       (:mod:`.result_cache`).
+    4. descriptions that reference sandboxes that were removed by the
+       sandbox retention are rejected (:mod:`.sandbox_gc`).
+    5. downloads in the pre_exec are replaced by links to the download
+       cache (:mod:`.download_cache`).
+    6. links to the working directories of earlier units are made through
+       the node-local cache (:mod:`.locality`).
+    7. uploads of shared files are replaced by links to the staging area
+       (:mod:`.staging`).
+    8. copies are made with reflinks (:mod:`.staging`).
+    9. staged files are packed into archives (:mod:`.archive_staging`).
+    10. downloads are deferred to the transfer manager (:mod:`.transfers`).
+    11. the descriptions are bundled (:mod:`.bundling`) and submitted in the
+        order of their packing plan (:mod:`.packing`).
+
+The steps return new descriptions instead of changing 'cuds', so that the
+failure policy can pass the same descriptions through the pipeline again
+when it resubmits failed units.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+from radical.ensemblemd.exec_plugins import bundling
+from radical.ensemblemd.exec_plugins.staging import reflink_copies
+
+# ------------------------------------------------------------------------------
+#
+def submit_units(resource, cuds):
+    """Submits 'cuds' to the unit manager of 'resource' and returns one unit
+       per description, in order.
+    """
+    skipped_units = getattr(resource, '_skipped_units', None)
+    if skipped_units is not None:
+        skipped = skipped_units.split(cuds)
+        if [unit for unit in skipped if unit is not None]:
+            remaining = [cud for cud, unit in zip(cuds, skipped) if unit is None]
+            if remaining:
+                submitted = submit_units(resource, remaining)
+            else:
+                submitted = list()
+            submitted.reverse()
+            return [unit if unit is not None else submitted.pop() for unit in skipped]
+
+    routes   = None
+    router   = getattr(resource, '_router', None)
+    exchange = getattr(resource, '_staging_exchange', None)
+    if router is not None:
+        routes = router.get_routes(cuds, exchange)
+    if exchange is not None:
+        cuds = [exchange.rewrite(cud) for cud in cuds]
+
+    cache = getattr(resource, '_result_cache', None)
+    if cache is not None:
+        cuds, keys = cache.prepare(resource._pilot, cuds)
+
+    sandbox_gc = getattr(resource, '_sandbox_gc', None)
+    if sandbox_gc is not None:
+        sandbox_gc.check(cuds)
+
+    download_cache = getattr(resource, '_download_cache', None)
+    if download_cache is not None:
+        cuds = download_cache.link_downloads(resource, cuds)
+
+    if getattr(resource, '_node_local_inputs', False):
+        cuds = [resource._producer_nodes.localize(cud) for cud in cuds]
+
+    shared_uploads = getattr(resource, '_shared_uploads', None)
+    if shared_uploads is not None:
+        cuds = shared_uploads.deduplicate(resource._pilots, cuds)
+
+    if getattr(resource, '_reflink_copies', False):
+        cuds = [reflink_copies(cud) for cud in cuds]
+
+    archives = getattr(resource, '_archive_staging', None)
+    if archives is not None:
+        inputs  = [archives.pack_inputs(cud) for cud in cuds]
+        packed  = [archives.pack_outputs(cud) for cud, archive in inputs]
+        cuds    = [cud for cud, outputs in packed]
+        outputs = [outputs for cud, outputs in packed]
+
+    transfers = getattr(resource, '_transfer_manager', None)
+    if transfers is not None:
+        deferred  = [transfers.defer_downloads(cud) for cud in cuds]
+        cuds      = [cud for cud, downloads in deferred]
+        downloads = [downloads for cud, downloads in deferred]
+
+    units = bundling.submit_units(resource, cuds, routes)
+
+    for index, unit in enumerate(units):
+        if archives is not None:
+            archives.add_unit(unit, inputs[index][1], outputs[index])
+        if transfers is not None:
+            transfers.add_downloads(unit, downloads[index])
+
+    if cache is not None:
+        cache.add_units(units, keys)
+    return units
+
+# ------------------------------------------------------------------------------
+#
+def submit_description(resource, cud, unit=None, resource_key=None):
+    """Submits the description 'cud' to the unit manager of 'resource'
+       without passing it through the pipeline, e.g., a speculative copy of
+       a unit, and returns its unit. Its files are exchanged through the
+       staging area of the exchange pilot. It is placed like a description
+       of the pipeline or, if 'unit' is given, on the resource of 'unit',
+       or, if 'resource_key' is given, on that resource.
+    """
+    router   = getattr(resource, '_router', None)
+    exchange = getattr(resource, '_staging_exchange', None)
+
+    route = None
+    if router is not None and unit is not None:
+        route = frozenset([resource._umgr.get_resource_key(unit.uid)])
+    elif router is not None and resource_key is not None:
+        route = frozenset([resource_key])
+    elif router is not None:
+        route = router.get_routes([cud], exchange)[0]
+    if exchange is not None:
+        cud = exchange.rewrite(cud)
+
+    if router is None:
+        return resource._umgr.submit_units(cud)
+    return resource._umgr.submit_units([cud], [route])[0]
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+
+"""Pooled file transfers for the execution plugins.
+
+By default, every ComputeUnit uploads its input files and downloads its
+output files through the staging of radical.pilot, one transfer after the
+other. If the execution context has ``transfer_workers`` set, the
+transfers of a step are batched and executed by a :class:`TransferManager`
+instead:
+
+    * the local input files of all units of a step are uploaded into the
+      staging areas of the pilots by a pool of parallel workers before the
+      units are submitted, and linked into the unit sandboxes (see
+      :class:`radical.ensemblemd.exec_plugins.staging.SharedUploads`).
+    * the downloads of the output files are removed from the output staging
+      of the units and performed by the pool once the units of the step
+      have finished.
+
+Each worker keeps its SAGA directory handles open across batches, so that
+the connections to the resource are reused. The manager logs the aggregate
+throughput of every batch.
+
+Downloads that nothing in the pattern depends on, i.e., the
+``background_download_output_data`` of the kernels, don't have to delay
+the step at all: :class:`BackgroundDownloads` copies them into the staging
+area of the pilot when the unit is done and downloads them with a
+client-side worker while the pattern continues.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import time
+import saga
+import Queue
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins.staging import STAGING_AREA, get_exchange_pilot, get_staging_area_url
+from radical.ensemblemd.exec_plugins.staging import _as_directive, _copy_description, _is_download
+
+UPLOAD   = "upload"
+DOWNLOAD = "download"
+
+# Background downloads are copied into this directory of the staging area.
+BACKGROUND_DIR = "enmd_background"
+
+# ------------------------------------------------------------------------------
+#
+def _local_url(path):
+    return "file://localhost{0}".format(os.path.abspath(path))
+
+# ------------------------------------------------------------------------------
+#
+class TransferManager(object):
+    """A TransferManager executes batches of file transfers with a pool of
+       'workers' parallel workers.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, workers=4):
+        if workers < 1:
+            raise EnsemblemdError(
+                msg="The number of transfer workers must be at least 1, got {0}.".format(workers))
+
+        self._workers  = workers
+        self._logger   = ru.get_logger('radical.enmd.transfers')
+        self._lock     = threading.Lock()
+
+        # Every worker keeps its open directories, by URL.
+        self._handles  = [dict() for _ in range(workers)]
+
+        # The deferred downloads of the submitted units, by id(unit).
+        self._pending  = dict()
+
+        self._files    = 0
+        self._bytes    = 0
+        self._seconds  = 0.0
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def workers(self):
+        """Returns the number of parallel workers.
+        """
+        return self._workers
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def throughput(self):
+        """Returns the aggregate throughput of all batches in MB/s.
+        """
+        if not self._seconds:
+            return 0.0
+        return self._bytes / (1024.0 * 1024.0) / self._seconds
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_directory(self, worker, url):
+        """Returns the open directory 'url' of 'worker'.
+        """
+        handles = self._handles[worker]
+        if str(url) not in handles:
+            handles[str(url)] = saga.filesystem.Directory(url, saga.filesystem.CREATE_PARENTS)
+        return handles[str(url)]
+
+    # --------------------------------------------------------------------------
+    #
+    def _transfer(self, worker, transfer):
+        """Executes 'transfer' and returns the number of bytes transferred.
+        """
+        kind, directory, remote, local = transfer
+        handle = self._get_directory(worker, directory)
+
+        if kind == UPLOAD:
+            handle.copy(_local_url(local), remote)
+        else:
+            target_dir = os.path.dirname(os.path.abspath(local))
+            if not os.path.isdir(target_dir):
+                os.makedirs(target_dir)
+            handle.copy(remote, _local_url(local))
+
+        return os.path.getsize(local)
+
+    # --------------------------------------------------------------------------
+    #
+    def run(self, transfers):
+        """Executes 'transfers', a list of (kind, directory URL, remote
+           path, local path) tuples, with the worker pool. Raises an
+           EnsemblemdError if a transfer fails.
+        """
+        if not transfers:
+            return
+
+        queue  = Queue.Queue()
+        errors = list()
+        sizes  = list()
+        for transfer in transfers:
+            queue.put(transfer)
+
+        def worker(index):
+            while True:
+                try:
+                    transfer = queue.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    sizes.append(self._transfer(index, transfer))
+                except Exception, ex:
+                    errors.append((transfer, ex))
+
+        start   = time.time()
+        threads = [threading.Thread(target=worker, args=(index,))
+                   for index in range(min(self._workers, len(transfers)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.time() - start
+
+        with self._lock:
+            self._files   += len(sizes)
+            self._bytes   += sum(sizes)
+            self._seconds += seconds
+
+        megabytes = sum(sizes) / (1024.0 * 1024.0)
+        self._logger.info("Transferred {0} file(s), {1:.1f} MB in {2:.1f}s ({3:.1f} MB/s) with {4} worker(s).".format(
+            len(sizes), megabytes, seconds, megabytes / max(seconds, 1e-6), len(threads)))
+
+        if errors:
+            for (kind, directory, remote, local), ex in errors:
+                self._logger.error("Failed to {0} {1} ({2}): {3}".format(kind, local, remote, ex))
+            raise EnsemblemdError(
+                msg="{0} of {1} file transfer(s) failed.".format(len(errors), len(transfers)))
+
+    # --------------------------------------------------------------------------
+    #
+    def upload(self, pilot, files, url=None):
+        """Uploads 'files', a list of (local path, name) tuples, into the
+           staging area of 'pilot', or into the directory 'url' on its
+           resource if it is given.
+        """
+        if url is None:
+            url = get_staging_area_url(pilot)
+        self.run([(UPLOAD, url, name, path) for path, name in files])
+
+    # --------------------------------------------------------------------------
+    #
+    def defer_downloads(self, cud):
+        """Returns a copy of 'cud' without the downloads in its output
+           staging, and the list of the removed download directives.
+        """
+        if not cud.output_staging:
+            return cud, []
+
+        output_staging = cud.output_staging
+        if not isinstance(output_staging, list):
+            output_staging = [output_staging]
+
+        downloads = list()
+        remaining = list()
+        for directive in output_staging:
+            if _is_download(_as_directive(directive)):
+                downloads.append(_as_directive(directive))
+            else:
+                remaining.append(directive)
+
+        if not downloads:
+            return cud, []
+
+        copy = _copy_description(cud)
+        copy.output_staging = remaining or None
+        return copy, downloads
+
+    # --------------------------------------------------------------------------
+    #
+    def add_downloads(self, unit, downloads):
+        """Records the deferred 'downloads' of 'unit'.
+        """
+        if downloads:
+            with self._lock:
+                self._pending[id(unit)] = (unit, downloads)
+
+    # --------------------------------------------------------------------------
+    #
+    def download_outputs(self, units):
+        """Performs the deferred downloads of the successful 'units'.
+           Deferred downloads of units that were replaced, e.g., by a retry,
+           are dropped.
+        """
+        transfers = list()
+        with self._lock:
+            for unit in units:
+                unit_id = id(unit)
+                if unit_id not in self._pending:
+                    continue
+                unit, downloads = self._pending.pop(unit_id)
+                if unit.state != radical.pilot.DONE:
+                    continue
+                sandbox = saga.Url(unit.working_directory)
+                for directive in downloads:
+                    target = directive['target']
+                    if target.startswith('file://'):
+                        target = saga.Url(target).path
+                    transfers.append((DOWNLOAD, sandbox, directive['source'], target))
+
+            for unit_id, (unit, downloads) in self._pending.items():
+                if unit.state in [radical.pilot.FAILED, radical.pilot.CANCELED]:
+                    del self._pending[unit_id]
+
+        self.run(transfers)
+
+    # --------------------------------------------------------------------------
+    #
+    def close(self):
+        """Closes the open directories of the workers.
+        """
+        for handles in self._handles:
+            for handle in handles.values():
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+            handles.clear()
+
+        self._logger.info("Transferred {0} file(s), {1:.1f} MB in total ({2:.1f} MB/s).".format(
+            self._files, self._bytes / (1024.0 * 1024.0), self.throughput))
+
+# ------------------------------------------------------------------------------
+#
+class BackgroundDownloads(object):
+    """BackgroundDownloads downloads the output files of ComputeUnits from
+       the staging areas of the pilots with a worker thread, while the
+       pattern continues.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self):
+        self._logger  = ru.get_logger('radical.enmd.transfers')
+        self._lock    = threading.Lock()
+        self._queue   = Queue.Queue()
+        self._thread  = None
+        self._count   = 0
+        self._handles = dict()   # URL -> open staging area of the worker
+        self._failed  = list()   # local targets of the failed downloads
+
+        # The staged downloads of the descriptions that add_directives
+        # returned, by id(cud).
+        self._records = dict()
+
+    # --------------------------------------------------------------------------
+    #
+    def add_directives(self, cud, directives):
+        """Returns a copy of 'cud' with output staging directives that copy
+           the files of the download 'directives' into the staging area when
+           the unit is done. The copy must be submitted and waited for
+           instead of 'cud'.
+        """
+        records = list()
+        with self._lock:
+            for directive in directives:
+                self._count += 1
+                name = os.path.join(BACKGROUND_DIR, "{0}_{1}".format(
+                    self._count, os.path.basename(os.path.normpath(directive['target']))))
+                records.append((name, directive['target']))
+
+        output_staging = [{'source': directive['source'],
+                           'target': os.path.join(STAGING_AREA, name),
+                           'action': radical.pilot.COPY}
+                          for directive, (name, target) in zip(directives, records)]
+        copy = _copy_description(cud)
+        copy.output_staging = list(cud.output_staging or []) + output_staging
+
+        with self._lock:
+            self._records[id(copy)] = records
+        return copy
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_pilot(self, resource, unit):
+        """Returns the pilot 'unit' was executed on.
+        """
+        pilot_id = getattr(unit, 'pilot_id', None)
+        for pilot in resource._pilots:
+            if pilot.uid == pilot_id:
+                return pilot
+        return get_exchange_pilot(resource)
+
+    # --------------------------------------------------------------------------
+    #
+    def enqueue(self, resource, units, cuds):
+        """Starts the background downloads of the successful 'units', which
+           were submitted from the descriptions 'cuds'.
+        """
+        for unit, cud in zip(units, cuds):
+            with self._lock:
+                records = self._records.pop(id(cud), None)
+            if not records or unit.state != radical.pilot.DONE:
+                continue
+
+            staging_area = get_staging_area_url(self._get_pilot(resource, unit))
+            for name, target in records:
+                self._queue.put((staging_area, name, target))
+
+        with self._lock:
+            if self._thread is None and not self._queue.empty():
+                self._thread = threading.Thread(target=self._run, name="background-downloads")
+                self._thread.daemon = True
+                self._thread.start()
+
+    # --------------------------------------------------------------------------
+    #
+    def _run(self):
+        """The worker thread.
+        """
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                staging_area, name, target = item
+                if target.startswith('file://'):
+                    target = saga.Url(target).path
+                target_dir = os.path.dirname(os.path.abspath(target))
+                if not os.path.isdir(target_dir):
+                    os.makedirs(target_dir)
+
+                if str(staging_area) not in self._handles:
+                    self._handles[str(staging_area)] = saga.filesystem.Directory(staging_area)
+                handle = self._handles[str(staging_area)]
+                handle.copy(name, _local_url(target))
+                handle.remove(name)
+                self._logger.debug("Downloaded {0} in the background.".format(target))
+            except Exception, ex:
+                self._logger.error("Background download of {0} failed: {1}".format(item, ex))
+                self._failed.append(item)
+            finally:
+                self._queue.task_done()
+
+    # --------------------------------------------------------------------------
+    #
+    def close(self):
+        """Waits for the pending downloads and stops the worker. Returns the
+           number of downloads that failed.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._queue.join()
+            self._thread.join()
+            self._thread = None
+
+        for handle in self._handles.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._handles.clear()
+
+        return len(self._failed)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+"""Incremental staging of the shared uploads.
+
+The shared uploads (see
+:class:`radical.ensemblemd.exec_plugins.staging.SharedUploads`) are named
+by the path, size and modification time of the local files and staged into
+the staging area of every pilot, which is created anew for every pilot. If
+the execution context has ``incremental_staging`` set to a directory on the
+resource, the shared uploads are named by the SHA-1 hash of their content
+instead, uploaded into that directory and linked from there. The directory
+keeps a manifest of the files that were uploaded into it completely::
+
+    <directory>/enmd_manifest.json
+        {"<name>": {"sha1": "<hash>", "size": <bytes>}, ...}
+
+Before files are uploaded, the manifest is read and the files whose content
+hash is listed, and that are still present, are skipped. Only new or
+changed files are transferred, and the manifest is updated once they are.
+As the directory doesn't belong to a pilot, pilots that are added or that
+replace failed pilots, later allocations and re-runs of a pattern only
+upload what changed.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import json
+import saga
+import shutil
+import hashlib
+import tempfile
+import threading
+import radical.utils as ru
+
+from radical.ensemblemd.exec_plugins.staging import SHARED_UPLOAD_PREFIX
+from radical.ensemblemd.exec_plugins.transfers import _local_url
+
+# The name of the manifest in the upload directory.
+MANIFEST = "enmd_manifest.json"
+
+# ------------------------------------------------------------------------------
+#
+def hash_file(path, block_size=1024*1024):
+    """Returns the SHA-1 hash of the content of the file 'path'.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            sha1.update(block)
+    return sha1.hexdigest()
+
+# ------------------------------------------------------------------------------
+#
+class UploadManifest(object):
+    """UploadManifest names the shared uploads by their content hash and
+       keeps track of the manifests of the upload directory 'path' on the
+       resources of the pilots.
+    """
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self, path):
+        self._path      = path
+        self._logger    = ru.get_logger('radical.enmd.upload_manifest')
+        self._lock      = threading.Lock()
+        self._hashes    = dict()   # (path, size, mtime) -> content hash
+        self._manifests = dict()   # URL of an upload directory -> its manifest
+
+    # --------------------------------------------------------------------------
+    #
+    @property
+    def path(self):
+        """Returns the path of the upload directory on the resource.
+        """
+        return self._path
+
+    # --------------------------------------------------------------------------
+    #
+    def get_url(self, pilot):
+        """Returns the URL of the upload directory on the resource of 'pilot'
+           as a saga.Url.
+        """
+        url = saga.Url(pilot.sandbox)
+        url.path = self._path
+        return url
+
+    # --------------------------------------------------------------------------
+    #
+    def get_source(self, name):
+        """Returns the path on the resource that the shared file 'name' is
+           linked from.
+        """
+        return os.path.join(self._path, name)
+
+    # --------------------------------------------------------------------------
+    #
+    def get_hash(self, path):
+        """Returns the content hash of the local file 'path'. Every version
+           of a file is hashed only once.
+        """
+        stat = os.stat(path)
+        key  = (path, stat.st_size, stat.st_mtime)
+        with self._lock:
+            if key in self._hashes:
+                return self._hashes[key]
+        digest = hash_file(path)
+        with self._lock:
+            self._hashes[key] = digest
+        return digest
+
+    # --------------------------------------------------------------------------
+    #
+    def get_name(self, path):
+        """Returns the name of the local file 'path' in the upload directory.
+        """
+        return "{0}_{1}_{2}".format(SHARED_UPLOAD_PREFIX, self.get_hash(path)[:16], os.path.basename(path))
+
+    # --------------------------------------------------------------------------
+    #
+    def _read(self, pilot):
+        """Returns the manifest of the upload directory on the resource of
+           'pilot', restricted to the files that are present. An empty
+           manifest is returned if it doesn't exist or can't be read.
+        """
+        url = self.get_url(pilot)
+
+        tmp_dir = tempfile.mkdtemp(prefix='enmd_manifest_')
+        try:
+            upload_dir = saga.filesystem.Directory(url)
+            try:
+                present = set([os.path.basename(str(entry.path).rstrip('/')) for entry in upload_dir.list()])
+                upload_dir.copy(MANIFEST, _local_url(os.path.join(tmp_dir, MANIFEST)))
+            finally:
+                upload_dir.close()
+            with open(os.path.join(tmp_dir, MANIFEST), 'r') as f:
+                manifest = json.load(f)
+        except Exception, ex:
+            self._logger.debug("Can't read manifest of {0}: {1}".format(url, ex))
+            return dict()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return dict([(name, entry) for name, entry in manifest.items() if name in present])
+
+    # --------------------------------------------------------------------------
+    #
+    def _write(self, pilot, manifest):
+        """Writes 'manifest' into the upload directory on the resource of
+           'pilot'.
+        """
+        url = self.get_url(pilot)
+
+        tmp_dir = tempfile.mkdtemp(prefix='enmd_manifest_')
+        try:
+            with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            upload_dir = saga.filesystem.Directory(url, saga.filesystem.CREATE_PARENTS)
+            try:
+                upload_dir.copy(_local_url(os.path.join(tmp_dir, MANIFEST)), MANIFEST)
+            finally:
+                upload_dir.close()
+        except Exception, ex:
+            self._logger.warning("Can't write manifest into {0}: {1}".format(url, ex))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # --------------------------------------------------------------------------
+    #
+    def upload(self, pilot, files, transfer_manager=None):
+        """Uploads 'files', a list of (local path, name) tuples, into the
+           upload directory on the resource of 'pilot', with the worker pool
+           of 'transfer_manager' if it is given.
+        """
+        url = self.get_url(pilot)
+        if transfer_manager is not None:
+            transfer_manager.upload(pilot, files, url)
+            return
+
+        upload_dir = saga.filesystem.Directory(url, saga.filesystem.CREATE_PARENTS)
+        try:
+            for path, name in files:
+                upload_dir.copy(_local_url(path), name)
+        finally:
+            upload_dir.close()
+
+    # --------------------------------------------------------------------------
+    #
+    def get_staged(self, pilot, names):
+        """Returns the subset of 'names' that are listed in the manifest of
+           the upload directory on the resource of 'pilot'. The manifest is
+           read once per resource.
+        """
+        key = str(self.get_url(pilot))
+        with self._lock:
+            manifest = self._manifests.get(key)
+        if manifest is None:
+            manifest = self._read(pilot)
+            with self._lock:
+                manifest = self._manifests.setdefault(key, manifest)
+        return set([name for name in names if name in manifest])
+
+    # --------------------------------------------------------------------------
+    #
+    def add(self, pilot, files):
+        """Adds 'files', a list of (local path, name) tuples that were
+           uploaded completely, to the manifest of the upload directory on
+           the resource of 'pilot'.
+        """
+        self.get_staged(pilot, [])
+        entries = dict([(name, {'sha1': self.get_hash(path), 'size': os.path.getsize(path)})
+                        for path, name in files])
+        with self._lock:
+            manifest = self._manifests.setdefault(str(self.get_url(pilot)), dict())
+            manifest.update(entries)
+            manifest = dict(manifest)
+        self._write(pilot, manifest)
@@ -10,6 +10,10 @@ __license__   = "MIT"
 from radical.ensemblemd.engine import Engine
 from radical.ensemblemd.exceptions import TypeError
 
+# The pre_exec commands that download the download_input_data of a kernel.
+CURL_DOWNLOAD        = "curl --insecure -O {0}"
+CURL_DOWNLOAD_RENAME = "curl --insecure -L {0} -o {1}"
+
 
 # ------------------------------------------------------------------------------
 #
@@ -58,9 +62,9 @@ class Kernel(object):
                 dl = download.split(">")
                 if len(dl) == 1:
                     # no rename
-                     cmd = "curl --insecure -O {0}".format(dl[0].strip())
+                     cmd = CURL_DOWNLOAD.format(dl[0].strip())
                 elif len(dl) == 2:
-                     cmd = "curl --insecure -L {0} -o {1}".format(dl[0].strip(), dl[1].strip())
+                     cmd = CURL_DOWNLOAD_RENAME.format(dl[0].strip(), dl[1].strip())
                 else:
                     # error
                     raise Exception("Invalid transfer directive %s" % download)
@@ -201,6 +205,26 @@ class Kernel(object):
         # Call the validate_args() method of the plug-in.
         self._kernel._cores = cores
 
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def max_runtime(self):
+        """The maximum number of seconds the kernel may execute. A
+           ComputeUnit that runs for longer is canceled and handled by the
+           failure policy of the execution context. None means no limit.
+        """
+        return self._kernel._max_runtime
+
+    @max_runtime.setter
+    def max_runtime(self, max_runtime):
+
+        if max_runtime is not None and type(max_runtime) not in [int, float]:
+            raise TypeError(
+                expected_type=int,
+                actual_type=type(max_runtime))
+
+        self._kernel._max_runtime = max_runtime
+
     #---------------------------------------------------------------------------
     #
     @property
@@ -322,6 +346,39 @@ class Kernel(object):
 
         self._kernel._download_output_data = data_directives
 
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def background_download_output_data(self):
+        """Instructs the application to download one or more files or
+           directories from the kernel's execution directory back to the
+           host the script is running on, without waiting for them. The
+           files are moved to the pilot staging area when the kernel is
+           done and downloaded in the background while the pattern
+           continues. :meth:`deallocate` waits for the downloads to finish.
+
+           Example::
+
+                k = Kernel(name="misc.ccount")
+                k.arguments = ["--inputfile=input.txt", "--outputfile=output.txt"]
+                k.background_download_output_data = ["output.txt > output-run-1.txt"]
+        """
+        return self._kernel._background_download_output_data
+
+    @background_download_output_data.setter
+    def background_download_output_data(self, data_directives):
+
+        if type(data_directives) != list:
+            data_directives = [data_directives]
+
+        for dd in data_directives:
+            if type(dd) != str:
+                raise TypeError(
+                    expected_type=str,
+                    actual_type=type(dd))
+
+        self._kernel._background_download_output_data = data_directives
+
     #---------------------------------------------------------------------------
     #
     @property
@@ -354,6 +411,41 @@ class Kernel(object):
 
         self._kernel._copy_input_data = data_directives
 
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def read_only_input_data(self):
+        """Declares inputs that the kernel doesn't modify. Files in
+           :attr:`copy_input_data` with one of these target names are linked
+           into the kernel's execution directory instead of copied. If set
+           to True, all of them are linked.
+
+           Example::
+
+                k = Kernel(name="md.amber")
+                k.copy_input_data = ["$PRE_LOOP/md.crd", "$PRE_LOOP/min.inf"]
+                k.read_only_input_data = ["md.crd"]
+        """
+        return self._kernel._read_only_input_data
+
+    @read_only_input_data.setter
+    def read_only_input_data(self, read_only):
+
+        if read_only is True or read_only is False or read_only is None:
+            self._kernel._read_only_input_data = read_only
+            return
+
+        if type(read_only) != list:
+            read_only = [read_only]
+
+        for name in read_only:
+            if type(name) != str:
+                raise TypeError(
+                    expected_type=str,
+                    actual_type=type(name))
+
+        self._kernel._read_only_input_data = read_only
+
     #---------------------------------------------------------------------------
     #
     @property
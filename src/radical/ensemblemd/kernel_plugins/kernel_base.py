@@ -7,6 +7,7 @@ __author__    = "Ole Weider <ole.weidner@rutgers.edu>"
 __copyright__ = "Copyright 2014, http://radical.rutgers.edu"
 __license__   = "MIT"
 
+import ast
 from copy import deepcopy
 import radical.utils.logger  as rul
 
@@ -16,6 +17,21 @@ from radical.ensemblemd.exceptions import ArgumentError
 from radical.ensemblemd.exceptions import NotImplementedError
 
 
+# ------------------------------------------------------------------------------
+#
+def get_file_list(arg):
+    """Returns the file names of the kernel argument value 'arg', which can
+       either be a single file name or a list literal.
+    """
+    try:
+        value = ast.literal_eval(arg)
+    except (ValueError, SyntaxError):
+        return [arg]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [arg]
+
+
 # ------------------------------------------------------------------------------
 # plugin base class
 #
@@ -43,6 +59,7 @@ class KernelBase(object):
         self._arguments              = None
         self._uses_mpi               = None
         self._cores                  = 1
+        self._max_runtime            = None
 
 
         self._upload_input_data      = None
@@ -51,8 +68,10 @@ class KernelBase(object):
 
         self._download_input_data    = None
         self._download_output_data   = None
+        self._background_download_output_data = None
 
         self._copy_input_data        = None
+        self._read_only_input_data   = None
         self._copy_output_data       = None
 
 
@@ -23,6 +23,11 @@ _KERNEL_INFO = {
                             "mandatory": True,
                             "description": "Config filename"
                         },
+                    "--coords=":
+                        {
+                            "mandatory": False,
+                            "description": "Format of the coordinates passed between the analysis kernels: 'gro' (default) or 'npy'"
+                        },
                     },
     "machine_configs":
     {
@@ -105,8 +110,15 @@ class Kernel(KernelBase):
         cfg = _KERNEL_INFO["machine_configs"][resource_key]
 
         arguments = ['-f','{0}'.format(self.get_arg("--config=")),'-c','tmpha.gro','-n','out.nn','-w','weight.w']
+        executable = cfg["executable"]
+
+        # The lsdmap reader only reads text formats, binary coordinates are
+        # read by the lsdm.py driver, which has to be staged with coords.py.
+        if self.get_arg("--coords=") == "npy":
+            arguments = ['lsdm.py','-f','{0}'.format(self.get_arg("--config=")),'-c','tmpha.npy','-n','out.nn','-w','weight.w']
+            executable = ["python"]
 
-        self._executable  = cfg["executable"]
+        self._executable  = executable
         self._arguments   = arguments
         self._environment = cfg["environment"]
         self._uses_mpi    = cfg["uses_mpi"]
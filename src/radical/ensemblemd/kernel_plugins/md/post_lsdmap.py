@@ -47,6 +47,11 @@ _KERNEL_INFO = {
                         {
                             "mandatory": True,
                             "description": "No. of CUs"
+                        },
+                    "--coords=":
+                        {
+                            "mandatory": False,
+                            "description": "Format of the coordinates passed between the analysis kernels: 'gro' (default) or 'npy'"
                         }
                     },
     "machine_configs":
@@ -128,7 +133,9 @@ class Kernel(KernelBase):
 
         cfg = _KERNEL_INFO["machine_configs"][resource_key]
 
-        arguments = ['post_analyze.py','{0}'.format(self.get_arg("--num_runs=")),'tmpha.ev','ncopies.nc','tmp.gro'
+        coords_format = self.get_arg("--coords=") or "gro"
+
+        arguments = ['post_analyze.py','{0}'.format(self.get_arg("--num_runs=")),'tmpha.ev','ncopies.nc','tmp.{0}'.format(coords_format)
                      ,'out.nn','weight.w','{0}'.format(self.get_arg("--out="))
                      ,'{0}'.format(self.get_arg("--max_alive_neighbors=")),'{0}'.format(self.get_arg("--max_dead_neighbors="))
                      ,'input.gro','{0}'.format(self.get_arg("--cycle=")),'{0}'.format(self.get_arg('--numCUs='))
@@ -22,6 +22,11 @@ _KERNEL_INFO = {
                         {
                             "mandatory": True,
                             "description": "No. of CUs"
+                        },
+                    "--coords=":
+                        {
+                            "mandatory": False,
+                            "description": "Format of the coordinates passed between the analysis kernels: 'gro' (default) or 'npy'"
                         }
                     },
     "machine_configs":
@@ -106,7 +111,9 @@ class Kernel(KernelBase):
 
         cfg = _KERNEL_INFO["machine_configs"][resource_key]
 
-        arguments = ['pre_analyze.py','{0}'.format(self.get_arg("--numCUs=")),'tmp.gro','.'] 
+        coords_format = self.get_arg("--coords=") or "gro"
+
+        arguments = ['pre_analyze.py','{0}'.format(self.get_arg("--numCUs=")),'tmp.{0}'.format(coords_format),'.']
 
         self._executable  = cfg["executable"]
         self._arguments   = arguments
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""A kernel that runs a user-defined comparison function over all pairs of
+   two element windows, using all cores assigned to the kernel.
+"""
+
+__author__    = "Ioannis Paraskevakos <i.paraskev@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+from radical.ensemblemd.exceptions import ArgumentError
+from radical.ensemblemd.exceptions import NoKernelConfigurationError
+from radical.ensemblemd.kernel_plugins.kernel_base import KernelBase, get_file_list
+from radical.ensemblemd.kernel_plugins.scripts import get_upload_directive
+
+# ------------------------------------------------------------------------------
+#
+_KERNEL_INFO = {
+    "name":         "misc.comparison_runner",
+    "description":  "Compares all pairs of two element windows in parallel on the kernel's cores.",
+    "arguments":   {"--comparator=":
+                        {
+                        "mandatory": True,
+                        "description": "The comparison function as <file.py>:<function>. The file must be staged into the kernel's sandbox."
+                        },
+                    "--inputfile1=":
+                        {
+                        "mandatory": True,
+                        "description": "The element file or list of element files of the first window."
+                        },
+                    "--inputfile2=":
+                        {
+                        "mandatory": True,
+                        "description": "The element file or list of element files of the second window."
+                        },
+                    "--outputfile=":
+                        {
+                        "mandatory": True,
+                        "description": "The output file containing the comparison results."
+                        },
+                    "--pool=":
+                        {
+                        "mandatory": False,
+                        "description": "Run the comparisons in a 'process' (default) or 'thread' pool."
+                        },
+                    "--pairs=":
+                        {
+                        "mandatory": False,
+                        "description": "Compare 'full' (default) the full pair matrix or, if both windows are identical, only its 'triangle' of pairs i < j."
+                        }
+                    },
+    "machine_configs":
+    {
+        "*": {
+            "environment"   : None,
+            "pre_exec"      : [],
+            "executable"    : "python",
+            "uses_mpi"      : False
+        },
+        "xsede.stampede": {
+            "environment"   : None,
+            "pre_exec"      : ["module load python"],
+            "executable"    : "python",
+            "uses_mpi"      : False
+        }
+    }
+}
+
+# The helper scripts the kernel stages into its sandbox.
+_SCRIPTS = ["compare_runner.py", "trajcache.py"]
+
+
+# ------------------------------------------------------------------------------
+#
+class Kernel(KernelBase):
+
+    # --------------------------------------------------------------------------
+    #
+    def __init__(self):
+        """Le constructor.
+        """
+        super(Kernel, self).__init__(_KERNEL_INFO)
+
+    # --------------------------------------------------------------------------
+    #
+    @staticmethod
+    def get_name():
+        return _KERNEL_INFO["name"]
+
+    # --------------------------------------------------------------------------
+    #
+    def _bind_to_resource(self, resource_key):
+        """(PRIVATE) Implements parent class method.
+        """
+        if resource_key not in _KERNEL_INFO["machine_configs"]:
+            if "*" in _KERNEL_INFO["machine_configs"]:
+                # Fall-back to generic resource key
+                resource_key = "*"
+            else:
+                raise NoKernelConfigurationError(kernel_name=_KERNEL_INFO["name"], resource_key=resource_key)
+
+        cfg = _KERNEL_INFO["machine_configs"][resource_key]
+
+        pool = self.get_arg("--pool=")
+        if pool is None:
+            pool = "process"
+        elif pool not in ["process", "thread"]:
+            raise ArgumentError(
+                kernel_name=_KERNEL_INFO["name"],
+                message="Invalid pool type '{0}'".format(pool),
+                valid_arguments_set=["process", "thread"])
+
+        pairs = self.get_arg("--pairs=")
+        if pairs is None:
+            pairs = "full"
+        elif pairs not in ["full", "triangle"]:
+            raise ArgumentError(
+                kernel_name=_KERNEL_INFO["name"],
+                message="Invalid pair mode '{0}'".format(pairs),
+                valid_arguments_set=["full", "triangle"])
+
+        arguments  = ["compare_runner.py",
+                      "--comparator={0}".format(self.get_arg("--comparator=")),
+                      "--cores={0}".format(self._cores),
+                      "--pool={0}".format(pool),
+                      "--pairs={0}".format(pairs),
+                      "--element_set1"]
+        arguments.extend(get_file_list(self.get_arg("--inputfile1=")))
+        arguments.append("--element_set2")
+        arguments.extend(get_file_list(self.get_arg("--inputfile2=")))
+        arguments.extend(["--output_file", self.get_arg("--outputfile=")])
+
+        # Stage the runner and the trajectory cache along with the user's
+        # own input data.
+        upload = list(self._upload_input_data or [])
+        for script in _SCRIPTS:
+            directive = get_upload_directive(script)
+            if directive not in upload:
+                upload.append(directive)
+
+        self._executable        = cfg["executable"]
+        self._arguments         = arguments
+        self._environment       = cfg["environment"]
+        self._uses_mpi          = cfg["uses_mpi"]
+        self._pre_exec          = cfg["pre_exec"]
+        self._upload_input_data = upload
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
-"""A kernel that creates a new ASCII file with a given size and name.
+"""A kernel that calculates the Levenshtein distance between the contents
+   of pairs of files.
 """
 
 __author__    = "Ole Weider <ole.weidner@rutgers.edu>"
@@ -11,27 +12,38 @@ from copy import deepcopy
 
 from radical.ensemblemd.exceptions import ArgumentError
 from radical.ensemblemd.exceptions import NoKernelConfigurationError
-from radical.ensemblemd.kernel_plugins.kernel_base import KernelBase
+from radical.ensemblemd.kernel_plugins.kernel_base import KernelBase, get_file_list
+from radical.ensemblemd.kernel_plugins.scripts import get_upload_directive
 
 # ------------------------------------------------------------------------------
 # 
 _KERNEL_INFO = {
     "name":         "misc.levenshtein",
-    "description":  "Calculates the Levenshtein distance between to strings.",
+    "description":  "Calculates the Levenshtein distance between the contents of pairs of files.",
     "arguments":   {"--inputfile1=":     
                         {
                         "mandatory": True,
-                        "description": "The fist input file."
+                        "description": "The first input file or list of input files."
                         },
                     "--inputfile2=":     
                         {
                         "mandatory": True,
-                        "description": "The second input file."
+                        "description": "The second input file or list of input files."
                         },
                     "--outputfile=":     
                         {
                         "mandatory": True,
-                        "description": "The output file containing the distance value."
+                        "description": "The output file containing the distance value(s)."
+                        },
+                    "--max_distance=":
+                        {
+                        "mandatory": False,
+                        "description": "Distances larger than this value are reported as max_distance+1."
+                        },
+                    "--pairs=":
+                        {
+                        "mandatory": False,
+                        "description": "Compare 'full' (default) the full pair matrix or, if both input lists are identical, only its 'triangle' of pairs i < j."
                         }
                     },
     "machine_configs": 
@@ -39,12 +51,15 @@ _KERNEL_INFO = {
         "*": {
             "environment"   : None,
             "pre_exec"      : [],
-            "executable"    : "/bin/bash",
+            "executable"    : "python",
             "uses_mpi"      : False
         }
     }
 }
 
+# The comparator script the kernel stages into its sandbox.
+_SCRIPT = "levenshtein.py"
+
 
 # ------------------------------------------------------------------------------
 # 
@@ -77,14 +92,35 @@ class Kernel(KernelBase):
 
         cfg = _KERNEL_INFO["machine_configs"][resource_key]
 
-        arguments  = ['-l', '-c', 'python levenshtein.py {0} {1} > {2}'.format(
-            self.get_arg("--inputfile1="),
-            self.get_arg("--inputfile2="),
-            self.get_arg("--outputfile="))
-        ]
-
-        self._executable  = cfg["executable"] 
-        self._arguments   = arguments
-        self._environment = cfg["environment"]
-        self._uses_mpi    = cfg["uses_mpi"]
-        self._pre_exec    = cfg["pre_exec"] 
+        pairs = self.get_arg("--pairs=")
+        if pairs is None:
+            pairs = "full"
+        elif pairs not in ["full", "triangle"]:
+            raise ArgumentError(
+                kernel_name=_KERNEL_INFO["name"],
+                message="Invalid pair mode '{0}'".format(pairs),
+                valid_arguments_set=["full", "triangle"])
+
+        # All pairs of the two input lists are compared by a single
+        # invocation of the comparator script.
+        arguments  = [_SCRIPT]
+        if self.get_arg("--max_distance=") is not None:
+            arguments.append("--max_distance={0}".format(self.get_arg("--max_distance=")))
+        arguments.append("--pairs={0}".format(pairs))
+        arguments.append("--element_set1")
+        arguments.extend(get_file_list(self.get_arg("--inputfile1=")))
+        arguments.append("--element_set2")
+        arguments.extend(get_file_list(self.get_arg("--inputfile2=")))
+        arguments.extend(["--output_file", self.get_arg("--outputfile=")])
+
+        upload = list(self._upload_input_data or [])
+        directive = get_upload_directive(_SCRIPT)
+        if directive not in upload:
+            upload.append(directive)
+
+        self._executable        = cfg["executable"]
+        self._arguments         = arguments
+        self._environment       = cfg["environment"]
+        self._uses_mpi          = cfg["uses_mpi"]
+        self._pre_exec          = cfg["pre_exec"]
+        self._upload_input_data = upload
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+"""Standalone helper scripts that kernels stage into the sandbox of their
+   ComputeUnits. The scripts in this package must not depend on
+   radical.ensemblemd, since they are executed on the target resource.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+
+# ------------------------------------------------------------------------------
+#
+def get_script_path(name):
+    """Returns the absolute local path of the helper script 'name'.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+# ------------------------------------------------------------------------------
+#
+def get_upload_directive(name):
+    """Returns an upload_input_data directive that stages the helper script
+       'name' into the sandbox of a ComputeUnit.
+    """
+    return "{0} > {1}".format(get_script_path(name), name)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+"""Runs a bundle of tasks inside a single ComputeUnit.
+
+The tasks are passed as a base64-encoded, zlib-compressed JSON list. Each
+task is a dictionary with the keys ``workdir``, ``pre_exec``,
+``executable``, ``arguments``, ``post_exec``, ``environment`` and
+``cores``. Task ``k`` runs in its own subdirectory with its stdout and
+stderr in the files STDOUT and STDERR. The tasks are started in order as
+soon as enough of the ``--cores`` cores of the CU are free::
+
+    python bundle_executor.py --cores=4 --tasks=<encoded tasks>
+
+When all tasks have finished, a single status line with the exit codes of
+all tasks in order is written to stdout::
+
+    BUNDLE_STATUS: 0,0,1,0
+
+The exit code of the executor is 0 once the status line is written, even
+if tasks failed, so that the failure of a task doesn't fail the whole CU.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import sys
+import json
+import time
+import zlib
+import base64
+import errno
+import pipes
+import argparse
+import subprocess
+
+STATUS_PREFIX = "BUNDLE_STATUS: "
+
+# Seconds between two checks for finished tasks.
+POLL_INTERVAL = 0.05
+
+# ------------------------------------------------------------------------------
+#
+def encode_tasks(tasks):
+    """Encodes a list of task dictionaries for the --tasks argument.
+    """
+    return base64.b64encode(zlib.compress(json.dumps(tasks).encode('utf-8'))).decode('ascii')
+
+# ------------------------------------------------------------------------------
+#
+def decode_tasks(encoded):
+    """Decodes the --tasks argument into a list of task dictionaries.
+    """
+    return json.loads(zlib.decompress(base64.b64decode(encoded)).decode('utf-8'))
+
+# ------------------------------------------------------------------------------
+#
+def parse_status(stdout):
+    """Returns the list of task exit codes from the stdout of a bundle or
+       None if the bundle didn't report any.
+    """
+    for line in (stdout or "").splitlines():
+        if line.startswith(STATUS_PREFIX):
+            codes = line[len(STATUS_PREFIX):].strip()
+            if not codes:
+                return []
+            return [int(code) for code in codes.split(",")]
+    return None
+
+# ------------------------------------------------------------------------------
+#
+def get_command(task):
+    """Returns the shell command that runs 'task'.
+    """
+    executable = [task["executable"]] + [str(arg) for arg in (task.get("arguments") or [])]
+    commands = list(task.get("pre_exec") or [])
+    commands.append(" ".join([pipes.quote(arg) for arg in executable]))
+    commands.extend(task.get("post_exec") or [])
+    return " && ".join(commands)
+
+# ------------------------------------------------------------------------------
+#
+def start(task):
+    """Starts 'task' in its working directory and returns the process.
+    """
+    workdir = task["workdir"]
+    try:
+        os.makedirs(workdir)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+
+    env = dict(os.environ)
+    env.update(task.get("environment") or {})
+
+    stdout = open(os.path.join(workdir, "STDOUT"), "w")
+    stderr = open(os.path.join(workdir, "STDERR"), "w")
+    try:
+        return subprocess.Popen(["/bin/bash", "-c", get_command(task)],
+            cwd=workdir, env=env, stdout=stdout, stderr=stderr)
+    finally:
+        stdout.close()
+        stderr.close()
+
+# ------------------------------------------------------------------------------
+#
+def run(tasks, cores):
+    """Runs 'tasks' on 'cores' cores and returns their exit codes in order.
+    """
+    exit_codes = [None] * len(tasks)
+    running    = dict()
+    free_cores = cores
+    next_task  = 0
+
+    while next_task < len(tasks) or running:
+
+        # Tasks are started in order. A task that needs more cores than the
+        # CU has runs alone.
+        while next_task < len(tasks):
+            task_cores = min(int(tasks[next_task].get("cores") or 1), cores)
+            if task_cores > free_cores:
+                break
+            try:
+                running[next_task] = (start(tasks[next_task]), task_cores)
+                free_cores -= task_cores
+            except (IOError, OSError) as ex:
+                sys.stderr.write("Task {0} failed to start: {1}\n".format(next_task, ex))
+                exit_codes[next_task] = 127
+            next_task += 1
+
+        for index, (process, task_cores) in list(running.items()):
+            if process.poll() is not None:
+                exit_codes[index] = process.returncode
+                free_cores += task_cores
+                del running[index]
+
+        if running:
+            time.sleep(POLL_INTERVAL)
+
+    return exit_codes
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cores", type=int, default=1,
+        help="The number of cores of the CU")
+    parser.add_argument("--tasks", required=True,
+        help="The encoded list of tasks")
+    args = parser.parse_args()
+
+    tasks = decode_tasks(args.tasks)
+    exit_codes = run(tasks, max(1, args.cores))
+
+    for index, exit_code in enumerate(exit_codes):
+        if exit_code != 0:
+            sys.stderr.write("Task {0} in {1} failed with exit code {2}.\n".format(
+                index, tasks[index]["workdir"], exit_code))
+
+    sys.stdout.write("{0}{1}\n".format(STATUS_PREFIX, ",".join([str(code) for code in exit_codes])))
+    sys.exit(0)
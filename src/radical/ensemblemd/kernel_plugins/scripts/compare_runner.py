@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""Runs a user-defined comparison function over all pairs of an AllPairs
+window and spreads the pairs over the cores of the ComputeUnit.
+
+The comparator is given as ``<file.py>:<function>``. The function is called
+with the two loaded elements of a pair and must return a value that can be
+formatted as a string. The elements are loaded once per CU (through
+trajcache.py, if available) and are shared by all workers::
+
+    python compare_runner.py --comparator=hausdorff_kernel.py:dH --cores=4 \\
+        --element_set1 a.npy b.npy --element_set2 c.npy d.npy \\
+        --output_file comparison.dat
+
+The full pair matrix is compared by default, including the diagonal if both
+element sets are identical. With ``--pairs=triangle``, only the upper
+triangle of the pair matrix (i < j) of identical element sets is compared.
+"""
+
+__author__    = "Ioannis Paraskevakos <i.paraskev@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import sys
+import imp
+import argparse
+import multiprocessing
+import multiprocessing.pool
+
+try:
+    from trajcache import load_all
+except ImportError:
+    def load_all(paths):
+        import numpy as np
+        return [np.load(path) for path in paths]
+
+# Module-level state shared with the workers. Worker processes are forked
+# after these are set, so the loaded elements are never pickled or copied.
+_comparator = None
+_elements1  = None
+_elements2  = None
+
+# ------------------------------------------------------------------------------
+#
+def get_comparator(spec):
+    """Loads the comparison function given as '<file.py>:<function>'.
+    """
+    filename, function = spec.rsplit(":", 1)
+    name = os.path.splitext(os.path.basename(filename))[0]
+    module = imp.load_source(name, filename)
+    return getattr(module, function)
+
+# ------------------------------------------------------------------------------
+#
+def get_pairs(num_elements1, num_elements2, triangle):
+    """Returns the (i, j) index pairs to compare, only those with i < j if
+       'triangle' is True.
+    """
+    if triangle:
+        return [(i, j) for i in range(num_elements1)
+                       for j in range(i+1, num_elements2)]
+    else:
+        return [(i, j) for i in range(num_elements1)
+                       for j in range(num_elements2)]
+
+# ------------------------------------------------------------------------------
+#
+def compare(pair):
+    i, j = pair
+    return i, j, _comparator(_elements1[i], _elements2[j])
+
+# ------------------------------------------------------------------------------
+#
+def run(comparator, set1, set2, cores=1, pool_type="process", triangle=False):
+    """Compares all pairs of 'set1' and 'set2' with 'cores' workers and
+       returns a list of (i, j, value) tuples in pair order. If 'triangle'
+       is True and the sets are identical, only the pairs i < j are
+       compared.
+    """
+    global _comparator, _elements1, _elements2
+
+    symmetric   = (set1 == set2)
+    _comparator = comparator
+    _elements1  = load_all(set1)
+    _elements2  = _elements1 if symmetric else load_all(set2)
+
+    pairs = get_pairs(len(set1), len(set2), triangle and symmetric)
+
+    if cores <= 1 or len(pairs) <= 1:
+        return [compare(pair) for pair in pairs]
+
+    if pool_type == "thread":
+        pool = multiprocessing.pool.ThreadPool(cores)
+    else:
+        pool = multiprocessing.Pool(cores)
+
+    try:
+        chunksize = max(1, len(pairs) // (4 * cores))
+        return pool.map(compare, pairs, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comparator", required=True,
+        help="The comparison function as <file.py>:<function>")
+    parser.add_argument("--cores", type=int, default=1,
+        help="The number of workers (usually the cores of the CU)")
+    parser.add_argument("--pool", choices=["process", "thread"], default="process",
+        help="Use a process (default) or a thread pool")
+    parser.add_argument("--pairs", choices=["full", "triangle"], default="full",
+        help="Compare the full pair matrix (default) or only the pairs i < j of identical sets")
+    parser.add_argument("--element_set1", nargs='*', required=True,
+        help="The elements of the first set")
+    parser.add_argument("--element_set2", nargs='*', required=True,
+        help="The elements of the second set")
+    parser.add_argument("--output_file", required=True,
+        help="File where the results will be written")
+    args = parser.parse_args()
+
+    results = run(get_comparator(args.comparator), args.element_set1,
+                  args.element_set2, args.cores, args.pool, args.pairs == "triangle")
+
+    with open(args.output_file, 'w') as out_file:
+        for i, j, value in results:
+            out_file.write('[{0},{1}] : {2}\n'.format(
+                args.element_set1[i], args.element_set2[j], value))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""Computes the Levenshtein distance between the contents of many pairs of
+text files in a single invocation.
+
+The distance is computed with Hyyro's bit-parallel variant of Myers'
+algorithm. The columns of the dynamic programming matrix are encoded as
+bit vectors (Python long integers), so each character of the longer string
+costs a handful of integer operations instead of a loop over the shorter
+string. With ``--max_distance=K``, the computation of a pair stops as soon
+as its distance is known to exceed K, and K+1 is reported::
+
+    python levenshtein.py --max_distance=100 \\
+        --element_set1 a.txt b.txt --element_set2 c.txt d.txt \\
+        --output_file distances.dat
+
+The full pair matrix is compared by default, including the diagonal if
+both element sets are identical. With ``--pairs=triangle``, only the pairs
+i < j of identical element sets are compared. Each output line has the
+format ``[<file1>,<file2>] : <distance>``. If a single pair is given, only
+the distance is written.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import sys
+import argparse
+
+# ------------------------------------------------------------------------------
+#
+def distance(s1, s2, max_distance=None):
+    """Returns the Levenshtein distance between 's1' and 's2'. If
+       'max_distance' is given and the distance is larger, max_distance+1
+       is returned instead.
+    """
+    # The shorter string is encoded as bit vectors, the longer one is
+    # scanned.
+    if len(s1) > len(s2):
+        s1, s2 = s2, s1
+    m, n = len(s1), len(s2)
+
+    if max_distance is not None and n - m > max_distance:
+        return max_distance + 1
+    if m == 0:
+        return n
+
+    # Match vectors: bit i of peq[c] is set if s1[i] == c.
+    peq = dict()
+    for i, c in enumerate(s1):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask  = (1 << m) - 1
+    last  = 1 << (m - 1)
+    pv    = mask
+    mv    = 0
+    score = m
+
+    for j, c in enumerate(s2):
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+        # The distance can decrease by at most one per remaining character.
+        if max_distance is not None and score - (n - j - 1) > max_distance:
+            return max_distance + 1
+
+    return score
+
+# ------------------------------------------------------------------------------
+#
+def run(set1, set2, max_distance=None, triangle=False):
+    """Compares all pairs of the files in 'set1' and 'set2' and returns a
+       list of (file1, file2, distance) tuples. If 'triangle' is True and
+       the sets are identical, only the pairs i < j are compared. Every
+       file is read once.
+    """
+    contents = dict()
+    for filename in set1 + set2:
+        if filename not in contents:
+            with open(filename, 'r') as f:
+                contents[filename] = f.read()
+
+    if triangle and set1 == set2:
+        pairs = [(set1[i], set2[j]) for i in range(len(set1))
+                                    for j in range(i+1, len(set2))]
+    else:
+        pairs = [(f1, f2) for f1 in set1 for f2 in set2]
+
+    return [(f1, f2, distance(contents[f1], contents[f2], max_distance))
+            for f1, f2 in pairs]
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max_distance", type=int, default=None,
+        help="Report max_distance+1 for all distances above max_distance")
+    parser.add_argument("--pairs", choices=["full", "triangle"], default="full",
+        help="Compare the full pair matrix (default) or only the pairs i < j of identical sets")
+    parser.add_argument("--element_set1", nargs='*', required=True,
+        help="The files of the first set")
+    parser.add_argument("--element_set2", nargs='*', required=True,
+        help="The files of the second set")
+    parser.add_argument("--output_file", default=None,
+        help="File where the results will be written (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.element_set1, args.element_set2, args.max_distance,
+                  args.pairs == "triangle")
+
+    if args.output_file is None:
+        out_file = sys.stdout
+    else:
+        out_file = open(args.output_file, 'w')
+
+    try:
+        if len(args.element_set1) == 1 and len(args.element_set2) == 1 and len(results) == 1:
+            out_file.write('{0}\n'.format(results[0][2]))
+        else:
+            for f1, f2, value in results:
+                out_file.write('[{0},{1}] : {2}\n'.format(f1, f2, value))
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
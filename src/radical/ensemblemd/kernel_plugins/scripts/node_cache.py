@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+"""Links input files into a ComputeUnit sandbox through a node-local cache.
+
+Each input is given as the path of the file on the shared file system, the
+name of the link in the sandbox and the node that produced the file::
+
+    python node_cache.py <source> <target> <node> [<source> <target> <node> ...]
+
+If the ComputeUnit runs on the node that produced a file, the file is
+likely still in that node's page cache and is linked directly. Otherwise,
+the file is copied once per node into a node-local cache directory and
+linked from there, so that all ComputeUnits on a node share one copy
+instead of reading the file from the shared file system over and over
+again. Directories and files that can't be cached are linked directly.
+Use ``-`` as the node if the producer isn't known.
+
+The cache directory can be set via the ``RADICAL_ENMD_NODE_CACHE_DIR``
+environment variable. It defaults to a per-user directory in the node's
+temporary directory (``$TMPDIR`` or ``/tmp``). The cache is limited to
+``RADICAL_ENMD_NODE_CACHE_MAX_MB`` megabytes (10 GB by default): before a
+file is copied into it, the least recently used entries are removed to
+make room. Entries that were linked in the last ``MIN_IDLE`` seconds are
+kept, as the units that link them may still be reading them. Files that
+don't fit into the cache are linked directly.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import sys
+import errno
+import shutil
+import time
+import socket
+import hashlib
+import tempfile
+
+CACHE_DIR_ENV = "RADICAL_ENMD_NODE_CACHE_DIR"
+MAX_SIZE_ENV  = "RADICAL_ENMD_NODE_CACHE_MAX_MB"
+
+# The default size limit of the cache directory in megabytes.
+DEFAULT_MAX_SIZE = 10 * 1024
+
+# Entries that were linked in the last this many seconds aren't removed.
+MIN_IDLE = 3600
+
+# ------------------------------------------------------------------------------
+#
+def get_cache_dir():
+    """Returns (and creates, if necessary) the node-local cache directory.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(),
+            "radical.enmd.node_cache.{0}".format(os.getuid()))
+    try:
+        os.makedirs(cache_dir)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+    return cache_dir
+
+# ------------------------------------------------------------------------------
+#
+def get_max_size():
+    """Returns the size limit of the cache directory in bytes.
+    """
+    return int(float(os.environ.get(MAX_SIZE_ENV, DEFAULT_MAX_SIZE)) * 1024 * 1024)
+
+# ------------------------------------------------------------------------------
+#
+def evict(cache_dir, max_size, min_idle=MIN_IDLE):
+    """Removes the least recently used entries of 'cache_dir' that weren't
+       used in the last 'min_idle' seconds, until the entries take at most
+       'max_size' bytes. Returns the size of the remaining entries.
+    """
+    entries = list()
+    for name in os.listdir(cache_dir):
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Removed by another process.
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum([size for mtime, size, path in entries])
+    now   = time.time()
+    for mtime, size, path in sorted(entries):
+        if total <= max_size or now - mtime < min_idle:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+    return total
+
+# ------------------------------------------------------------------------------
+#
+def is_local(node):
+    """Returns True if 'node' is the node this script runs on.
+    """
+    hostname = socket.gethostname()
+    return node in [hostname, hostname.split('.')[0], socket.getfqdn()]
+
+# ------------------------------------------------------------------------------
+#
+def cached_path(path):
+    """Returns the path of the node-local copy of the file 'path'. The file
+       is copied into the cache if it isn't there yet. If the file doesn't
+       fit into the cache or the copy fails, 'path' is returned.
+    """
+    st = os.stat(path)
+    key = hashlib.sha1("{0}:{1}:{2}".format(path, st.st_size, st.st_mtime).encode('utf-8')).hexdigest()
+    cache_dir = get_cache_dir()
+    target = os.path.join(cache_dir, "{0}_{1}".format(key, os.path.basename(path)))
+
+    # The modification time of an entry is its last use.
+    if os.path.exists(target):
+        try:
+            os.utime(target, None)
+            return target
+        except OSError:
+            # Evicted by another process in the meantime.
+            pass
+
+    max_size = get_max_size()
+    if st.st_size > max_size or evict(cache_dir, max_size - st.st_size) + st.st_size > max_size:
+        return path
+
+    # Copy to a private temporary file first and rename it into place, so
+    # that concurrent CUs on the same node never see a partial copy.
+    tmp = "{0}.{1}.tmp".format(target, os.getpid())
+    try:
+        shutil.copyfile(path, tmp)
+        os.rename(tmp, target)
+    except (IOError, OSError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return path
+
+    return target
+
+# ------------------------------------------------------------------------------
+#
+def link(source, target, node):
+    """Links 'source' as 'target', through the node-local cache unless
+       'source' was produced on this node.
+    """
+    source = os.path.realpath(source)
+    if os.path.isfile(source) and not is_local(node):
+        source = cached_path(source)
+
+    target_dir = os.path.dirname(target)
+    if target_dir and not os.path.isdir(target_dir):
+        os.makedirs(target_dir)
+    if os.path.lexists(target):
+        os.remove(target)
+    os.symlink(source, target)
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+
+    args = sys.argv[1:]
+    if not args or len(args) % 3:
+        sys.stderr.write("Usage: node_cache.py <source> <target> <node> [...]\n")
+        sys.exit(2)
+
+    for i in range(0, len(args), 3):
+        link(args[i], args[i+1], args[i+2])
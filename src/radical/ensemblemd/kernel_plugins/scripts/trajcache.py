@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+"""A node-local, memory-mapped cache for ``.npy`` trajectory files.
+
+Comparison kernels stage this module into their sandbox and load their
+elements with :func:`load` instead of ``numpy.load``. Each trajectory is
+copied once per node into a node-local cache directory and opened with
+``mmap_mode='r'`` from there, so all ComputeUnits running on the same node
+share a single copy of the data through the page cache instead of decoding
+and copying it from the shared filesystem over and over again.
+
+The cache directory can be set via the ``RADICAL_ENMD_TRAJCACHE_DIR``
+environment variable. It defaults to a per-user directory in the node's
+temporary directory (``$TMPDIR`` or ``/tmp``). The cache is limited to
+``RADICAL_ENMD_TRAJCACHE_MAX_MB`` megabytes (10 GB by default): before a
+file is copied into it, the least recently used entries are removed to
+make room. Removing an entry doesn't affect the processes that have it
+mapped already. Files that are larger than the limit are mapped from
+their original path.
+
+Usage as a script pre-warms the cache (e.g., in a kernel's pre_exec)::
+
+    python trajcache.py traj_1.npy traj_2.npy ...
+"""
+
+__author__    = "Ioannis Paraskevakos <i.paraskev@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import sys
+import errno
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+CACHE_DIR_ENV = "RADICAL_ENMD_TRAJCACHE_DIR"
+MAX_SIZE_ENV  = "RADICAL_ENMD_TRAJCACHE_MAX_MB"
+
+# The default size limit of the cache directory in megabytes.
+DEFAULT_MAX_SIZE = 10 * 1024
+
+# Per-process table of the arrays that are already mapped, keyed by the real
+# path of the source file.
+_mapped = dict()
+
+# ------------------------------------------------------------------------------
+#
+def get_cache_dir():
+    """Returns (and creates, if necessary) the node-local cache directory.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(),
+            "radical.enmd.trajcache.{0}".format(os.getuid()))
+    try:
+        os.makedirs(cache_dir)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+    return cache_dir
+
+# ------------------------------------------------------------------------------
+#
+def get_max_size():
+    """Returns the size limit of the cache directory in bytes.
+    """
+    return int(float(os.environ.get(MAX_SIZE_ENV, DEFAULT_MAX_SIZE)) * 1024 * 1024)
+
+# ------------------------------------------------------------------------------
+#
+def evict(cache_dir, max_size):
+    """Removes the least recently used entries of 'cache_dir' until the
+       entries take at most 'max_size' bytes. Returns the size of the
+       remaining entries.
+    """
+    entries = list()
+    for name in os.listdir(cache_dir):
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Removed by another process.
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum([size for mtime, size, path in entries])
+    for mtime, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+    return total
+
+# ------------------------------------------------------------------------------
+#
+def _cache_key(path):
+    """Derives the cache key of a file from its path, size and mtime, so
+       that a modified source file never maps a stale cached copy.
+    """
+    st = os.stat(path)
+    key = hashlib.sha1("{0}:{1}:{2}".format(path, st.st_size, st.st_mtime))
+    return key.hexdigest()
+
+# ------------------------------------------------------------------------------
+#
+def cached_path(path):
+    """Returns the path of the node-local copy of 'path'. The file is copied
+       into the cache if it isn't there yet. If the file doesn't fit into
+       the cache or the copy fails (e.g., the node-local disk is full), the
+       original path is returned.
+    """
+    path = os.path.realpath(path)
+    cache_dir = get_cache_dir()
+    target = os.path.join(cache_dir, "{0}.npy".format(_cache_key(path)))
+
+    # The modification time of an entry is its last use.
+    if os.path.exists(target):
+        try:
+            os.utime(target, None)
+            return target
+        except OSError:
+            # Evicted by another process in the meantime.
+            pass
+
+    max_size = get_max_size()
+    size = os.path.getsize(path)
+    if size > max_size or evict(cache_dir, max_size - size) + size > max_size:
+        return path
+
+    # Copy to a private temporary file first and rename it into place.
+    # rename() is atomic, so concurrent CUs on the same node never see a
+    # partially written cache entry.
+    tmp = "{0}.{1}.tmp".format(target, os.getpid())
+    try:
+        shutil.copyfile(path, tmp)
+        os.rename(tmp, target)
+    except (IOError, OSError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return path
+
+    return target
+
+# ------------------------------------------------------------------------------
+#
+def load(path):
+    """Returns the trajectory stored in 'path' as a read-only, memory-mapped
+       array. Repeated calls for the same file return the same array.
+    """
+    realpath = os.path.realpath(path)
+
+    if realpath not in _mapped:
+        if realpath.endswith(".npy"):
+            _mapped[realpath] = np.load(cached_path(realpath), mmap_mode='r')
+        else:
+            # .npz archives and other formats can't be memory-mapped.
+            _mapped[realpath] = np.load(realpath)
+
+    return _mapped[realpath]
+
+# ------------------------------------------------------------------------------
+#
+def load_all(paths):
+    """Returns the trajectories stored in 'paths' as a list in the same
+       order. Files that appear more than once are only loaded once.
+    """
+    return [load(path) for path in paths]
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+
+    for path in sys.argv[1:]:
+        cached_path(path)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+"""Fetches URLs into a shared cache directory on the resource.
+
+Every URL is stored in the cache directory under the name given on the
+command line, together with a ``<name>.meta`` file that records its ETag,
+Last-Modified date and size. A cached entry is revalidated with a
+conditional request and only downloaded again if it changed on the server
+or if its size doesn't match. If the server can't be reached, a complete
+cached entry is used as it is. Concurrent fetches of the same entry, e.g.
+by several pilots that share the cache directory, are serialized with a
+lock file, so that every URL is downloaded only once::
+
+    python url_cache.py --cache-dir=/path/to/cache <name> <url> [<name> <url> ...]
+
+One status line is written to stdout per URL::
+
+    URL_CACHE: fetched <name>
+    URL_CACHE: valid <name>
+    URL_CACHE: failed <name>
+
+The exit code is 0 even if URLs couldn't be cached, so that the status
+lines are read and the ComputeUnits download the failed URLs themselves.
+Like the ``curl --insecure`` commands it replaces, server certificates
+aren't verified.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+import os
+import sys
+import ssl
+import json
+import errno
+import fcntl
+import shutil
+import argparse
+
+try:
+    from urllib2 import Request, HTTPError, URLError, urlopen
+except ImportError:
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError, URLError
+
+STATUS_PREFIX = "URL_CACHE: "
+
+FETCHED = "fetched"
+VALID   = "valid"
+FAILED  = "failed"
+
+# ------------------------------------------------------------------------------
+#
+def parse_status(stdout):
+    """Returns a dictionary of the status of every entry name in the stdout
+       of the fetch task.
+    """
+    status = dict()
+    for line in (stdout or "").splitlines():
+        if line.startswith(STATUS_PREFIX):
+            parts = line[len(STATUS_PREFIX):].split(None, 1)
+            if len(parts) == 2:
+                status[parts[1]] = parts[0]
+    return status
+
+# ------------------------------------------------------------------------------
+#
+def _read_meta(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+# ------------------------------------------------------------------------------
+#
+def _open(request):
+    if hasattr(ssl, '_create_unverified_context'):
+        return urlopen(request, context=ssl._create_unverified_context())
+    return urlopen(request)
+
+# ------------------------------------------------------------------------------
+#
+def fetch(cache_dir, name, url):
+    """Fetches 'url' into the entry 'name' of 'cache_dir', unless the cached
+       entry is still valid. Returns FETCHED or VALID.
+    """
+    entry     = os.path.join(cache_dir, name)
+    meta_path = "{0}.meta".format(entry)
+
+    with open("{0}.lock".format(entry), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            meta = _read_meta(meta_path)
+            cached = meta is not None and meta.get('url') == url and \
+                     os.path.isfile(entry) and os.path.getsize(entry) == meta.get('size')
+
+            request = Request(url)
+            if cached and meta.get('etag'):
+                request.add_header('If-None-Match', meta['etag'])
+            elif cached and meta.get('last_modified'):
+                request.add_header('If-Modified-Since', meta['last_modified'])
+
+            try:
+                response = _open(request)
+            except HTTPError as ex:
+                if ex.code == 304 and cached:
+                    return VALID
+                raise
+            except URLError:
+                if cached:
+                    return VALID
+                raise
+
+            try:
+                headers = response.info()
+                etag    = headers.get('ETag')
+                length  = headers.get('Content-Length')
+
+                # Servers without conditional requests send the entry again.
+                if cached and etag is not None and etag == meta.get('etag') and \
+                   (length is None or int(length) == meta['size']):
+                    return VALID
+
+                tmp = "{0}.{1}.tmp".format(entry, os.getpid())
+                with open(tmp, 'wb') as f:
+                    shutil.copyfileobj(response, f, 1024 * 1024)
+            finally:
+                response.close()
+
+            size = os.path.getsize(tmp)
+            if length is not None and int(length) != size:
+                os.remove(tmp)
+                raise IOError("Incomplete download of {0}: {1} of {2} bytes.".format(url, size, length))
+
+            os.rename(tmp, entry)
+            with open(meta_path, 'w') as f:
+                json.dump({'url': url, 'etag': etag, 'size': size,
+                           'last_modified': headers.get('Last-Modified')}, f)
+            return FETCHED
+
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+# ------------------------------------------------------------------------------
+#
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Fetches URLs into a shared cache directory.")
+    parser.add_argument("--cache-dir", required=True)
+    parser.add_argument("entries", nargs='+', help="pairs of entry names and URLs")
+    args = parser.parse_args(args)
+
+    if len(args.entries) % 2:
+        parser.error("entries must be pairs of names and URLs")
+
+    try:
+        os.makedirs(args.cache_dir)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+
+    for name, url in zip(args.entries[0::2], args.entries[1::2]):
+        try:
+            status = fetch(args.cache_dir, name, url)
+        except Exception as ex:
+            sys.stderr.write("Can't fetch {0}: {1}\n".format(url, ex))
+            status = FAILED
+        sys.stdout.write("{0}{1} {2}\n".format(STATUS_PREFIX, status, name))
+        sys.stdout.flush()
+
+    return 0
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,456 @@
 #!/usr/bin/env python
 
-"""TODO: Docstring.
+"""This module defines and implements the MultiClusterEnvironment class.
 """
 
 __author__    = "Ole Weider <ole.weidner@rutgers.edu>"
 __copyright__ = "Copyright 2014, http://radical.rutgers.edu"
 __license__   = "MIT"
 
-from radical.ensemblemd.engine import Engine
-from radical.ensemblemd.exceptions import TypeError
-from radical.ensemblemd.execution_pattern import ExecutionPattern
-from radical.ensemblemd.execution_context import ExecutionContext
+import time
+import threading
+import radical.pilot
+import radical.utils as ru
+
+from radical.ensemblemd.exceptions import EnsemblemdError
+from radical.ensemblemd.exec_plugins.routing import Router
+from radical.ensemblemd.exec_plugins.staging import StagingExchange
+from radical.ensemblemd.exec_plugins.transfers import BACKGROUND_DIR
+from radical.ensemblemd.single_cluster_environment import SingleClusterEnvironment
+from radical.ensemblemd.single_cluster_environment import CONTEXT_NAME as STATIC_CONTEXT_NAME
 
 CONTEXT_NAME = "Dynamic"
 
+FINAL_STATES = [radical.pilot.DONE, radical.pilot.FAILED, radical.pilot.CANCELED]
+
+# The unit schedulers that distribute the ComputeUnits across the pilots.
+SCHEDULERS = {
+    "backfilling" : radical.pilot.SCHED_BACKFILLING,
+    "round_robin" : radical.pilot.SCHED_ROUND_ROBIN
+}
+
+
+#-------------------------------------------------------------------------------
+#
+class PilotGroup(object):
+    """A PilotGroup holds the pilots of a MultiClusterEnvironment. Files that
+       are staged into its staging area are staged into the staging areas of
+       all pilots. It doesn't stand in for a single pilot: the execution
+       plugins use the exchange pilot for the staging area.
+    """
+
+    #---------------------------------------------------------------------------
+    #
+    def __init__(self, context):
+        self._context = context
+
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def pilots(self):
+        """Returns the current list of pilots in the group.
+        """
+        return self._context._pilots
+
+    #---------------------------------------------------------------------------
+    #
+    def stage_in(self, directives):
+        """Stages 'directives' into the staging areas of all pilots.
+        """
+        for pilot in self.pilots:
+            pilot.stage_in(directives)
+
+
+
+#-------------------------------------------------------------------------------
+#
+class UnitManagerGroup(object):
+    """A UnitManagerGroup holds one unit manager per resource of a
+       MultiClusterEnvironment, in 'managers', and the number of cores of
+       each resource, in 'resource_cores'. A unit that is submitted to a
+       manager can only be placed on the pilots of that manager's
+       resource. The group places every description on the least loaded
+       resource of its route, i.e., the resource with the fewest cores of
+       unfinished units per core, and implements the unit manager methods
+       that the execution plugins use.
+    """
+
+    #---------------------------------------------------------------------------
+    #
+    def __init__(self, managers, resource_cores):
+        self._managers       = managers
+        self._resource_cores = resource_cores
+        self._lock           = threading.Lock()
+        self._load           = dict((key, 0) for key in managers)   # key -> cores of the unfinished units
+        self._unit_keys      = dict()                               # unit uid -> key
+        self._unfinished     = dict()                               # unit uid -> (unit, cores)
+
+    #---------------------------------------------------------------------------
+    #
+    def get_manager(self, resource_key):
+        """Returns the unit manager of the resource 'resource_key'.
+        """
+        return self._managers[resource_key]
+
+    #---------------------------------------------------------------------------
+    #
+    def get_resource_key(self, uid):
+        """Returns the resource that the unit 'uid' was submitted to.
+        """
+        with self._lock:
+            return self._unit_keys[uid]
+
+    #---------------------------------------------------------------------------
+    #
+    def _group_uids(self, uids):
+        if uids is None:
+            return dict((key, None) for key in self._managers)
+        if not isinstance(uids, list):
+            uids = [uids]
+        groups = dict()
+        with self._lock:
+            for uid in uids:
+                groups.setdefault(self._unit_keys[uid], list()).append(uid)
+        return groups
+
+    #---------------------------------------------------------------------------
+    #
+    def _release_finished(self):
+        """Removes the cores of the units that have finished from the load.
+           The caller holds the lock.
+        """
+        for uid, (unit, cores) in list(self._unfinished.items()):
+            if unit.state in FINAL_STATES:
+                self._load[self._unit_keys[uid]] -= cores
+                del self._unfinished[uid]
+
+    #---------------------------------------------------------------------------
+    #
+    def submit_units(self, descriptions, routes=None):
+        """Submits 'descriptions' and returns their units. Each description
+           is placed on one of the resources of its entry in 'routes'. A
+           route of None means any resource.
+        """
+        single = not isinstance(descriptions, list)
+        if single:
+            descriptions = [descriptions]
+        if routes is None:
+            routes = [None] * len(descriptions)
+
+        groups = dict()
+        with self._lock:
+            self._release_finished()
+            for index, (cud, route) in enumerate(zip(descriptions, routes)):
+                keys = sorted(route or self._managers)
+                key  = min(keys, key=lambda key: self._load[key] / float(self._resource_cores[key]))
+                self._load[key] += cud.cores or 1
+                groups.setdefault(key, list()).append(index)
+
+        units = [None] * len(descriptions)
+        for key in sorted(groups):
+            indices   = groups[key]
+            submitted = self._managers[key].submit_units([descriptions[i] for i in indices])
+            with self._lock:
+                for index, unit in zip(indices, submitted):
+                    self._unit_keys[unit.uid] = key
+                    self._unfinished[unit.uid] = (unit, descriptions[index].cores or 1)
+                    units[index] = unit
+
+        if single:
+            return units[0]
+        return units
+
+    #---------------------------------------------------------------------------
+    #
+    def wait_units(self, uids=None, state=None, timeout=None):
+        """Waits for the units 'uids' of all unit managers. The 'timeout'
+           applies to all unit managers together.
+        """
+        if timeout is not None:
+            deadline = time.time() + timeout
+        for key, group in sorted(self._group_uids(uids).items()):
+            if timeout is None:
+                self._managers[key].wait_units(group, state=state)
+            else:
+                self._managers[key].wait_units(group, state=state, timeout=max(0, deadline - time.time()))
+
+    #---------------------------------------------------------------------------
+    #
+    def cancel_units(self, uids=None):
+        """Cancels the units 'uids' of all unit managers.
+        """
+        for key, group in sorted(self._group_uids(uids).items()):
+            self._managers[key].cancel_units(group)
+
+    #---------------------------------------------------------------------------
+    #
+    def get_units(self):
+        """Returns the units of all unit managers.
+        """
+        units = list()
+        for key in sorted(self._managers):
+            units.extend(self._managers[key].get_units())
+        return units
+
+    #---------------------------------------------------------------------------
+    #
+    def register_callback(self, callback):
+        """Registers 'callback' with all unit managers.
+        """
+        for key in sorted(self._managers):
+            self._managers[key].register_callback(callback)
+
 
 #-------------------------------------------------------------------------------
 #
-class MultiClusterEnvironment(ExecutionContext):
-    """A multi-cluster environment provides a dynamically managed set of 
-       computational resources. 
+class MultiClusterEnvironment(SingleClusterEnvironment):
+    """A multi-cluster environment provides a set of pilots, on one or more
+       resources, that are used together to execute a pattern. The
+       ComputeUnits of the pattern are distributed across the pilots by a
+       load-balancing unit scheduler, so that an ensemble can grow beyond the
+       job size limits of a single queue.
+
+       Patterns that don't have a dedicated execution plugin for this context
+       are executed with their SingleClusterEnvironment plugin. Every kernel
+       is configured for one of the resources, and its ComputeUnits are
+       placed on the pilots of that resource. A ComputeUnit that stages
+       input from the sandbox of another unit, via ``link_input_data`` or
+       ``copy_input_data``, is placed on the resource of that unit.
+
+       .. note:: The pilots exchange files through the staging area of the
+                 first pilot, which only the pilots on the same resource can
+                 access. The kernels of the patterns that exchange files
+                 through the staging area, AllPairs and the replica
+                 exchange patterns 2 and 3, are configured for the resource
+                 of the first pilot, and their ComputeUnits run there.
     """
 
     #---------------------------------------------------------------------------
     #
-    def __init__(self):
-        """Creates a new ExecutionContext instance.
+    def __init__(self,
+                 resources,
+                 scheduler="backfilling",
+                 username=None,
+                 cleanup=False,
+                 database_url=None,
+                 database_name=None,
+                 failure_policy="abort",
+                 max_retries=3,
+                 speculation=False,
+                 speculation_fraction=0.75,
+                 speculation_factor=2.0,
+                 step_timeout=None,
+                 transfer_workers=None,
+                 archive_staging=None,
+                 reflink_copies=False,
+                 download_cache=False,
+                 node_local_inputs=False,
+                 incremental_staging=None,
+                 sandbox_retention=None):
+        """Creates a new MultiClusterEnvironment instance.
+
+        **Arguments:**
+
+            * **resources** [`list`]
+              A list of dictionaries, one per pilot. Each dictionary has the
+              keys ``resource``, ``cores`` and ``walltime`` and, optionally,
+              ``queue``, ``project`` and ``access_schema``. A resource can
+              appear more than once.
+
+            * **scheduler** [`str`]
+              The unit scheduler that distributes the ComputeUnits across the
+              pilots, either ``backfilling`` (default) or ``round_robin``.
+
+            * **failure_policy** [`str`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **max_retries** [`int`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **speculation**, **speculation_fraction**, **speculation_factor**
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **step_timeout** [`int`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **transfer_workers**, **archive_staging** [`int`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **reflink_copies** [`bool`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **download_cache** [`bool` or `str`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+              Only supported if all pilots are on the same resource.
+
+            * **node_local_inputs** [`bool`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+
+            * **incremental_staging** [`str`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+              The directory is used on every resource.
+
+            * **sandbox_retention** [`int`]
+              See :class:`radical.ensemblemd.SingleClusterEnvironment`.
+              The cleanup units run on any of the pilots, so sandboxes on
+              resources that don't share a file system with that pilot are
+              kept.
+        """
+        if not resources:
+            raise EnsemblemdError(
+                msg="MultiClusterEnvironment requires at least one resource.")
+
+        for res in resources:
+            for key in ["resource", "cores", "walltime"]:
+                if key not in res:
+                    raise EnsemblemdError(
+                        msg="Resource description {0} lacks the mandatory key '{1}'.".format(res, key))
+
+        resource_keys = set([res["resource"] for res in resources])
+        if download_cache and len(resource_keys) > 1:
+            raise EnsemblemdError(
+                msg="The download cache requires all pilots to be on the same resource, got {0}.".format(
+                    sorted(resource_keys)))
+
+        if scheduler not in SCHEDULERS:
+            raise EnsemblemdError(
+                msg="Unknown scheduler '{0}'. Valid schedulers are {1}.".format(scheduler, SCHEDULERS.keys()))
+
+        self._resources = resources
+
+        # The plugins see the cores of all pilots.
+        super(MultiClusterEnvironment, self).__init__(
+            resource=resources[0]["resource"],
+            cores=sum([res["cores"] for res in resources]),
+            walltime=max([res["walltime"] for res in resources]),
+            queue=resources[0].get("queue"),
+            username=username,
+            project=resources[0].get("project"),
+            cleanup=cleanup,
+            database_url=database_url,
+            database_name=database_name,
+            access_schema=resources[0].get("access_schema"),
+            failure_policy=failure_policy,
+            max_retries=max_retries,
+            speculation=speculation,
+            speculation_fraction=speculation_fraction,
+            speculation_factor=speculation_factor,
+            step_timeout=step_timeout,
+            transfer_workers=transfer_workers,
+            archive_staging=archive_staging,
+            reflink_copies=reflink_copies,
+            download_cache=download_cache,
+            node_local_inputs=node_local_inputs,
+            incremental_staging=incremental_staging,
+            sandbox_retention=sandbox_retention)
+
+        self._scheduler = SCHEDULERS[scheduler]
+
+        self._resource_cores = dict()
+        for res in resources:
+            self._resource_cores[res["resource"]] = self._resource_cores.get(res["resource"], 0) + res["cores"]
+        self._router = Router(self._resource_cores)
+        self._staging_exchange = StagingExchange([BACKGROUND_DIR])
+
+        self._logger  = ru.get_logger('radical.enmd.MultiClusterEnvironment')
+        self._reporter = ru.LogReporter(name='radical.enmd.MultiClusterEnvironment')
+
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def name(self):
+        """Returns the name of the execution context.
         """
-        super(MultiClusterEnvironment, self).__init__()
+        return CONTEXT_NAME
 
     #---------------------------------------------------------------------------
     #
     def get_name(self):
         """Returns the name of the execution context.
         """
-        return CONTEXT_NAME
\ No newline at end of file
+        return CONTEXT_NAME
+
+    #---------------------------------------------------------------------------
+    #
+    def allocate(self, wait=False):
+        """Allocates the requested resources.
+        """
+        super(MultiClusterEnvironment, self).allocate(wait=wait)
+        self._pilot = PilotGroup(self)
+
+    #---------------------------------------------------------------------------
+    #
+    def _create_unit_manager(self, pdescs):
+        """(PRIVATE) Implements parent class method. Creates one unit manager
+           per resource.
+        """
+        managers = dict()
+        for pilot, pdesc in zip(self._pilots, pdescs):
+            if pdesc.resource not in managers:
+                managers[pdesc.resource] = radical.pilot.UnitManager(
+                    session=self._session,
+                    scheduler=self._scheduler)
+            managers[pdesc.resource].add_pilots(pilot)
+        return UnitManagerGroup(managers, self._resource_cores)
+
+    #---------------------------------------------------------------------------
+    #
+    def _get_unit_manager(self, resource_key):
+        """(PRIVATE) Implements parent class method.
+        """
+        return self._umgr.get_manager(resource_key)
+
+    #---------------------------------------------------------------------------
+    #
+    def _bind_kernel(self, kernel, pattern_name=None, exchange=False):
+        """(PRIVATE) Implements parent class method. Binds 'kernel' to the
+           least loaded resource it is configured for.
+        """
+        if exchange:
+            self._router.bind_kernel(kernel, pattern_name, self._staging_exchange.resource_key)
+        else:
+            self._router.bind_kernel(kernel, pattern_name)
+
+    #---------------------------------------------------------------------------
+    #
+    def _create_pilot_descriptions(self):
+        """(PRIVATE) Implements parent class method.
+        """
+        pdescs = list()
+
+        for res in self._resources:
+            pdesc = radical.pilot.ComputePilotDescription()
+            pdesc.resource = res["resource"]
+            pdesc.runtime  = res["walltime"]
+            pdesc.cores    = res["cores"]
+
+            if res.get("queue") is not None:
+                pdesc.queue = res["queue"]
+
+            pdesc.cleanup = self._cleanup
+
+            if res.get("project") is not None:
+                pdesc.project = res["project"]
+
+            pdesc.access_schema = res.get("access_schema")
+
+            pdescs.append(pdesc)
+
+        return pdescs
+
+    #---------------------------------------------------------------------------
+    #
+    def _get_execution_plugin(self, pattern, force_plugin=None):
+        """(PRIVATE) Implements parent class method. Falls back to the
+           SingleClusterEnvironment plugins.
+        """
+        context_name = self.name
+        if not self._engine.has_execution_plugin_for_pattern(pattern.name, context_name):
+            self.get_logger().info("Using the '{0}' execution plugins for pattern '{1}'.".format(
+                STATIC_CONTEXT_NAME, pattern.name))
+            context_name = STATIC_CONTEXT_NAME
+
+        return self._engine.get_execution_plugin_for_pattern(
+            pattern_name=pattern.name,
+            context_name=context_name,
+            plugin_name=force_plugin)
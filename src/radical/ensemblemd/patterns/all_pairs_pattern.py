@@ -22,7 +22,7 @@ class AllPairs(ExecutionPattern):
     """
     #---------------------------------------------------------------------------
     #
-    def __init__(self, set1elements, windowsize1=1, set2elements=None, windowsize2=None):
+    def __init__(self, set1elements, windowsize1=1, set2elements=None, windowsize2=None, reuse_cached_elements=False):
         """Creates a new AllPairs object.
 
         **Arguments:**
@@ -42,6 +42,15 @@ class AllPairs(ExecutionPattern):
               The Window size for the elements of the second set. Must dividor of the
               set's size. Default Value is None.
 
+            * **reuse_cached_elements** ['bool']
+              If True, the initialization of an element is skipped if its
+              unit is in the result cache of the execution context, e.g.,
+              from an earlier AllPairs run on the same elements. Units are
+              cached by their executable, arguments and inputs, and the
+              comparisons link the element files from the cache. Requires
+              an execution context with a ``result_cache``. Default value
+              is False.
+
         **Attributes:**
 
             * **permutations** [`int`]
@@ -53,6 +62,7 @@ class AllPairs(ExecutionPattern):
         self._set2elements = set2elements
         self._windowsize1  = windowsize1
         self._windowsize2  = windowsize2
+        self._reuse_cached_elements = reuse_cached_elements
         if set2elements == None :
             self._permutations = len(self._set1elements)*(len(self._set1elements)-1)/2
         else:
@@ -77,6 +87,15 @@ class AllPairs(ExecutionPattern):
         """
         return self._permutations
 
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def reuse_cached_elements(self):
+        """Returns True if elements that are in the result cache of the
+           execution context are reused instead of initialized again.
+        """
+        return self._reuse_cached_elements
+
     #---------------------------------------------------------------------------
     #
     #@property
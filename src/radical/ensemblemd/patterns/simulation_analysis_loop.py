@@ -7,7 +7,7 @@ __author__    = "Ole Weider <ole.weidner@rutgers.edu>"
 __copyright__ = "Copyright 2014, http://radical.rutgers.edu"
 __license__   = "MIT"
 
-from radical.ensemblemd.exceptions import NotImplementedError
+from radical.ensemblemd.exceptions import EnsemblemdError, NotImplementedError
 from radical.ensemblemd.execution_pattern import ExecutionPattern
 
 PATTERN_NAME = "SimulationAnalysisLoop"
@@ -50,7 +50,8 @@ class SimulationAnalysisLoop(ExecutionPattern):
 
     #---------------------------------------------------------------------------
     #
-    def __init__(self, iterations, simulation_instances=1, analysis_instances=1):
+    def __init__(self, iterations, simulation_instances=1, analysis_instances=1,
+                 checkpoint_file=None, resume=False):
         """Creates a new SimulationAnalysisLoop.
 
         **Arguments:**
@@ -68,10 +69,29 @@ class SimulationAnalysisLoop(ExecutionPattern):
               The analysis_instances parameter determines the number of independent
               analysis instances launched for each `analysis_step`.
 
+            * **checkpoint_file** [`str`]
+              The local file the execution state is written to after every
+              completed step: the completed steps, the working directories
+              that the data references resolve to and the ComputeUnit ids.
+              If None, no checkpoint is written. Default value is None.
+
+            * **resume** [`bool`]
+              If True, the execution continues after the last completed step
+              in `checkpoint_file`. The completed steps are neither executed
+              nor staged again, and data references to them resolve to their
+              original working directories, which must still exist on the
+              resource. Requires `checkpoint_file`. Default value is False.
+
         """
+        if resume and checkpoint_file is None:
+            raise EnsemblemdError(
+                msg="Resuming a SimulationAnalysisLoop requires a checkpoint_file.")
+
         self._iterations = iterations
         self._simulation_instances = simulation_instances
         self._analysis_instances = analysis_instances
+        self._checkpoint_file = checkpoint_file
+        self._resume = resume
 
         super(SimulationAnalysisLoop, self).__init__()
 
@@ -107,6 +127,22 @@ class SimulationAnalysisLoop(ExecutionPattern):
         """
         return self._analysis_instances
 
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def checkpoint_file(self):
+        """Returns the path of the checkpoint file or None.
+        """
+        return self._checkpoint_file
+
+    #---------------------------------------------------------------------------
+    #
+    @property
+    def resume(self):
+        """Returns True if the execution resumes from the checkpoint file.
+        """
+        return self._resume
+
     #---------------------------------------------------------------------------
     #
     def pre_loop(self):
@@ -198,3 +234,48 @@ class SimulationAnalysisLoop(ExecutionPattern):
         raise NotImplementedError(
           method_name="post_loop",
           class_name=type(self))
+
+    #---------------------------------------------------------------------------
+    #
+    def check_convergence(self, iteration):
+        """`check_convergence` is called on the client after the analysis
+        step of every iteration but the last, when its output data has been
+        downloaded. If it returns True, the loop terminates early.
+
+        The default implementation always returns False.
+
+        **Arguments:**
+
+            * **iteration** [`int`]
+              The iteration parameter is a positive integer and references the
+              iteration of the simulation-analysis loop that just finished.
+
+        **Returns:**
+
+            True if the loop has converged and should terminate.
+
+        """
+        return False
+
+    #---------------------------------------------------------------------------
+    #
+    def adapt_simulation_instances(self, iteration):
+        """`adapt_simulation_instances` is called on the client after
+        `check_convergence`. It can change the number of simulation instances
+        of the next iteration.
+
+        The default implementation always returns None.
+
+        **Arguments:**
+
+            * **iteration** [`int`]
+              The iteration parameter is a positive integer and references the
+              iteration of the simulation-analysis loop that just finished.
+
+        **Returns:**
+
+            The number of simulation instances of iteration `iteration` + 1,
+            or None to keep the current number.
+
+        """
+        return None
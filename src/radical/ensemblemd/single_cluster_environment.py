@@ -9,6 +9,7 @@ __license__   = "MIT"
 
 import os
 import sys
+import threading
 import traceback
 import datetime
 import radical.pilot
@@ -19,6 +20,17 @@ from radical.ensemblemd.engine import Engine
 from radical.ensemblemd.exceptions import EnsemblemdError, TypeError
 from radical.ensemblemd.execution_pattern import ExecutionPattern
 from radical.ensemblemd.execution_context import ExecutionContext
+from radical.ensemblemd.elastic_pilot_manager import ElasticPilotManager
+from radical.ensemblemd.exec_plugins.failure_policy import POLICIES, ABORT, RESUBMIT, SKIP
+from radical.ensemblemd.exec_plugins.result_cache import ResultCache, MODES
+from radical.ensemblemd.exec_plugins.staging import SharedUploads, StagingExchange
+from radical.ensemblemd.exec_plugins.transfers import TransferManager, BackgroundDownloads, BACKGROUND_DIR
+from radical.ensemblemd.exec_plugins.archive_staging import ArchiveStaging
+from radical.ensemblemd.exec_plugins.download_cache import DownloadCache
+from radical.ensemblemd.exec_plugins.locality import ProducerNodes
+from radical.ensemblemd.exec_plugins.upload_manifest import UploadManifest
+from radical.ensemblemd.exec_plugins.sandbox_gc import SandboxGC
+from radical.ensemblemd.exec_plugins.skipped_units import SkippedUnits
 
 CONTEXT_NAME = "Static"
 
@@ -41,14 +53,165 @@ class SingleClusterEnvironment(ExecutionContext):
                  cleanup=False, 
                  database_url=None, 
                  database_name=None,
-                 access_schema=None):
+                 access_schema=None,
+                 elastic=False,
+                 max_pilots=4,
+                 idle_timeout=300,
+                 bundle_size=None,
+                 bundle_cores=1,
+                 failure_policy="abort",
+                 max_retries=3,
+                 result_cache=None,
+                 result_cache_mode="link",
+                 speculation=False,
+                 speculation_fraction=0.75,
+                 speculation_factor=2.0,
+                 step_timeout=None,
+                 transfer_workers=None,
+                 archive_staging=None,
+                 reflink_copies=False,
+                 download_cache=False,
+                 node_local_inputs=False,
+                 incremental_staging=None,
+                 sandbox_retention=None):
         """Creates a new ExecutionContext instance.
+
+        **Arguments:**
+
+            * **elastic** [`bool`]
+              If True, additional pilots of the same size are submitted
+              while ComputeUnits wait for free cores, and additional pilots
+              that stay idle are canceled. Default value is False.
+
+            * **max_pilots** [`int`]
+              The maximum number of pilots in elastic mode.
+
+            * **idle_timeout** [`int`]
+              Seconds after which an idle additional pilot is canceled in
+              elastic mode. Additional pilots don't clean up their sandboxes,
+              so that later steps can still link the outputs of their units.
+
+            * **bundle_size** [`int`]
+              If set, up to this many non-MPI ComputeUnits of a step with the
+              same number of cores are executed together as a single
+              ComputeUnit. ComputeUnits with output staging aren't bundled,
+              and kernels that may be bundled can't have a
+              :attr:`radical.ensemblemd.Kernel.max_runtime`. Default value is
+              None (no bundling).
+
+            * **bundle_cores** [`int`]
+              The number of cores of a bundle. The tasks of a bundle are
+              executed concurrently on these cores. Default value is 1.
+
+            * **failure_policy** [`str`]
+              What happens if ComputeUnits fail: ``abort`` the pattern
+              (default), ``retry`` the failed units, ``resubmit`` them after
+              replacing failed pilots, or ``skip`` them and the units that
+              stage their input from them.
+
+            * **max_retries** [`int`]
+              The maximum number of retries of a failed unit with the
+              ``retry`` and ``resubmit`` policies. Default value is 3.
+
+            * **result_cache** [`str`]
+              If set, the results of ComputeUnits are cached in this
+              directory on the resource. ComputeUnits with the same
+              executable, arguments, environment and input files as a cached
+              unit aren't executed again; their outputs are materialized from
+              the cache instead. Default value is None (no cache).
+
+            * **result_cache_mode** [`str`]
+              Whether cached outputs are materialized as symbolic ``link``
+              (default) or as ``copy``.
+
+            * **speculation** [`bool`]
+              If True, ComputeUnits that take much longer than the other
+              units of their step are duplicated on free cores, and the copy
+              that finishes first is used. Default value is False.
+
+            * **speculation_fraction** [`float`]
+              The fraction of the units of a step that must have finished
+              before units are duplicated. Default value is 0.75.
+
+            * **speculation_factor** [`float`]
+              Units that have been executing for longer than this factor
+              times the median execution time of the finished units of their
+              step are duplicated. Default value is 2.0.
+
+            * **step_timeout** [`int`]
+              The maximum number of seconds a step of a pattern may take.
+              The units of a step that haven't finished by then are
+              canceled and the execution fails. Default value is None (no
+              timeout). Single units can be limited with
+              :attr:`radical.ensemblemd.Kernel.max_runtime`.
+
+            * **transfer_workers** [`int`]
+              If set, the uploads and downloads of the ComputeUnits of a
+              step are batched and executed by this many parallel workers
+              that reuse their connections to the resource, instead of one
+              after the other. Default value is None.
+
+            * **archive_staging** [`int`]
+              If set, ComputeUnits that upload or download at least this
+              many files transfer them in a single compressed tar archive,
+              which is unpacked in the sandbox or on the client. Default
+              value is None.
+
+            * **reflink_copies** [`bool`]
+              If True, ``copy_input_data`` of absolute paths is performed with
+              ``cp --reflink=auto`` on the resource, which shares the data
+              blocks on file systems with copy-on-write support (e.g.,
+              Btrfs, XFS) and falls back to a regular copy elsewhere.
+              Inputs that a kernel doesn't modify can be linked instead, see
+              :attr:`radical.ensemblemd.Kernel.read_only_input_data`.
+              Default value is False.
+
+            * **download_cache** [`bool` or `str`]
+              If True, the ``download_input_data`` URLs of a step are
+              fetched once into a cache in the pilot's staging area and
+              linked into the ComputeUnits, instead of being downloaded by
+              every ComputeUnit. If set to a path, the cache is kept in that
+              directory on the resource, so that it can be shared by
+              several pilots and runs. Default value is False.
+
+            * **node_local_inputs** [`bool`]
+              If True, files that a ComputeUnit links from the working
+              directory of an earlier ComputeUnit (e.g., via
+              ``$SIMULATION_ITERATION_X_INSTANCE_Y``) are linked directly if
+              the earlier unit ran on the same node, and are otherwise
+              copied once per node into node-local scratch and linked from
+              there. The node-local scratch directory can be set with the
+              ``RADICAL_ENMD_NODE_CACHE_DIR`` environment variable on the
+              resource and is limited to ``RADICAL_ENMD_NODE_CACHE_MAX_MB``
+              megabytes (10 GB by default). Default value is False.
+
+            * **incremental_staging** [`str`]
+              If set to a path, uploaded files are identified by the hash
+              of their content, uploaded into that directory on the
+              resource instead of the pilot's staging area, and linked into
+              the ComputeUnits from there. The directory keeps a manifest
+              of the files that were uploaded into it. Files whose content
+              is already in the directory aren't uploaded again, e.g., for
+              added or replacement pilots, or when a pattern is re-run or
+              resumed in a later allocation. Default value is None.
+
+            * **sandbox_retention** [`int`]
+              If set, the simulation-analysis loop only keeps the sandboxes
+              of the last this many iterations and removes older ones with
+              a cleanup ComputeUnit while the loop continues, so that long
+              runs don't fill the scratch quota. Steps can then only
+              reference the sandboxes of these iterations via
+              ``$SIMULATION_ITERATION_X_INSTANCE_Y`` and
+              ``$ANALYSIS_ITERATION_X_INSTANCE_Y``. Default value is None,
+              which keeps all sandboxes.
         """
         self._allocate_called = False
         self._umgr = None
         self._session = None
         self._pilot = None
+        self._pilots = list()
         self._pmgr = None
+        self._scheduler = radical.pilot.SCHED_DIRECT_SUBMISSION
         self._exctype = None
         self._excvalue = None
         self._traceback = None
@@ -63,6 +226,85 @@ class SingleClusterEnvironment(ExecutionContext):
         self._database_url = database_url
         self._database_name = database_name
         self._schema = access_schema
+        self._elastic = elastic
+        self._max_pilots = max_pilots
+        self._idle_timeout = idle_timeout
+        self._elastic_manager = None
+        self._bundle_size = bundle_size
+        self._bundle_cores = bundle_cores
+
+        if failure_policy not in POLICIES:
+            raise EnsemblemdError(
+                msg="Unknown failure policy '{0}'. Valid policies are {1}.".format(failure_policy, POLICIES))
+        self._failure_policy = failure_policy
+        self._max_retries = max_retries
+        self._replace_lock = threading.Lock()
+
+        if failure_policy == SKIP:
+            self._skipped_units = SkippedUnits()
+        else:
+            self._skipped_units = None
+
+        if result_cache_mode not in MODES:
+            raise EnsemblemdError(
+                msg="Unknown result cache mode '{0}'. Valid modes are {1}.".format(result_cache_mode, MODES))
+        if result_cache is not None:
+            self._result_cache = ResultCache(result_cache, result_cache_mode)
+        else:
+            self._result_cache = None
+
+        self._speculation = speculation
+        self._speculation_fraction = speculation_fraction
+        self._speculation_factor = speculation_factor
+        self._step_timeout = step_timeout
+
+        if transfer_workers is not None:
+            self._transfer_manager = TransferManager(transfer_workers)
+        else:
+            self._transfer_manager = None
+        if incremental_staging is True:
+            raise EnsemblemdError(
+                msg="incremental_staging must be the path of a directory on the resource.")
+        if incremental_staging:
+            self._shared_uploads = SharedUploads(self._transfer_manager, UploadManifest(incremental_staging))
+        else:
+            self._shared_uploads = SharedUploads(self._transfer_manager)
+        self._background_downloads = BackgroundDownloads()
+
+        # Pilots that are added by elastic scaling or that replace failed
+        # pilots exchange files through the staging area of the first pilot.
+        if elastic is True or failure_policy == RESUBMIT:
+            self._staging_exchange = StagingExchange([BACKGROUND_DIR])
+        else:
+            self._staging_exchange = None
+        self._router = None
+
+        self._reflink_copies = reflink_copies
+
+        if download_cache is True:
+            self._download_cache = DownloadCache()
+        elif download_cache:
+            self._download_cache = DownloadCache(download_cache)
+        else:
+            self._download_cache = None
+
+        self._producer_nodes = ProducerNodes()
+        self._node_local_inputs = node_local_inputs
+
+        if archive_staging is not None:
+            self._archive_staging = ArchiveStaging(archive_staging)
+        else:
+            self._archive_staging = None
+
+        if sandbox_retention is not None:
+            self._sandbox_gc = SandboxGC(sandbox_retention)
+        else:
+            self._sandbox_gc = None
+
+        # Elastic pilots only get units if the units aren't bound to a pilot
+        # on submission.
+        if self._elastic is True:
+            self._scheduler = radical.pilot.SCHED_BACKFILLING
 
         self._logger  = ru.get_logger('radical.enmd.SingleClusterEnvironment')
         self._reporter = ru.LogReporter(name='radical.enmd.SingleClusterEnvironment')
@@ -100,6 +342,29 @@ class SingleClusterEnvironment(ExecutionContext):
             traceback.print_tb(self._traceback)
         
 
+        if self._elastic_manager is not None:
+            self._elastic_manager.stop()
+
+        # Wait for the cleanup units before the pilots go away.
+        if self._sandbox_gc is not None:
+            failed = self._sandbox_gc.close(self)
+            if failed:
+                self.get_logger().error("{0} sandbox cleanup unit(s) failed.".format(failed))
+                self._reporter.error("{0} sandbox cleanup unit(s) failed.".format(failed))
+
+        # Wait for the background downloads before the pilots go away.
+        failed = self._background_downloads.close()
+        if failed:
+            self.get_logger().error("{0} background download(s) failed.".format(failed))
+            self._reporter.error("{0} background download(s) failed.".format(failed))
+
+        if self._transfer_manager is not None:
+            self._transfer_manager.close()
+            self._reporter.info("Transfer throughput: {0:.1f} MB/s".format(self._transfer_manager.throughput))
+
+        if self._archive_staging is not None:
+            self._archive_staging.close()
+
         self._session.close(cleanup=self._cleanup)
         self._reporter.ok('>>done \n')    
 
@@ -123,8 +388,11 @@ class SingleClusterEnvironment(ExecutionContext):
 
             if state == radical.pilot.FAILED:
                 self.get_logger().error("Resource error: {0}".format(pilot.log[-1]))
-                self.get_logger().error("Pattern execution FAILED.")
-                sys.exit(2)
+                if self._failure_policy == RESUBMIT:
+                    self._replace_failed_pilots()
+                elif self._failure_policy == ABORT:
+                    self.get_logger().error("Pattern execution FAILED.")
+                    sys.exit(2)
 
             if state == radical.pilot.DONE:
                 self.get_logger().info("Resource allocation time over.")
@@ -171,35 +439,28 @@ class SingleClusterEnvironment(ExecutionContext):
             pmgr.register_callback(pilot_state_cb)
             self._pmgr = pmgr
 
-            pdesc = radical.pilot.ComputePilotDescription()
-            pdesc.resource = self._resource_key
-            pdesc.runtime  = self._walltime
-            pdesc.cores    = self._cores
-
-            if self._queue is not None:
-                pdesc.queue = self._queue
-
-            pdesc.cleanup = self._cleanup
+            pdescs = self._create_pilot_descriptions()
 
-            if self._project is not None:
-                pdesc.project = self._project
+            self.get_logger().info("Requesting resources on {0}".format(
+                ", ".join([pdesc.resource for pdesc in pdescs])))
 
-            pdesc.access_schema = self._schema
+            self._pilots = pmgr.submit_pilots(pdescs)
+            self._pilot  = self._pilots[0]
 
-            self.get_logger().info("Requesting resources on {0}".format(self._resource_key))
-
-            self._pilot = pmgr.submit_pilots(pdesc)
+            if self._staging_exchange is not None:
+                self._staging_exchange.set_pilot(self._pilots[0], pdescs[0].resource)
 
             if wait is True:
-                self._pilot.wait(radical.pilot.ACTIVE)
+                pmgr.wait_pilots([pilot.uid for pilot in self._pilots], radical.pilot.ACTIVE)
 
-            self._umgr = radical.pilot.UnitManager(
-                session=self._session,
-                scheduler=radical.pilot.SCHED_DIRECT_SUBMISSION)
+            self._umgr = self._create_unit_manager(pdescs)
 
-            self._umgr.add_pilots(self._pilot)
+            for pdesc in pdescs:
+                self.get_logger().info("Launched {0}-core pilot on {1}.".format(pdesc.cores, pdesc.resource))
 
-            self.get_logger().info("Launched {0}-core pilot on {1}.".format(self._cores, self._resource_key))
+            if self._elastic is True:
+                self._elastic_manager = ElasticPilotManager(self, self._max_pilots, self._idle_timeout)
+                self._elastic_manager.start()
 
             if profiling == 1:
                 stop_time = datetime.datetime.now()
@@ -222,6 +483,106 @@ class SingleClusterEnvironment(ExecutionContext):
                 f1.write('allocate,stop_time,{0}\n'.format(stop_time))
                 f1.close()
 
+    #---------------------------------------------------------------------------
+    #
+    def _create_pilot_descriptions(self):
+        """(PRIVATE) Returns the list of ComputePilotDescriptions that are
+           submitted by allocate().
+        """
+        pdesc = radical.pilot.ComputePilotDescription()
+        pdesc.resource = self._resource_key
+        pdesc.runtime  = self._walltime
+        pdesc.cores    = self._cores
+
+        if self._queue is not None:
+            pdesc.queue = self._queue
+
+        pdesc.cleanup = self._cleanup
+
+        if self._project is not None:
+            pdesc.project = self._project
+
+        pdesc.access_schema = self._schema
+
+        return [pdesc]
+
+    #---------------------------------------------------------------------------
+    #
+    def _create_unit_manager(self, pdescs):
+        """(PRIVATE) Returns the unit manager of the pilots that allocate()
+           submitted for 'pdescs'.
+        """
+        umgr = radical.pilot.UnitManager(
+            session=self._session,
+            scheduler=self._scheduler)
+        umgr.add_pilots(self._pilots)
+        return umgr
+
+    #---------------------------------------------------------------------------
+    #
+    def _get_unit_manager(self, resource_key):
+        """(PRIVATE) Returns the unit manager of the pilots on the resource
+           'resource_key'.
+        """
+        return self._umgr
+
+    #---------------------------------------------------------------------------
+    #
+    def _bind_kernel(self, kernel, pattern_name=None, exchange=False):
+        """(PRIVATE) Binds 'kernel' to the resource of the execution context.
+           If 'exchange' is True, the units of the kernel exchange files
+           through the staging area and the kernel is bound to the resource
+           of the exchange pilot.
+        """
+        # A bundled unit can't be canceled on its own, so its runtime can't
+        # be limited.
+        if self._bundle_size and self._bundle_size > 1 and kernel.max_runtime \
+           and not kernel.uses_mpi and (kernel.cores or 1) <= (self._bundle_cores or 1):
+            raise EnsemblemdError(
+                msg="Kernel '{0}' has a max_runtime, but its units may be bundled. Set max_runtime or bundle_size, not both.".format(kernel.name))
+        kernel._bind_to_resource(self._resource_key, pattern_name)
+
+    #---------------------------------------------------------------------------
+    #
+    def _replace_failed_pilots(self):
+        """(PRIVATE) Replaces every failed pilot by a new pilot with the same
+           description.
+        """
+        with self._replace_lock:
+            pdescs = self._create_pilot_descriptions()
+            pilots = list(self._pilots)
+
+            for index, pilot in enumerate(pilots):
+                if pilot.state != radical.pilot.FAILED:
+                    continue
+
+                pdesc = pdescs[min(index, len(pdescs)-1)]
+                self.get_logger().info("Replacing failed pilot {0} by a new pilot on {1}.".format(
+                    pilot.uid, pdesc.resource))
+                self._reporter.info("Replacing failed pilot {0}".format(pilot.uid))
+
+                new_pilot = self._pmgr.submit_pilots(pdesc)
+                umgr = self._get_unit_manager(pdesc.resource)
+                umgr.remove_pilots(pilot.uid)
+                umgr.add_pilots(new_pilot)
+
+                pilots[index] = new_pilot
+                if self._pilot is pilot:
+                    self._pilot = new_pilot
+
+            self._pilots = pilots
+
+    #---------------------------------------------------------------------------
+    #
+    def _get_execution_plugin(self, pattern, force_plugin=None):
+        """(PRIVATE) Returns the execution plugin that runs 'pattern' in
+           this execution context.
+        """
+        return self._engine.get_execution_plugin_for_pattern(
+            pattern_name=pattern.name,
+            context_name=self.name,
+            plugin_name=force_plugin)
+
     #---------------------------------------------------------------------------
     #
     def run(self, pattern, force_plugin=None):
@@ -240,10 +601,7 @@ class SingleClusterEnvironment(ExecutionContext):
               actual_type=type(pattern))
 
         self._engine = Engine()
-        plugin = self._engine.get_execution_plugin_for_pattern(
-            pattern_name=pattern.name,
-            context_name=self.name,
-            plugin_name=force_plugin)
+        plugin = self._get_execution_plugin(pattern, force_plugin)
 
 
         self._reporter.info('Verifying pattern')
@@ -128,3 +128,74 @@ class SimpleKernelTests(unittest.TestCase):
         k._bind_to_resource("stampede.tacc.utexas.edu")
         assert k.arguments == ['lsdm.py', '-f','config.ini','-c','tmpha.gro','-n','out.nn','-w','weight.w'], k.arguments
         assert k._cu_def_post_exec == None, k._cu_def_post_exec
+
+    #-------------------------------------------------------------------------
+    #
+    def test__comparison_runner_kernel(self):
+        """Basic test of the comparison runner kernel.
+        """
+        k = radical.ensemblemd.Kernel(name="misc.comparison_runner")
+        k.arguments = ["--comparator=dist.py:dist", "--inputfile1=['a.npy', 'b.npy']",
+                       "--inputfile2=c.npy", "--outputfile=out.dat"]
+        k.cores = 4
+        _kernel = k._bind_to_resource("*")
+        assert type(_kernel) == radical.ensemblemd.kernel_plugins.misc.comparison_runner.Kernel, _kernel
+
+        assert k._cu_def_executable == "python", k._cu_def_executable
+        assert k.arguments == ['compare_runner.py', '--comparator=dist.py:dist', '--cores=4', '--pool=process',
+                               '--pairs=full', '--element_set1', 'a.npy', 'b.npy', '--element_set2', 'c.npy',
+                               '--output_file', 'out.dat'], k.arguments
+        assert k._cu_def_pre_exec == [], k._cu_def_pre_exec
+
+        # The helper scripts are staged exactly once, even if the kernel is
+        # bound more than once.
+        k._bind_to_resource("xsede.stampede")
+        targets = [dd.split(">")[1].strip() for dd in k._cu_def_input_data]
+        assert targets == ["compare_runner.py", "trajcache.py"], targets
+        assert k._cu_def_pre_exec == ["module load python"], k._cu_def_pre_exec
+
+    #-------------------------------------------------------------------------
+    #
+    def test__levenshtein_kernel(self):
+        """Basic test of the Levenshtein kernel.
+        """
+        k = radical.ensemblemd.Kernel(name="misc.levenshtein")
+        k.arguments = ["--inputfile1=['a.txt', 'b.txt']", "--inputfile2=c.txt",
+                       "--outputfile=out.dat", "--max_distance=10"]
+        _kernel = k._bind_to_resource("*")
+        assert type(_kernel) == radical.ensemblemd.kernel_plugins.misc.levenshtein.Kernel, _kernel
+
+        assert k._cu_def_executable == "python", k._cu_def_executable
+        assert k.arguments == ['levenshtein.py', '--max_distance=10', '--pairs=full', '--element_set1', 'a.txt', 'b.txt',
+                               '--element_set2', 'c.txt', '--output_file', 'out.dat'], k.arguments
+        targets = [dd.split(">")[1].strip() for dd in k._cu_def_input_data]
+        assert targets == ["levenshtein.py"], targets
+
+    #-------------------------------------------------------------------------
+    #
+    def test__levenshtein_pairs(self):
+        """Test that the Levenshtein script compares the full pair matrix by default.
+        """
+        import shutil
+        import tempfile
+        from radical.ensemblemd.kernel_plugins.scripts import levenshtein
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            a = os.path.join(tmpdir, "a.txt")
+            b = os.path.join(tmpdir, "b.txt")
+            with open(a, "w") as f:
+                f.write("kitten")
+            with open(b, "w") as f:
+                f.write("sitting")
+
+            assert levenshtein.run([a], [a]) == [(a, a, 0)]
+            assert levenshtein.run([a, b], [a, b]) == [(a, a, 0), (a, b, 3), (b, a, 3), (b, b, 0)]
+            assert levenshtein.run([a, b], [a, b], triangle=True) == [(a, b, 3)]
+        finally:
+            shutil.rmtree(tmpdir)
+
+        k = radical.ensemblemd.Kernel(name="misc.levenshtein")
+        k.arguments = ["--inputfile1=a.txt", "--inputfile2=a.txt", "--outputfile=out.dat", "--pairs=triangle"]
+        k._bind_to_resource("*")
+        assert "--pairs=triangle" in k.arguments, k.arguments
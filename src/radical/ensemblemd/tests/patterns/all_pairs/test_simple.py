@@ -39,6 +39,22 @@ class AllPairsPatternTestCases(unittest.TestCase):
         assert ap.name == "AllPairs"
 
 
+    #-------------------------------------------------------------------------
+    #
+    def test__reuse_cached_elements(self):
+        """ Tests that reusing cached elements is off by default.
+        """
+        from radical.ensemblemd import AllPairs
+
+        ElementsSet = range(1,11)
+
+        ap = AllPairs(ElementsSet)
+        assert ap.reuse_cached_elements is False
+
+        ap = AllPairs(ElementsSet, reuse_cached_elements=True)
+        assert ap.reuse_cached_elements is True
+
+
     #-------------------------------------------------------------------------
     #
     def test__more(self):
@@ -45,4 +45,34 @@ class SimulationAnalysisLoopPatternTestCases(unittest.TestCase):
         from radical.ensemblemd import SimulationAnalysisLoop
 
         dp = SimulationAnalysisLoop(iterations=1)
-        assert dp.name == "SimulationAnalysisLoop"
\ No newline at end of file
+        assert dp.name == "SimulationAnalysisLoop"
+
+    #-------------------------------------------------------------------------
+    #
+    def test__checkpoint_arguments(self):
+        """ Tests the checkpoint and resume arguments.
+        """
+        from radical.ensemblemd import SimulationAnalysisLoop
+        from radical.ensemblemd.exceptions import EnsemblemdError
+
+        dp = SimulationAnalysisLoop(iterations=1)
+        assert dp.checkpoint_file is None
+        assert dp.resume is False
+
+        dp = SimulationAnalysisLoop(iterations=1, checkpoint_file="sal.json", resume=True)
+        assert dp.checkpoint_file == "sal.json"
+        assert dp.resume is True
+
+        with self.assertRaises(EnsemblemdError):
+            SimulationAnalysisLoop(iterations=1, resume=True)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__adaptive_hooks(self):
+        """ Tests the default convergence and instance adaptation hooks.
+        """
+        from radical.ensemblemd import SimulationAnalysisLoop
+
+        dp = SimulationAnalysisLoop(iterations=4, simulation_instances=2)
+        assert dp.check_convergence(iteration=1) is False
+        assert dp.adapt_simulation_instances(iteration=1) is None
@@ -0,0 +1,121 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class ArchiveStagingTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._dir = tempfile.mkdtemp()
+        self._files = list()
+        for name in ["a.pdb", "b.inf", "c.sh"]:
+            path = os.path.join(self._dir, name)
+            with open(path, "w") as f:
+                f.write(name)
+            self._files.append(path)
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__pack_inputs(self):
+        """ Tests that local uploads are packed into a single archive.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.archive_staging import ArchiveStaging, INPUT_ARCHIVE
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.executable = "/bin/date"
+        cud.pre_exec = ["module load amber"]
+        cud.input_staging = ["{0} > in/{1}".format(path, os.path.basename(path)) for path in self._files]
+        cud.input_staging.append({'source': '/remote/data.dat',
+                                  'target': 'data.dat',
+                                  'action': radical.pilot.LINK})
+
+        archives = ArchiveStaging(2)
+        packed, archive = archives.pack_inputs(cud)
+        try:
+            assert packed is not cud
+            assert len(packed.input_staging) == 2
+            assert packed.input_staging[0]['action'] == radical.pilot.LINK
+            assert packed.input_staging[1] == {'source': archive,
+                                               'target': INPUT_ARCHIVE,
+                                               'action': radical.pilot.TRANSFER}
+            assert packed.pre_exec[0].startswith("tar xzf {0}".format(INPUT_ARCHIVE))
+            assert packed.pre_exec[1] == "module load amber"
+
+            tar = tarfile.open(archive)
+            assert sorted(tar.getnames()) == ["in/a.pdb", "in/b.inf", "in/c.sh"]
+            tar.close()
+
+            # The archive is removed once the unit has been waited for.
+            class Unit(object):
+                uid = "unit.0000"
+                state = radical.pilot.DONE
+
+            unit = Unit()
+            archives.add_unit(unit, archive, None)
+            archives.remove_inputs([unit])
+            assert not os.path.exists(archive)
+
+            # Files outside of the sandbox aren't packed.
+            cud.input_staging = ["{0} > ../{1}".format(path, os.path.basename(path)) for path in self._files[:2]]
+            cud.input_staging.append("{0} > /tmp/c.sh".format(self._files[2]))
+            assert archives.pack_inputs(cud) == (cud, None)
+
+            # Units with fewer files are left alone.
+            cud.input_staging = ["{0} > a.pdb".format(self._files[0])]
+            assert archives.pack_inputs(cud) == (cud, None)
+        finally:
+            archives.close()
+
+    #-------------------------------------------------------------------------
+    #
+    def test__pack_outputs(self):
+        """ Tests that downloads are packed and unpacked to their targets.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.archive_staging import ArchiveStaging, OUTPUT_ARCHIVE
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.executable = "/bin/date"
+        cud.output_staging = ["a.pdb > {0}/out/a.pdb".format(self._dir),
+                              "b.inf > {0}/out/b.inf".format(self._dir)]
+
+        archives = ArchiveStaging(2)
+        packed, outputs = archives.pack_outputs(cud)
+        try:
+            assert packed.output_staging == [{'source': OUTPUT_ARCHIVE,
+                                              'target': outputs[0],
+                                              'action': radical.pilot.TRANSFER}]
+            assert packed.post_exec == ["tar czf {0} a.pdb b.inf".format(OUTPUT_ARCHIVE)]
+
+            # Emulate the post_exec command and the download.
+            tar = tarfile.open(outputs[0], "w:gz")
+            tar.add(self._files[0], arcname="a.pdb")
+            tar.add(self._files[1], arcname="b.inf")
+            tar.close()
+
+            class Unit(object):
+                uid = "unit.0000"
+                state = radical.pilot.DONE
+
+            unit = Unit()
+            archives.add_unit(unit, None, outputs)
+            archives.unpack_outputs([unit])
+            with open(os.path.join(self._dir, "out", "b.inf")) as f:
+                assert f.read() == "b.inf"
+            assert not os.path.exists(outputs[0])
+        finally:
+            archives.close()
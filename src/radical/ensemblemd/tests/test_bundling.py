@@ -0,0 +1,101 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class BundlingTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._cwd = os.getcwd()
+        self._tmpdir = tempfile.mkdtemp()
+        os.chdir(self._tmpdir)
+
+    def tearDown(self):
+        # clean up after ourselves
+        os.chdir(self._cwd)
+        shutil.rmtree(self._tmpdir)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__bundle_executor(self):
+        """ Tests that the bundle executor runs all tasks in their directories.
+        """
+        from radical.ensemblemd.kernel_plugins.scripts import bundle_executor
+
+        tasks = [{"workdir": "task_0", "executable": "/bin/echo", "arguments": ["a b"]},
+                 {"workdir": "task_1", "pre_exec": ["export X=1"], "executable": "/bin/sh",
+                  "arguments": ["-c", "test $X = 1"]},
+                 {"workdir": "task_2", "executable": "/bin/false", "cores": 2}]
+
+        assert bundle_executor.decode_tasks(bundle_executor.encode_tasks(tasks)) == tasks
+        assert bundle_executor.run(tasks, 2) == [0, 0, 1]
+        assert open(os.path.join("task_0", "STDOUT")).read() == "a b\n"
+
+        assert bundle_executor.parse_status("BUNDLE_STATUS: 0,0,1\n") == [0, 0, 1]
+        assert bundle_executor.parse_status("") is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__bundle_executor_exit_code(self):
+        """ Tests that the bundle executor succeeds if a task fails.
+        """
+        import subprocess
+        from radical.ensemblemd.kernel_plugins.scripts import bundle_executor, get_script_path
+
+        tasks = [{"workdir": "task_0", "executable": "/bin/true"},
+                 {"workdir": "task_1", "executable": "/bin/false"}]
+
+        process = subprocess.Popen([sys.executable, get_script_path("bundle_executor.py"),
+            "--tasks={0}".format(bundle_executor.encode_tasks(tasks))],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        assert process.returncode == 0
+        assert bundle_executor.parse_status(stdout.decode('utf-8')) == [0, 1]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__create_bundle(self):
+        """ Tests that the input staging of bundled units is moved into their task directories.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.bundling import create_bundle
+
+        cuds = list()
+        for i in range(2):
+            cud = radical.pilot.ComputeUnitDescription()
+            cud.executable = "/bin/date"
+            cud.input_staging = ["input.dat"]
+            cuds.append(cud)
+
+        bundle = create_bundle(cuds, 2)
+        assert bundle.cores == 2
+        assert bundle.input_staging[1:] == [{"source": "input.dat", "target": "task_0/input.dat"},
+                                            {"source": "input.dat", "target": "task_1/input.dat"}]
+        assert bundle.output_staging is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__can_bundle(self):
+        """ Tests that units with output staging aren't bundled.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.bundling import can_bundle
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.executable = "/bin/date"
+        assert can_bundle(cud, 1)
+
+        cud.cores = 2
+        assert not can_bundle(cud, 1)
+        assert can_bundle(cud, 2)
+
+        cud.output_staging = [{"source": "out.dat", "target": "out-0.dat"}]
+        assert not can_bundle(cud, 2)
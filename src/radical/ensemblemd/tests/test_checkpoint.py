@@ -0,0 +1,63 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class CheckpointTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, "checkpoint.json")
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__save_and_load(self):
+        """ Tests that completed steps and working directories are restored.
+        """
+        from radical.ensemblemd.exec_plugins.checkpoint import Checkpoint
+
+        params = {"simulation_instances": 2, "analysis_instances": 1}
+        cp = Checkpoint(self._path, "SimulationAnalysisLoop", "local.localhost", params)
+        assert cp.load() is False
+
+        working_dirs = {"pre_loop": "/sandbox/unit.000000"}
+        cp.complete("pre_loop", working_dirs, ["unit.000000"])
+        working_dirs["iteration_1"] = {"simulation_1": "/sandbox/unit.000001"}
+        cp.complete("iteration_1/simulation", working_dirs, ["unit.000001"])
+
+        cp = Checkpoint(self._path, "SimulationAnalysisLoop", "local.localhost", params)
+        assert cp.load() is True
+        assert cp.steps == ["pre_loop", "iteration_1/simulation"], cp.steps
+        assert cp.is_completed("iteration_1/simulation")
+        assert not cp.is_completed("iteration_1/analysis")
+        assert cp.working_dirs == working_dirs, cp.working_dirs
+        assert cp.get_unit_ids("pre_loop") == ["unit.000000"]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__load_mismatch(self):
+        """ Tests that a checkpoint of other parameters can't be resumed.
+        """
+        from radical.ensemblemd.exceptions import EnsemblemdError
+        from radical.ensemblemd.exec_plugins.checkpoint import Checkpoint
+
+        cp = Checkpoint(self._path, "SimulationAnalysisLoop", "local.localhost", {"simulation_instances": 2})
+        cp.complete("pre_loop", {"pre_loop": "/sandbox/unit.000000"})
+
+        for resource_key, params in [("xsede.stampede", {"simulation_instances": 2}),
+                                     ("local.localhost", {"simulation_instances": 4})]:
+            cp = Checkpoint(self._path, "SimulationAnalysisLoop", resource_key, params)
+            with self.assertRaises(EnsemblemdError):
+                cp.load()
@@ -0,0 +1,86 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class DownloadCacheTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__parse_download(self):
+        """ Tests that the download commands of the kernels are recognized.
+        """
+        from radical.ensemblemd import Kernel
+        from radical.ensemblemd.exec_plugins.download_cache import parse_download
+
+        k = Kernel(name="misc.mkfile")
+        k.download_input_data = ["http://example.org/data/top.prmtop",
+                                 "http://example.org/data/crd > input.crd"]
+        pre_exec = k._cu_def_pre_exec
+
+        assert parse_download(pre_exec[0]) == ("http://example.org/data/top.prmtop", "top.prmtop")
+        assert parse_download(pre_exec[1]) == ("http://example.org/data/crd", "input.crd")
+        assert parse_download("module load amber") is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__link_downloads(self):
+        """ Tests that each URL is fetched once and linked into the units.
+        """
+        import radical.pilot
+        from radical.ensemblemd.kernel import CURL_DOWNLOAD
+        from radical.ensemblemd.exec_plugins.download_cache import DownloadCache, get_entry_name
+
+        good = "http://example.org/top.prmtop"
+        bad  = "http://example.org/missing.crd"
+
+        class Unit(object):
+            uid = "unit.0000"
+            stdout = "URL_CACHE: fetched {0}\nURL_CACHE: failed {1}\n".format(
+                get_entry_name(good), get_entry_name(bad))
+
+        class UnitManager(object):
+            def __init__(self):
+                self.submitted = list()
+            def submit_units(self, cud):
+                self.submitted.append(cud)
+                return Unit()
+            def wait_units(self, uids):
+                pass
+
+        class Resource(object):
+            _umgr = UnitManager()
+
+        cuds = list()
+        for i in range(4):
+            cud = radical.pilot.ComputeUnitDescription()
+            cud.executable = "/bin/date"
+            cud.pre_exec = [CURL_DOWNLOAD.format(good), CURL_DOWNLOAD.format(bad), "module load amber"]
+            cuds.append(cud)
+
+        cache = DownloadCache("/scratch/cache")
+        for step in range(2):
+            linked = cache.link_downloads(Resource(), cuds)
+            for cud in linked:
+                assert cud.pre_exec == [CURL_DOWNLOAD.format(bad), "module load amber"]
+                assert cud.input_staging == [{'source': os.path.join("/scratch/cache", get_entry_name(good)),
+                                              'target': "top.prmtop",
+                                              'action': radical.pilot.LINK}]
+
+        # A single fetch task for both URLs and both steps.
+        assert len(Resource._umgr.submitted) == 1
+        assert Resource._umgr.submitted[0].arguments[2:] == [get_entry_name(good), good,
+                                                             get_entry_name(bad), bad]
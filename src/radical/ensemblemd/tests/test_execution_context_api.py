@@ -50,3 +50,111 @@ class ExecutionContextAPITestCases(unittest.TestCase):
             assert False, "TypeError execption expected."
         except Exception, ex:
             pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__multi_cluster_environment_api(self):
+        """ Test the multi cluster environment API.
+        """
+
+        from radical.ensemblemd import MultiClusterEnvironment
+        from radical.ensemblemd.exceptions import EnsemblemdError
+
+        try:
+            mce = MultiClusterEnvironment(resources=[])
+            assert False, "EnsemblemdError execption expected."
+        except Exception, ex:
+            _exception_test_helper(ex, EnsemblemdError)
+
+        try:
+            mce = MultiClusterEnvironment(
+                resources=[{"resource": "localhost", "cores": 1, "walltime": 1}],
+                scheduler="wrong_scheduler")
+            assert False, "EnsemblemdError execption expected."
+        except Exception, ex:
+            _exception_test_helper(ex, EnsemblemdError)
+
+        mce = MultiClusterEnvironment(
+            resources=[{"resource": "localhost", "cores": 2, "walltime": 1},
+                       {"resource": "localhost", "cores": 4, "walltime": 5}])
+        assert mce.name == "Dynamic"
+        assert mce._cores == 6
+        assert len(mce._create_pilot_descriptions()) == 2
+
+    #-------------------------------------------------------------------------
+    #
+    def test__single_cluster_environment_elastic(self):
+        """ Test that elastic mode uses a load-balancing unit scheduler.
+        """
+        import radical.pilot
+        from radical.ensemblemd import SingleClusterEnvironment
+
+        sec = SingleClusterEnvironment(
+            resource="localhost",
+            cores=1,
+            walltime=1
+        )
+        assert sec._scheduler == radical.pilot.SCHED_DIRECT_SUBMISSION
+
+        sec = SingleClusterEnvironment(
+            resource="localhost",
+            cores=1,
+            walltime=1,
+            elastic=True,
+            max_pilots=2
+        )
+        assert sec._scheduler == radical.pilot.SCHED_BACKFILLING
+
+    #-------------------------------------------------------------------------
+    #
+    def test__failure_policy(self):
+        """ Test the failure policy of the execution contexts.
+        """
+        from radical.ensemblemd import SingleClusterEnvironment
+        from radical.ensemblemd.exceptions import EnsemblemdError
+
+        sec = SingleClusterEnvironment(
+            resource="localhost",
+            cores=1,
+            walltime=1
+        )
+        assert sec._failure_policy == "abort"
+
+        try:
+            sec = SingleClusterEnvironment(
+                resource="localhost",
+                cores=1,
+                walltime=1,
+                failure_policy="wrong_policy"
+            )
+            assert False, "EnsemblemdError execption expected."
+        except Exception, ex:
+            _exception_test_helper(ex, EnsemblemdError)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__runtime_limits(self):
+        """ Test the kernel runtime limit and the step timeout.
+        """
+        from radical.ensemblemd import Kernel
+        from radical.ensemblemd import SingleClusterEnvironment
+        from radical.ensemblemd.exceptions import TypeError
+
+        k = Kernel(name="misc.mkfile")
+        assert k.max_runtime is None
+        k.max_runtime = 600
+        assert k.max_runtime == 600
+
+        try:
+            k.max_runtime = "600"
+            assert False, "TypeError execption expected."
+        except Exception, ex:
+            _exception_test_helper(ex, TypeError)
+
+        sec = SingleClusterEnvironment(
+            resource="localhost",
+            cores=1,
+            walltime=1,
+            step_timeout=3600
+        )
+        assert sec._step_timeout == 3600
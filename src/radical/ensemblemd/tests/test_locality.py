@@ -0,0 +1,133 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import time
+import socket
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class LocalityTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__producer_nodes(self):
+        """ Tests that the producer nodes of the working directories are recorded.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.locality import ProducerNodes
+
+        class Unit(object):
+            def __init__(self, state, sandbox, locations):
+                self.state = state
+                self.working_directory = sandbox
+                self.execution_locations = locations
+
+        nodes = ProducerNodes()
+        nodes.record([Unit(radical.pilot.DONE, "/work/unit.0000/", ["node01:0", "node01:1"]),
+                      Unit(radical.pilot.FAILED, "/work/unit.0001/", ["node02:0"]),
+                      Unit(radical.pilot.DONE, "/work/unit.0002/", None)])
+
+        assert nodes.get_node("/work/unit.0000") == "node01"
+        assert nodes.get_node("/work/unit.0000/md/out.crd") == "node01"
+        assert nodes.get_node("/work/unit.0001/out.crd") is None
+        assert nodes.get_node("/work/unit.0002/out.crd") is None
+        assert nodes.get_node("/data/out.crd") is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__localize(self):
+        """ Tests that links to recorded working directories go through the node cache.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.locality import ProducerNodes, NODE_CACHE
+
+        nodes = ProducerNodes()
+        nodes._nodes = {"/work/unit.0000": "node01", "/work/unit.0001": "node02"}
+
+        link = {'source': "/data/input.crd", 'target': "input.crd", 'action': radical.pilot.LINK}
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = "analysis"
+        cud.executable = "/bin/date"
+        cud.pre_exec = ["module load amber"]
+        cud.input_staging = [link]
+        assert nodes.localize(cud) is cud
+
+        cud.input_staging = [link, "local.txt",
+                             {'source': "/work/unit.0000/md.crd", 'target': "md_0.crd", 'action': radical.pilot.LINK},
+                             {'source': "/work/unit.0001/md.crd", 'target': "md_1.crd", 'action': radical.pilot.LINK},
+                             {'source': "/work/unit.0000/md.crd", 'target': "md.crd", 'action': radical.pilot.COPY}]
+        localized = nodes.localize(cud)
+
+        assert localized.input_staging[:2] == [link, "local.txt"]
+        assert localized.input_staging[2]['action'] == radical.pilot.COPY
+        assert localized.input_staging[3]['target'] == NODE_CACHE
+        assert os.path.basename(localized.input_staging[3]['source']) == NODE_CACHE
+        assert localized.pre_exec == [
+            "python node_cache.py /work/unit.0000/md.crd md_0.crd node01 /work/unit.0001/md.crd md_1.crd node02",
+            "module load amber"]
+
+        # The original description is unchanged.
+        assert cud.pre_exec == ["module load amber"]
+        assert len(cud.input_staging) == 5
+
+    #-------------------------------------------------------------------------
+    #
+    def test__node_cache(self):
+        """ Tests that the node_cache.py script links through the node-local cache.
+        """
+        from radical.ensemblemd.kernel_plugins.scripts import node_cache
+
+        cache_dir = os.path.join(self._dir, "cache")
+        os.environ[node_cache.CACHE_DIR_ENV] = cache_dir
+        try:
+            source = os.path.join(self._dir, "md.crd")
+            with open(source, 'w') as f:
+                f.write("coordinates")
+
+            remote = os.path.join(self._dir, "remote.crd")
+            local  = os.path.join(self._dir, "local.crd")
+            node_cache.link(source, remote, "-")
+            node_cache.link(source, local, socket.gethostname())
+
+            assert os.path.dirname(os.readlink(remote)) == cache_dir
+            assert open(remote).read() == "coordinates"
+            assert os.readlink(local) == os.path.realpath(source)
+
+            # A second unit on the same node reuses the cached copy.
+            again = os.path.join(self._dir, "again.crd")
+            node_cache.link(source, again, "-")
+            assert os.readlink(again) == os.readlink(remote)
+            assert len(os.listdir(cache_dir)) == 1
+
+            # Files that don't fit into the cache are linked directly.
+            os.environ[node_cache.MAX_SIZE_ENV] = str(16 / (1024.0 * 1024.0))
+            other = os.path.join(self._dir, "other.crd")
+            with open(other, 'w') as f:
+                f.write("more coordinates")
+            node_cache.link(other, os.path.join(self._dir, "recent.crd"), "-")
+            assert os.readlink(os.path.join(self._dir, "recent.crd")) == os.path.realpath(other)
+
+            # Entries that weren't used recently are evicted to make room.
+            old = time.time() - 2 * node_cache.MIN_IDLE
+            os.utime(os.readlink(remote), (old, old))
+            node_cache.link(other, os.path.join(self._dir, "evicted.crd"), "-")
+            assert os.path.dirname(os.readlink(os.path.join(self._dir, "evicted.crd"))) == cache_dir
+            assert not os.path.exists(os.readlink(remote))
+        finally:
+            del os.environ[node_cache.CACHE_DIR_ENV]
+            os.environ.pop(node_cache.MAX_SIZE_ENV, None)
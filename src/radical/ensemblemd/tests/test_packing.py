@@ -0,0 +1,41 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class PackingTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__plan(self):
+        """ Tests that large units are placed first and small units backfill.
+        """
+        from radical.ensemblemd.exec_plugins.packing import plan
+
+        # Submitted as is, the 2-core units would occupy 4 of 8 cores and
+        # the 8-core unit would have to wait for all of them.
+        packing = plan([2, 2, 8, 2, 2], 8)
+        assert packing.order[0] == 2, packing.order
+        assert packing.makespan == 2.0, packing.makespan
+        assert packing.utilization == 1.0, packing.utilization
+
+        packing = plan([4, 4, 4], 8, runtimes=[1.0, 2.0, 1.0])
+        assert packing.start_times == [0.0, 0.0, 1.0], packing.start_times
+        assert packing.makespan == 2.0, packing.makespan
+
+        # Units larger than the pilot are planned as whole-pilot units.
+        packing = plan([16, 1], 8)
+        assert packing.makespan == 2.0, packing.makespan
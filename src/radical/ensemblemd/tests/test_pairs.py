@@ -0,0 +1,58 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class PairEnumerationTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__pair_indices(self):
+        """ Tests the upper triangular and rectangular pair indices.
+        """
+        from radical.ensemblemd.utils.pairs import pair_indices
+
+        i, j = pair_indices(4)
+        assert zip(list(i), list(j)) == [(0,1),(0,2),(0,3),(1,2),(1,3),(2,3)]
+
+        i, j = pair_indices(2, 3, start=1)
+        assert zip(list(i), list(j)) == [(1,1),(1,2),(1,3),(2,1),(2,2),(2,3)]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__iter_pair_chunks(self):
+        """ Tests that chunked iteration yields all pairs in order.
+        """
+        from radical.ensemblemd.utils.pairs import num_pairs, pair_indices, iter_pair_chunks
+
+        for n1, n2 in [(10, None), (7, 5)]:
+            pairs = list()
+            for i, j in iter_pair_chunks(n1, n2, chunk_size=4):
+                assert len(i) <= 4
+                pairs.extend(zip(list(i), list(j)))
+            i, j = pair_indices(n1, n2)
+            assert pairs == zip(list(i), list(j))
+            assert len(pairs) == num_pairs(n1, n2)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__window_blocks(self):
+        """ Tests the enumeration of ragged window blocks.
+        """
+        from radical.ensemblemd.utils.pairs import window_blocks
+
+        assert list(window_blocks(3, 2)) == [([1,2],[1,2]), ([1,2],[3]), ([3],[3])]
+        assert list(window_blocks(3, 2, 2, 1)) == [([1,2],[1]), ([1,2],[2]), ([3],[1]), ([3],[2])]
@@ -0,0 +1,77 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class ReadOnlyInputsTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__link_read_only_inputs(self):
+        """ Tests that copies of read-only inputs are turned into links.
+        """
+        import radical.pilot
+        from radical.ensemblemd import Kernel
+        from radical.ensemblemd.exceptions import TypeError
+        from radical.ensemblemd.exec_plugins.staging import link_read_only_inputs
+
+        k = Kernel(name="misc.mkfile")
+        assert k.read_only_input_data is None
+        k.read_only_input_data = "md.crd"
+        assert k.read_only_input_data == ["md.crd"]
+        k.read_only_input_data = True
+        assert k.read_only_input_data is True
+
+        with self.assertRaises(TypeError):
+            k.read_only_input_data = [1]
+
+        directives = [{'source': '/data/md.crd', 'target': 'md.crd', 'action': radical.pilot.COPY},
+                      {'source': '/data/md.inf', 'target': 'md.inf', 'action': radical.pilot.COPY},
+                      {'source': 'input.dat', 'target': 'md.crd'}]
+
+        linked = link_read_only_inputs(directives, ["./md.crd"])
+        assert linked[0]['action'] == radical.pilot.LINK
+        assert linked[1]['action'] == radical.pilot.COPY
+        assert 'action' not in linked[2]
+        assert directives[0]['action'] == radical.pilot.COPY
+
+        linked = link_read_only_inputs(directives, True)
+        assert [d.get('action') for d in linked] == [radical.pilot.LINK, radical.pilot.LINK, None]
+
+        assert link_read_only_inputs(directives, None) is directives
+
+    #-------------------------------------------------------------------------
+    #
+    def test__reflink_copies(self):
+        """ Tests that absolute copies are made with reflinks.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.staging import reflink_copies
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.executable = "/bin/date"
+        cud.pre_exec = ["module load amber"]
+        cud.input_staging = [{'source': '/data/traj.dcd', 'target': 'in/traj.dcd', 'action': radical.pilot.COPY},
+                             {'source': 'staging:///md.crd', 'target': 'md.crd', 'action': radical.pilot.COPY}]
+
+        copy = reflink_copies(cud)
+        assert copy.input_staging == [cud.input_staging[1]]
+        assert copy.pre_exec == ["mkdir -p in",
+                                 "cp -R --reflink=auto /data/traj.dcd in/traj.dcd",
+                                 "module load amber"]
+
+        cud.input_staging = cud.input_staging[1:]
+        assert reflink_copies(cud) is cud
@@ -0,0 +1,127 @@
+""" Tests cases
+"""
+import os
+import sys
+import pipes
+import shutil
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class ResultCacheTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._dir = tempfile.mkdtemp()
+        self._input = os.path.join(self._dir, "input.dat")
+        with open(self._input, "w") as f:
+            f.write("1 2 3\n")
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    def _cud(self, arguments, input_staging=None):
+        import radical.pilot
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = "sim"
+        cud.executable = "/bin/cat"
+        cud.arguments = arguments
+        cud.input_staging = input_staging
+        return cud
+
+    def _launch(self, cud, sandbox):
+        # Runs 'cud' in 'sandbox' like the launch script of radical.pilot.
+        import subprocess
+        script = list(cud.pre_exec or [])
+        script.append(" ".join([pipes.quote(arg) for arg in [cud.executable] + cud.arguments]))
+        script.append("RETVAL=$?")
+        script.extend(cud.post_exec or [])
+        script.append("exit $RETVAL")
+        return subprocess.call(["/bin/sh", "-c", "\n".join(script)], cwd=sandbox)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__get_key(self):
+        """ Tests that the key depends on the arguments and input contents.
+        """
+        from radical.ensemblemd.exec_plugins.result_cache import ResultCache
+
+        cache = ResultCache("/tmp/enmd_cache")
+        upload = ["{0} > input.dat".format(self._input)]
+
+        key = cache.get_key(self._cud(["input.dat"], upload))
+        assert key is not None
+        assert key == cache.get_key(self._cud(["input.dat"], upload))
+        assert key != cache.get_key(self._cud(["-n", "input.dat"], upload))
+
+        os.utime(self._input, (0, 0))
+        with open(self._input, "w") as f:
+            f.write("4 5 6\n")
+        assert key != cache.get_key(self._cud(["input.dat"], upload))
+
+        # Files on the resource that don't come from a cached unit can't be
+        # identified.
+        assert cache.get_key(self._cud(["input.dat"], ["staging:///input.dat"])) is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__get_key_from_cached_unit(self):
+        """ Tests that inputs from cached units are identified by their keys.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.result_cache import ResultCache
+
+        class Unit(object):
+            state = radical.pilot.DONE
+            working_directory = "/sandbox/unit.000000/"
+
+        cache = ResultCache("/tmp/enmd_cache")
+        link = [{'source': '/sandbox/unit.000000/out.dat',
+                 'target': 'out.dat',
+                 'action': radical.pilot.LINK}]
+        assert cache.get_key(self._cud(["out.dat"], link)) is None
+
+        cache.add_units([Unit()], ["0123abcd"])
+        key = cache.get_key(self._cud(["out.dat"], link))
+        assert key is not None
+
+        cache.add_units([Unit()], ["4567abcd"])
+        assert key != cache.get_key(self._cud(["out.dat"], link))
+
+    #-------------------------------------------------------------------------
+    #
+    def test__store_and_restore(self):
+        """ Tests that a stored sandbox is restored into a new sandbox.
+        """
+        import subprocess
+        from radical.ensemblemd.exec_plugins.result_cache import ResultCache, COPY
+
+        cache = ResultCache(os.path.join(self._dir, "cache"), mode=COPY)
+        cud = self._cud(["input.dat"])
+        cud.executable = "/bin/sh"
+        cud.arguments = ["-c", "echo result > out.dat"]
+
+        for name in ["sandbox1", "sandbox2", "sandbox3"]:
+            os.mkdir(os.path.join(self._dir, name))
+
+        # The executable and its arguments are passed through unchanged.
+        store = cache.create_store_description(cud, "0123abcd")
+        assert store.executable == cud.executable and store.arguments == cud.arguments
+        assert self._launch(store, os.path.join(self._dir, "sandbox1")) == 0
+        assert os.path.isfile(os.path.join(self._dir, "cache", "0123abcd", "out.dat"))
+
+        # A failed unit isn't stored and keeps its exit code.
+        cud.arguments = ["-c", "echo partial > out.dat; exit 3"]
+        store = cache.create_store_description(cud, "4567ef01")
+        assert self._launch(store, os.path.join(self._dir, "sandbox3")) == 3
+        assert not os.path.exists(os.path.join(self._dir, "cache", "4567ef01"))
+
+        restore = cache.create_restore_description(cud, "0123abcd")
+        assert restore.input_staging is None
+        subprocess.check_call([restore.executable] + restore.arguments, cwd=os.path.join(self._dir, "sandbox2"))
+        with open(os.path.join(self._dir, "sandbox2", "out.dat")) as f:
+            assert f.read() == "result\n"
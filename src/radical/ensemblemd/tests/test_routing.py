@@ -0,0 +1,159 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class RoutingTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    def _kernel(self, name, configs):
+        from radical.ensemblemd.exceptions import NoKernelConfigurationError
+
+        class Kernel(object):
+            def __init__(self):
+                self.name = name
+                self.cores = 1
+                self.uses_mpi = False
+                self.arguments = ["--in=a"]
+            def _bind_to_resource(self, resource_key, pattern_name=None):
+                if resource_key not in configs:
+                    raise NoKernelConfigurationError(kernel_name=name, resource_key=resource_key)
+                self._cu_def_pre_exec = list(configs[resource_key])
+                self._cu_def_executable = "/bin/" + name
+
+        return Kernel()
+
+    def _cud(self, kernel, input_staging=None, output_staging=None):
+        import radical.pilot
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = kernel.name
+        cud.pre_exec = kernel._cu_def_pre_exec
+        cud.executable = kernel._cu_def_executable
+        cud.arguments = kernel.arguments
+        cud.mpi = kernel.uses_mpi
+        cud.cores = kernel.cores
+        cud.input_staging = input_staging
+        cud.output_staging = output_staging
+        return cud
+
+    #-------------------------------------------------------------------------
+    #
+    def test__load(self):
+        """ Tests that the cores of finished units don't count towards the load.
+        """
+        import radical.pilot
+        from radical.ensemblemd.multi_cluster_environment import UnitManagerGroup
+
+        class Unit(object):
+            def __init__(self, uid):
+                self.uid = uid
+                self.state = radical.pilot.EXECUTING
+
+        class UnitManager(object):
+            count = 0
+            def submit_units(self, cuds):
+                units = list()
+                for cud in cuds:
+                    UnitManager.count += 1
+                    units.append(Unit("unit.{0:04d}".format(UnitManager.count)))
+                return units
+
+        umgr = UnitManagerGroup({"a": UnitManager(), "b": UnitManager()}, {"a": 2, "b": 2})
+        cuds = [radical.pilot.ComputeUnitDescription() for i in range(2)]
+
+        units = umgr.submit_units(cuds)
+        assert [umgr.get_resource_key(unit.uid) for unit in units] == ["a", "b"]
+
+        # Resource a is idle again, so the next units are placed there.
+        units[0].state = radical.pilot.DONE
+        units = umgr.submit_units(cuds)
+        assert [umgr.get_resource_key(unit.uid) for unit in units] == ["a", "a"]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__routes(self):
+        """ Tests that units are placed on the resources their kernels are bound to.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exceptions import EnsemblemdError
+        from radical.ensemblemd.exec_plugins.routing import Router
+        from radical.ensemblemd.exec_plugins.staging import StagingExchange
+        from radical.ensemblemd.exec_plugins.submission import submit_units
+        from radical.ensemblemd.multi_cluster_environment import UnitManagerGroup
+
+        class Unit(object):
+            def __init__(self, uid, key):
+                self.uid = uid
+                self.state = radical.pilot.DONE
+                self.working_directory = "/{0}/{1}/".format(key, uid)
+
+        class UnitManager(object):
+            count = 0
+            def __init__(self, key):
+                self.key = key
+            def submit_units(self, cuds):
+                units = list()
+                for cud in cuds:
+                    UnitManager.count += 1
+                    units.append(Unit("unit.{0:04d}".format(UnitManager.count), self.key))
+                return units
+
+        class Pilot(object):
+            uid = "pilot.0000"
+            sandbox = "/a/pilot.0000"
+
+        exchange = StagingExchange()
+        exchange.set_pilot(Pilot(), "a")
+
+        class Resource(object):
+            _router = Router({"a": 4, "b": 12})
+            _staging_exchange = exchange
+            _umgr = UnitManagerGroup({"a": UnitManager("a"), "b": UnitManager("b")}, {"a": 4, "b": 12})
+
+        resource = Resource()
+
+        # Kernels are bound to the least loaded resource.
+        kernels = [self._kernel("md", {"a": ["module load a"], "b": ["module load b"]}) for i in range(4)]
+        for kernel in kernels:
+            resource._router.bind_kernel(kernel)
+        assert [kernel._cu_def_pre_exec for kernel in kernels] == \
+            [["module load a"], ["module load b"], ["module load b"], ["module load b"]]
+
+        units = submit_units(resource, [self._cud(kernel) for kernel in kernels])
+        keys = [resource._umgr.get_resource_key(unit.uid) for unit in units]
+        assert keys == ["a", "b", "b", "b"], keys
+        resource._router.record(resource, units)
+
+        # Units that stage input from a sandbox follow it.
+        generic = self._kernel("analysis", {"a": [], "b": []})
+        resource._router.bind_kernel(generic)
+        cud = self._cud(generic, [{'source': units[0].working_directory + "out.dat",
+                                   'target': "in.dat", 'action': radical.pilot.LINK}])
+        assert resource._umgr.get_resource_key(submit_units(resource, [cud])[0].uid) == "a"
+
+        # Units that exchange files through the staging area run on the
+        # resource of the exchange pilot.
+        cud = self._cud(generic, None, [{'source': "out.dat", 'target': "staging:///out.dat",
+                                         'action': radical.pilot.LINK}])
+        assert resource._router.get_routes([cud], exchange) == [frozenset(["a"])]
+        assert exchange.rewrite(cud).output_staging[0]['target'] == "/a/pilot.0000/staging_area/out.dat"
+        assert cud.output_staging[0]['target'] == "staging:///out.dat"
+
+        only_b = self._kernel("exchange", {"b": []})
+        resource._router.bind_kernel(only_b)
+        cud = self._cud(only_b, None, [{'source': "out.dat", 'target': "staging:///out.dat",
+                                        'action': radical.pilot.LINK}])
+        with self.assertRaises(EnsemblemdError):
+            submit_units(resource, [cud])
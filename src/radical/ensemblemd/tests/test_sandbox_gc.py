@@ -0,0 +1,128 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class SandboxGCTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__retention(self):
+        """ Tests that the sandbox retention must be positive.
+        """
+        from radical.ensemblemd.exceptions import EnsemblemdError
+        from radical.ensemblemd.exec_plugins.sandbox_gc import SandboxGC
+
+        with self.assertRaises(EnsemblemdError):
+            SandboxGC(0)
+        assert SandboxGC(2).retention == 2
+
+    #-------------------------------------------------------------------------
+    #
+    def test__collect(self):
+        """ Tests that the sandboxes outside of the retention are removed once.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exceptions import EnsemblemdError
+        from radical.ensemblemd.exec_plugins.sandbox_gc import SandboxGC
+
+        class Unit(object):
+            def __init__(self, uid):
+                self.uid = uid
+                self.state = radical.pilot.DONE
+                self.stderr = ""
+
+        class UnitManager(object):
+            def __init__(self):
+                self.submitted = list()
+                self.waited = list()
+            def submit_units(self, cud):
+                self.submitted.append(cud)
+                return Unit("unit.{0:04d}".format(len(self.submitted)))
+            def wait_units(self, uids):
+                self.waited.extend(uids)
+
+        class Resource(object):
+            _umgr = UnitManager()
+
+        working_dirs = {"pre_loop": "/sb/pre"}
+        for n in range(1, 4):
+            working_dirs["iteration_{0}".format(n)] = {
+                "simulation_1": "/sb/sim_{0}/".format(n),
+                "analysis_1": "/sb/ana_{0}/".format(n)}
+
+        gc = SandboxGC(2)
+        resource = Resource()
+
+        gc.collect(resource, working_dirs, 2)
+        assert resource._umgr.submitted == []
+
+        gc.collect(resource, working_dirs, 3)
+        gc.collect(resource, working_dirs, 3)
+        assert len(resource._umgr.submitted) == 1
+        cleanup = resource._umgr.submitted[0]
+        assert cleanup.executable == "/bin/rm"
+        assert cleanup.arguments == ["-rf", "/sb/ana_1", "/sb/sim_1"]
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = "analysis"
+        cud.input_staging = [{'source': "/sb/sim_2/out.crd", 'target': "in.crd", 'action': radical.pilot.LINK},
+                             "input.dat"]
+        gc.check([cud])
+
+        cud.input_staging.append("/sb/sim_1/out.crd > old.crd")
+        with self.assertRaises(EnsemblemdError):
+            gc.check([cud])
+
+        assert gc.close(resource) == 0
+        assert resource._umgr.waited == ["unit.0001"]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__collect_routed(self):
+        """ Tests that the sandboxes are removed on the resources they are on.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.routing import Router
+        from radical.ensemblemd.exec_plugins.sandbox_gc import SandboxGC
+
+        class Unit(object):
+            def __init__(self, uid, working_directory=None):
+                self.uid = uid
+                self.state = radical.pilot.DONE
+                self.working_directory = working_directory
+
+        class UnitManager(object):
+            def __init__(self):
+                self.submitted = list()
+            def get_resource_key(self, uid):
+                return uid.split(".")[0]
+            def submit_units(self, cuds, routes):
+                self.submitted.extend(zip(cuds, routes))
+                return [Unit("unit.{0:04d}".format(len(self.submitted)))]
+
+        class Resource(object):
+            _umgr = UnitManager()
+            _router = Router({"a": 1, "b": 1})
+
+        resource = Resource()
+        resource._router.record(resource, [Unit("a.0", "/sb/sim_1/"), Unit("b.1", "/sb/ana_1/")])
+
+        gc = SandboxGC(1)
+        gc.collect(resource, {"iteration_1": {"simulation_1": "/sb/sim_1/", "analysis_1": "/sb/ana_1/"}}, 2)
+
+        assert [(cud.arguments, route) for cud, route in resource._umgr.submitted] == \
+            [(["-rf", "/sb/sim_1"], frozenset(["a"])), (["-rf", "/sb/ana_1"], frozenset(["b"]))]
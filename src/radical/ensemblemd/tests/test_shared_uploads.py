@@ -0,0 +1,100 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class SharedUploadsTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._shared = os.path.join(self._dir, "shared.dat")
+        self._single = os.path.join(self._dir, "single.dat")
+        for path in [self._shared, self._single]:
+            with open(path, "w") as f:
+                f.write(path)
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    def _cuds(self, n):
+        import radical.pilot
+        cuds = list()
+        for i in range(n):
+            cud = radical.pilot.ComputeUnitDescription()
+            cud.input_staging = [{'source': self._shared, 'target': 'input.dat'}]
+            if i == 0:
+                cud.input_staging.append("{0} > single.dat".format(self._single))
+            cuds.append(cud)
+        return cuds
+
+    #-------------------------------------------------------------------------
+    #
+    def test__deduplicate(self):
+        """ Tests that shared files are staged once and linked.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.staging import SharedUploads
+
+        class Pilot(object):
+            uid = "pilot.0000"
+            state = radical.pilot.ACTIVE
+            def __init__(self):
+                self.staged = list()
+            def stage_in(self, directives):
+                self.staged.extend(directives)
+
+        pilot = Pilot()
+        uploads = SharedUploads()
+
+        cuds = uploads.deduplicate([pilot], self._cuds(4))
+        assert len(pilot.staged) == 1, pilot.staged
+        assert pilot.staged[0]['source'] == self._shared
+        for cud in cuds:
+            assert cud.input_staging[0]['action'] == radical.pilot.LINK
+            assert cud.input_staging[0]['source'] == pilot.staged[0]['target']
+            assert cud.input_staging[0]['target'] == 'input.dat'
+
+        # A file that is used by a single unit is uploaded as is the first
+        # time, and shared when it is used again.
+        assert cuds[0].input_staging[1] == "{0} > single.dat".format(self._single)
+
+        cuds = uploads.deduplicate([pilot], self._cuds(1))
+        assert len(pilot.staged) == 2, pilot.staged
+        assert cuds[0].input_staging[1]['action'] == radical.pilot.LINK
+
+    #-------------------------------------------------------------------------
+    #
+    def test__resubmit(self):
+        """ Tests that retried descriptions stage the shared files into replacement pilots.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.staging import SharedUploads
+
+        class Pilot(object):
+            state = radical.pilot.ACTIVE
+            def __init__(self, uid):
+                self.uid = uid
+                self.staged = list()
+            def stage_in(self, directives):
+                self.staged.extend(directives)
+
+        pilot = Pilot("pilot.0000")
+        uploads = SharedUploads()
+
+        originals = self._cuds(2)
+        cuds = uploads.deduplicate([pilot], originals)
+        assert cuds[0] is not originals[0]
+        assert originals[0].input_staging[0] == {'source': self._shared, 'target': 'input.dat'}
+
+        pilot.state = radical.pilot.FAILED
+        replacement = Pilot("pilot.0001")
+        cuds = uploads.deduplicate([pilot, replacement], originals[1:])
+        assert len(replacement.staged) == 1, replacement.staged
+        assert cuds[0].input_staging[0]['action'] == radical.pilot.LINK
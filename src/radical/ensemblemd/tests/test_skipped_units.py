@@ -0,0 +1,52 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class SkippedUnitsTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__split(self):
+        """ Tests that units that stage their input from skipped units are skipped.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.skipped_units import SkippedUnits
+
+        class Unit(object):
+            def __init__(self, working_directory):
+                self.working_directory = working_directory
+
+        skipped_units = SkippedUnits()
+        skipped_units.record([Unit("/sb/sim_1/")])
+
+        cud1 = radical.pilot.ComputeUnitDescription()
+        cud1.name = "analysis_1"
+        cud1.input_staging = [{'source': "/sb/sim_1/out.crd", 'target': "in.crd", 'action': radical.pilot.LINK}]
+        cud2 = radical.pilot.ComputeUnitDescription()
+        cud2.name = "analysis_2"
+        cud2.input_staging = ["/sb/sim_2/out.crd > in.crd", "input.dat"]
+
+        skipped = skipped_units.split([cud1, cud2])
+        assert skipped[1] is None
+        assert skipped[0].uid is None
+        assert skipped[0].state == radical.pilot.CANCELED
+        assert skipped[0].working_directory == "/sb/sim_1"
+
+        # Units that stage their input from a skipped unit are skipped as well.
+        skipped_units.record(skipped[:1])
+        cud2.input_staging = ["/sb/sim_1/ana/out.dat"]
+        assert skipped_units.split([cud2])[0] is not None
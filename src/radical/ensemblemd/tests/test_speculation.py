@@ -0,0 +1,62 @@
+""" Tests cases
+"""
+import os
+import sys
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class SpeculationTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__create_copy(self):
+        """ Tests that speculative copies don't stage any output.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.speculation import create_copy
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = "sim ;1 ;1"
+        cud.executable = "/bin/date"
+        cud.cores = 4
+        cud.input_staging = ["input.dat"]
+        cud.output_staging = ["output.dat"]
+
+        copy = create_copy(cud)
+        assert copy.executable == "/bin/date"
+        assert copy.cores == 4
+        assert copy.input_staging == ["input.dat"]
+        assert copy.output_staging is None
+
+    #-------------------------------------------------------------------------
+    #
+    def test__create_stage_out(self):
+        """ Tests that the output is staged from the winner's sandbox.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.speculation import create_stage_out
+
+        class Unit(object):
+            working_directory = "/sandbox/unit.000004/"
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.name = "sim ;1 ;1"
+        cud.output_staging = ["output.dat > result.dat"]
+
+        stage_out = create_stage_out(cud, Unit())
+        assert stage_out.input_staging == [{
+            'source': '/sandbox/unit.000004/output.dat',
+            'target': 'output.dat',
+            'action': radical.pilot.LINK}], stage_out.input_staging
+        assert stage_out.output_staging == ["output.dat > result.dat"]
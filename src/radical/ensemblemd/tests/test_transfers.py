@@ -0,0 +1,105 @@
+""" Tests cases
+"""
+import os
+import sys
+import time
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class TransfersTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        pass
+
+    def tearDown(self):
+        # clean up after ourselves
+        pass
+
+    #-------------------------------------------------------------------------
+    #
+    def test__defer_downloads(self):
+        """ Tests that only downloads are removed from the output staging.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.transfers import TransferManager
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.executable = "/bin/date"
+        cud.cores = 2
+        cud.output_staging = ["output.dat > result.dat",
+                              {'source': 'traj.dcd',
+                               'target': 'staging:///traj.dcd',
+                               'action': radical.pilot.COPY}]
+
+        copy, downloads = TransferManager(2).defer_downloads(cud)
+        assert copy is not cud
+        assert copy.executable == "/bin/date"
+        assert copy.cores == 2
+        assert len(copy.output_staging) == 1
+        assert copy.output_staging[0]['action'] == radical.pilot.COPY
+        assert downloads == [{'source': 'output.dat', 'target': 'result.dat'}]
+        assert len(cud.output_staging) == 2
+
+        cud.output_staging = None
+        copy, downloads = TransferManager(2).defer_downloads(cud)
+        assert copy is cud
+        assert downloads == []
+
+    #-------------------------------------------------------------------------
+    #
+    def test__run(self):
+        """ Tests that transfers are executed in parallel.
+        """
+        from radical.ensemblemd.exceptions import EnsemblemdError
+        from radical.ensemblemd.exec_plugins.transfers import TransferManager, UPLOAD
+
+        class SlowTransferManager(TransferManager):
+            def _transfer(self, worker, transfer):
+                time.sleep(0.1)
+                if transfer[2] == "broken":
+                    raise Exception("broken")
+                return 1024 * 1024
+
+        manager = SlowTransferManager(4)
+        start = time.time()
+        manager.run([(UPLOAD, None, "file_{0}".format(i), "/tmp/file") for i in range(8)])
+        assert time.time() - start < 0.4
+        assert manager.throughput > 0
+
+        with self.assertRaises(EnsemblemdError):
+            manager.run([(UPLOAD, None, "broken", "/tmp/file")])
+
+    #-------------------------------------------------------------------------
+    #
+    def test__background_downloads(self):
+        """ Tests that background downloads are copied to the staging area.
+        """
+        import radical.pilot
+        from radical.ensemblemd import Kernel
+        from radical.ensemblemd.exec_plugins.transfers import BackgroundDownloads
+
+        k = Kernel(name="misc.mkfile")
+        k.background_download_output_data = "log.txt > logs/log-1.txt"
+        assert k.background_download_output_data == ["log.txt > logs/log-1.txt"]
+
+        cud = radical.pilot.ComputeUnitDescription()
+        cud.output_staging = ["output.dat"]
+
+        downloads = BackgroundDownloads()
+        copy = downloads.add_directives(cud, [{'source': 'log.txt', 'target': 'logs/log-1.txt'}])
+        assert cud.output_staging == ["output.dat"]
+        assert len(copy.output_staging) == 2
+        assert copy.output_staging[1] == {'source': 'log.txt',
+                                          'target': 'staging:///enmd_background/1_log-1.txt',
+                                          'action': radical.pilot.COPY}
+
+        # Nothing is downloaded for units that failed.
+        class Unit(object):
+            state = radical.pilot.FAILED
+
+        downloads.enqueue(None, [Unit()], [copy])
+        assert downloads.close() == 0
@@ -0,0 +1,101 @@
+""" Tests cases
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+
+#-----------------------------------------------------------------------------
+#
+class UploadManifestTestCases(unittest.TestCase):
+    # silence deprecation warnings under py3
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._dir = tempfile.mkdtemp()
+        self._input = os.path.join(self._dir, "input.dat")
+        with open(self._input, "w") as f:
+            f.write("coordinates")
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._dir)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__hash_file(self):
+        """ Tests that files are hashed by their content.
+        """
+        from radical.ensemblemd.exec_plugins.upload_manifest import hash_file, UploadManifest
+
+        assert hash_file(self._input, block_size=4) == hashlib.sha1("coordinates").hexdigest()
+
+        manifest = UploadManifest("/scratch/uploads")
+        name = manifest.get_name(self._input)
+        assert name.endswith("_input.dat")
+
+        os.utime(self._input, (time.time() + 10, time.time() + 10))
+        assert manifest.get_name(self._input) == name
+
+    #-------------------------------------------------------------------------
+    #
+    def test__incremental_staging(self):
+        """ Tests that unchanged files aren't uploaded into the upload directory again.
+        """
+        import radical.pilot
+        from radical.ensemblemd.exec_plugins.staging import SharedUploads
+        from radical.ensemblemd.exec_plugins.upload_manifest import UploadManifest
+
+        remote = dict()
+
+        class Manifest(UploadManifest):
+            def __init__(self):
+                super(Manifest, self).__init__("/scratch/uploads")
+                self.uploaded = list()
+            def _read(self, pilot):
+                return dict(remote)
+            def _write(self, pilot, manifest):
+                remote.clear()
+                remote.update(manifest)
+            def upload(self, pilot, files, transfer_manager=None):
+                self.uploaded.extend(files)
+
+        class Pilot(object):
+            state = radical.pilot.ACTIVE
+            def __init__(self, uid):
+                self.uid = uid
+                self.sandbox = "sftp://cluster/home/user/radical.pilot.sandbox/{0}/".format(uid)
+            def stage_in(self, directives):
+                raise AssertionError("shared files must not be staged into the pilot")
+
+        def run(pilots):
+            manifest = Manifest()
+            cud = radical.pilot.ComputeUnitDescription()
+            cud.input_staging = ["{0} > input.dat".format(self._input)]
+            cuds = SharedUploads(manifest=manifest).deduplicate(pilots, [cud])
+            assert cuds[0].input_staging[0]['action'] == radical.pilot.LINK
+            assert cuds[0].input_staging[0]['source'].startswith("/scratch/uploads/")
+            return manifest.uploaded
+
+        # A single upload is staged and recorded in the manifest, once for
+        # all pilots on the resource.
+        staged = run([Pilot("pilot.0000"), Pilot("pilot.0001")])
+        assert len(staged) == 1
+        name = staged[0][1]
+        assert remote == {name: {'sha1': hashlib.sha1("coordinates").hexdigest(), 'size': 11}}
+
+        # A re-run with a new pilot skips the unchanged file, even if it was
+        # touched.
+        os.utime(self._input, (time.time() + 10, time.time() + 10))
+        assert run([Pilot("pilot.0002")]) == []
+
+        # A changed file is uploaded again.
+        with open(self._input, "w") as f:
+            f.write("new coordinates")
+        staged = run([Pilot("pilot.0003")])
+        assert len(staged) == 1
+        assert len(remote) == 2
@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+
+"""Generic utilities that are shared by the execution plugins and can be
+   used by custom patterns.
+"""
+
+__author__    = "Ole Weider <ole.weidner@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""Enumeration of the pairs and window blocks of an AllPairs computation.
+
+Pairs are returned as two index arrays ``(i, j)``. For a single set of
+``n1`` elements, the pairs are the upper triangle of the pair matrix
+(``i < j``); for two sets, they are the full ``n1 x n2`` rectangle. The
+arrays are NumPy arrays if NumPy is available and lists otherwise.
+
+Large pair sets can be enumerated in chunks of bounded size with
+:func:`iter_pair_chunks`. :func:`window_blocks` enumerates the blocks of
+two element windows that are compared by a single ComputeUnit.
+"""
+
+__author__    = "Ioannis Paraskevakos <i.paraskev@rutgers.edu>"
+__copyright__ = "Copyright 2014, http://radical.rutgers.edu"
+__license__   = "MIT"
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The default maximum number of pairs per chunk.
+DEFAULT_CHUNK_SIZE = 1048576
+
+# ------------------------------------------------------------------------------
+#
+def num_pairs(n1, n2=None):
+    """Returns the number of pairs of a set of 'n1' elements or of two sets
+       of 'n1' and 'n2' elements.
+    """
+    if n2 is None:
+        return n1 * (n1 - 1) // 2
+    else:
+        return n1 * n2
+
+# ------------------------------------------------------------------------------
+#
+def pair_indices(n1, n2=None, start=0):
+    """Returns all pairs as two index arrays (i, j). Indices start at
+       'start'.
+    """
+    return _pairs_from_linear(n1, n2, 0, num_pairs(n1, n2), start)
+
+# ------------------------------------------------------------------------------
+#
+def iter_pair_chunks(n1, n2=None, chunk_size=DEFAULT_CHUNK_SIZE, start=0):
+    """Yields all pairs in order as two index arrays (i, j) of at most
+       'chunk_size' pairs each. Only one chunk is held in memory at a time.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive, got {0}".format(chunk_size))
+
+    total = num_pairs(n1, n2)
+    for first in range(0, total, chunk_size):
+        yield _pairs_from_linear(n1, n2, first, min(first + chunk_size, total), start)
+
+# ------------------------------------------------------------------------------
+#
+def window_blocks(n1, windowsize1=1, n2=None, windowsize2=None, start=1):
+    """Yields the blocks of an AllPairs computation as (window1, window2)
+       tuples of element lists. Elements are numbered from 'start'.
+
+       For a single set, a block is yielded for every window and for every
+       following window, including the window itself. For two sets, a block
+       is yielded for every combination of a window of the first set and a
+       window of the second set. If a window size doesn't divide the size of
+       its set, the last window of the set is shorter.
+    """
+    if windowsize2 is None:
+        windowsize2 = windowsize1
+    if windowsize1 < 1 or windowsize2 < 1:
+        raise ValueError("Window sizes must be positive, got {0} and {1}".format(windowsize1, windowsize2))
+
+    windows1 = _windows(n1, windowsize1, start)
+
+    if n2 is None:
+        for k, window1 in enumerate(windows1):
+            for window2 in windows1[k:]:
+                yield window1, window2
+    else:
+        windows2 = _windows(n2, windowsize2, start)
+        for window1 in windows1:
+            for window2 in windows2:
+                yield window1, window2
+
+# ------------------------------------------------------------------------------
+#
+def _windows(n, windowsize, start):
+    """Splits the elements start..start+n-1 into windows of 'windowsize'.
+    """
+    end = start + n
+    return [list(range(first, min(first + windowsize, end)))
+            for first in range(start, end, windowsize)]
+
+# ------------------------------------------------------------------------------
+#
+def _pairs_from_linear(n1, n2, first, last, start):
+    """Returns the pairs with the linear (row-major) indices first..last-1
+       as two index arrays (i, j).
+    """
+    if np is None:
+        ii, jj = list(), list()
+        if first < last:
+            i, j = _pair_from_linear(n1, n2, first)
+            for k in range(first, last):
+                ii.append(i + start)
+                jj.append(j + start)
+                j += 1
+                if j == (n1 if n2 is None else n2):
+                    i += 1
+                    j = i + 1 if n2 is None else 0
+        return ii, jj
+
+    k = np.arange(first, last, dtype=np.int64)
+
+    if n2 is None:
+        # Linear index of the first pair of each row of the upper triangle.
+        rows = np.arange(n1, dtype=np.int64)
+        offsets = rows * (2 * n1 - rows - 1) // 2
+        i = np.searchsorted(offsets, k, side='right') - 1
+        j = k - offsets[i] + i + 1
+    else:
+        i, j = np.divmod(k, n2)
+
+    return i + start, j + start
+
+# ------------------------------------------------------------------------------
+#
+def _pair_from_linear(n1, n2, k):
+    """Returns the pair (i, j) with the linear (row-major) index 'k'.
+    """
+    if n2 is not None:
+        return divmod(k, n2)
+
+    i = 0
+    row = n1 - 1
+    while k >= row:
+        k -= row
+        i += 1
+        row -= 1
+    return i, i + 1 + k
@@ -48,7 +48,9 @@ class Gromacs_LSDMap(SimulationAnalysisLoop):
                                '{0}/pre_analyze.py'.format(Kconfig.misc_loc),
                                '{0}/post_analyze.py'.format(Kconfig.misc_loc),
                                '{0}/selection.py'.format(Kconfig.misc_loc),
-                               '{0}/reweighting.py'.format(Kconfig.misc_loc)]
+                               '{0}/reweighting.py'.format(Kconfig.misc_loc),
+                               '{0}/coords.py'.format(Kconfig.misc_loc),
+                               '{0}/lsdm.py'.format(Kconfig.misc_loc)]
         k.arguments = ["--inputfile={0}".format(os.path.basename(Kconfig.md_input_file)),"--numCUs={0}".format(Kconfig.num_CUs)]
         return k
 
@@ -122,16 +124,34 @@ class Gromacs_LSDMap(SimulationAnalysisLoop):
                             --numCUs                = number of simulation instances/ number of smaller files
         '''
 
+        # The coordinates are passed between the analysis kernels as .gro text
+        # or, with coords_format = 'npy', in the binary format of coords.py.
+        coords_format = getattr(Kconfig, 'coords_format', 'gro')
+        if coords_format == 'npy':
+            tmp_files = ['tmp.npy', 'tmp.meta.npz']
+            tmpha_files = ['tmpha.npy', 'tmpha.meta.npz']
+            out_files = ['out.npy', 'out.meta.npz']
+        else:
+            tmp_files = ['tmp.gro']
+            tmpha_files = ['tmpha.gro']
+            out_files = ['out.gro']
+
         pre_ana = Kernel(name="md.pre_lsdmap")
-        pre_ana.arguments = ["--numCUs={0}".format(Kconfig.num_CUs)]
-        pre_ana.link_input_data = ["$PRE_LOOP/pre_analyze.py > pre_analyze.py"]
+        pre_ana.arguments = ["--numCUs={0}".format(Kconfig.num_CUs),
+                             "--coords={0}".format(coords_format)]
+        pre_ana.link_input_data = ["$PRE_LOOP/pre_analyze.py > pre_analyze.py",
+                                   "$PRE_LOOP/coords.py > coords.py"]
         for i in range(1,Kconfig.num_CUs+1):
             pre_ana.link_input_data = pre_ana.link_input_data + ["$SIMULATION_ITERATION_{2}_INSTANCE_{0}/out.gro > out{1}.gro".format(i,i-1,iteration)]
-        pre_ana.copy_output_data = ['tmpha.gro > $PRE_LOOP/tmpha.gro','tmp.gro > $PRE_LOOP/tmp.gro']
+        pre_ana.copy_output_data = ['{0} > $PRE_LOOP/{0}'.format(f) for f in tmpha_files + tmp_files]
 
         lsdmap = Kernel(name="md.lsdmap")
-        lsdmap.arguments = ["--config={0}".format(os.path.basename(Kconfig.lsdm_config_file))]
-        lsdmap.link_input_data = ['$PRE_LOOP/{0} > {0}'.format(os.path.basename(Kconfig.lsdm_config_file)),'$PRE_LOOP/tmpha.gro > tmpha.gro']
+        lsdmap.arguments = ["--config={0}".format(os.path.basename(Kconfig.lsdm_config_file)),
+                            "--coords={0}".format(coords_format)]
+        lsdmap.link_input_data = ['$PRE_LOOP/{0} > {0}'.format(os.path.basename(Kconfig.lsdm_config_file))]
+        lsdmap.link_input_data += ['$PRE_LOOP/{0} > {0}'.format(f) for f in tmpha_files]
+        if coords_format == 'npy':
+            lsdmap.link_input_data += ['$PRE_LOOP/lsdm.py > lsdm.py','$PRE_LOOP/coords.py > coords.py']
         lsdmap.cores = RPconfig.PILOTSIZE
         if iteration > 1:
             lsdmap.link_input_data += ['$ANALYSIS_ITERATION_{0}_INSTANCE_1/weight.w > weight.w'.format(iteration-1)]
@@ -147,24 +167,26 @@ class Gromacs_LSDMap(SimulationAnalysisLoop):
                                     "$PRE_LOOP/reweighting.py > reweighting.py",
                                     "$PRE_LOOP/spliter.py > spliter.py",
                                     "$PRE_LOOP/gro.py > gro.py",
-                                    "$PRE_LOOP/tmp.gro > tmp.gro",
+                                    "$PRE_LOOP/coords.py > coords.py",
                                     "$PRE_LOOP/tmpha.ev > tmpha.ev",
                                     "$PRE_LOOP/out.nn > out.nn",
                                     "$PRE_LOOP/input.gro > input.gro"]
+        post_ana.link_input_data += ['$PRE_LOOP/{0} > {0}'.format(f) for f in tmp_files]
 
         post_ana.arguments = ["--num_runs={0}".format(Kconfig.num_runs),
-                              "--out=out.gro",
+                              "--out=out.{0}".format(coords_format),
                               "--cycle={0}".format(iteration-1),
                               "--max_dead_neighbors={0}".format(Kconfig.max_dead_neighbors),
                               "--max_alive_neighbors={0}".format(Kconfig.max_alive_neighbors),
-                              "--numCUs={0}".format(Kconfig.num_CUs)]
+                              "--numCUs={0}".format(Kconfig.num_CUs),
+                              "--coords={0}".format(coords_format)]
 
         if iteration > 1:
             post_ana.link_input_data += ['$ANALYSIS_ITERATION_{0}_INSTANCE_1/weight.w > weight_new.w'.format(iteration-1)]
 
         if(iteration%Kconfig.nsave==0):
-            post_ana.download_output_data = ['out.gro > backup/iter{0}/out.gro'.format(iteration),
-                                             'weight.w > backup/iter{0}/weight.w'.format(iteration)]
+            post_ana.download_output_data = ['{0} > backup/iter{1}/{0}'.format(f, iteration) for f in out_files]
+            post_ana.download_output_data += ['weight.w > backup/iter{0}/weight.w'.format(iteration)]
 
         return [pre_ana,lsdmap,post_ana]
 
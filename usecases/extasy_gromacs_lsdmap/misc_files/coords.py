@@ -0,0 +1,169 @@
+__author__ = 'vivek'
+
+'''
+Purpose :   This file implements the binary coordinate format that is used to
+            hand coordinates from one analysis kernel to the next one. The
+            coordinates of all frames are stored as one float32 array of shape
+            (nframes, natoms, ncols) in a .npy file, which can be memory-mapped,
+            with ncols = 6 if velocities are stored and 3 otherwise. The text
+            parts of the .gro frames (titles, atom names and boxes) are stored
+            in a companion .meta.npz file. The .gro format is only used at the
+            boundary to the MD engine.
+
+Arguments : gro2npy <npyfile> <grofile> [<grofile> ...]
+                = merge the frames of the .gro files into one .npy file
+            npy2gro <npyfile> <grofile>
+                = write the frames of the .npy file into one .gro file
+
+'''
+
+import os
+import sys
+import numpy as np
+
+# ------------------------------------------------------------------------------
+#
+def meta_path(npyfile):
+    return os.path.splitext(npyfile)[0] + '.meta.npz'
+
+# ------------------------------------------------------------------------------
+#
+class Frames(object):
+    '''
+    The coordinates of 'nframes' frames and the text parts of their .gro
+    representation.
+    '''
+
+    def __init__(self, coords, atoms, titles, boxes):
+        self.coords = coords    # float32 array of shape (nframes, natoms, ncols)
+        self.atoms  = atoms     # residue/atom names and numbers, 20 characters per atom
+        self.titles = titles    # title line per frame
+        self.boxes  = boxes     # box line per frame
+
+    @property
+    def nframes(self):
+        return self.coords.shape[0]
+
+    @property
+    def natoms(self):
+        return self.coords.shape[1]
+
+    def select(self, idxs):
+        '''
+        Returns the frames 'idxs', which may contain repetitions.
+        '''
+        idxs = np.asarray(idxs, dtype=int)
+        return Frames(np.asarray(self.coords[idxs]), self.atoms, self.titles[idxs], self.boxes[idxs])
+
+    def select_atoms(self, atom_idxs):
+        '''
+        Returns the positions of the atoms 'atom_idxs' in all frames.
+        '''
+        atom_idxs = np.asarray(atom_idxs, dtype=int)
+        return Frames(np.ascontiguousarray(self.coords[:, atom_idxs, :3]), self.atoms[atom_idxs], self.titles, self.boxes)
+
+    def to_lsdmap(self):
+        '''
+        Returns the positions in the layout of lsdmap.rw.reader, i.e., one
+        (3, natoms) array per frame.
+        '''
+        return np.ascontiguousarray(self.coords[:, :, :3].transpose(0, 2, 1), dtype=float)
+
+# ------------------------------------------------------------------------------
+#
+def read_gro(grofiles, velocities=True):
+    '''
+    Reads the frames of the .gro files 'grofiles' in order. Velocities are
+    only read if 'velocities' is True and the files contain them.
+    '''
+    ncols = None
+    coords = []
+    atoms = None
+    titles = []
+    boxes = []
+
+    for grofile in grofiles:
+        with open(grofile, 'r') as f:
+            lines = f.read().splitlines()
+
+        idx = 0
+        while idx < len(lines) and lines[idx].strip():
+            natoms = int(lines[idx+1])
+            atom_lines = lines[idx+2:idx+2+natoms]
+            if atoms is None:
+                atoms = np.array([line[:20] for line in atom_lines])
+                ncols = 6 if velocities and len(atom_lines[0].rstrip()) >= 68 else 3
+
+            # fixed columns of 8 characters after the atom names
+            fields = [[line[20+8*col:28+8*col] for col in range(ncols)] for line in atom_lines]
+            coords.append(np.array(fields, dtype=np.float32))
+            titles.append(lines[idx])
+            boxes.append(lines[idx+2+natoms])
+            idx += natoms + 3
+
+    return Frames(np.array(coords, dtype=np.float32), atoms, np.array(titles), np.array(boxes))
+
+# ------------------------------------------------------------------------------
+#
+def write_gro(grofile, frames):
+    '''
+    Writes 'frames' into the .gro file 'grofile'.
+    '''
+    if frames.coords.shape[2] == 6:
+        fmt = '%s%8.3f%8.3f%8.3f%8.4f%8.4f%8.4f'
+    else:
+        fmt = '%s%8.3f%8.3f%8.3f'
+
+    with open(grofile, 'w') as f:
+        for idx in xrange(frames.nframes):
+            lines = [frames.titles[idx], '%5d' % frames.natoms]
+            lines.extend([fmt % ((atom,) + tuple(coord)) for atom, coord in zip(frames.atoms, frames.coords[idx])])
+            lines.append(frames.boxes[idx])
+            f.write('\n'.join(lines) + '\n')
+
+# ------------------------------------------------------------------------------
+#
+def save(npyfile, frames):
+    '''
+    Saves 'frames' into 'npyfile' and its .meta.npz file.
+    '''
+    np.save(npyfile, np.asarray(frames.coords, dtype=np.float32))
+    np.savez(meta_path(npyfile), atoms=frames.atoms, titles=frames.titles, boxes=frames.boxes)
+
+# ------------------------------------------------------------------------------
+#
+def load(npyfile, mmap=True):
+    '''
+    Loads the frames of 'npyfile'. The coordinates are memory-mapped unless
+    'mmap' is False.
+    '''
+    coords = np.load(npyfile, mmap_mode='r' if mmap else None)
+    meta = np.load(meta_path(npyfile))
+    try:
+        return Frames(coords, meta['atoms'], meta['titles'], meta['boxes'])
+    finally:
+        meta.close()
+
+# ------------------------------------------------------------------------------
+#
+def get_atom_idxs(frames, grofile):
+    '''
+    Returns the indices of the atoms of the single-frame .gro file 'grofile',
+    e.g., a selection written by trjconv, in 'frames'.
+    '''
+    lookup = dict([(atom[:15], idx) for idx, atom in enumerate(frames.atoms)])
+    subset = read_gro([grofile], velocities=False)
+    return np.array([lookup[atom[:15]] for atom in subset.atoms], dtype=int)
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+    command = sys.argv[1]
+
+    if command == 'gro2npy':
+        save(sys.argv[2], read_gro(sys.argv[3:]))
+    elif command == 'npy2gro':
+        write_gro(sys.argv[3], load(sys.argv[2]))
+    else:
+        print "###ERROR: unknown command %s, use gro2npy or npy2gro." % command
+        sys.exit(1)
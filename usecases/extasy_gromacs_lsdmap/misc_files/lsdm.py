@@ -14,6 +14,8 @@ from lsdmap.util import metric as mt
 
 from mpi4py import MPI
 
+import coords
+
 class LSDMap(object):
 
     def initialize(self, comm, config, args):
@@ -23,21 +25,28 @@ class LSDMap(object):
         self.config = config
         self.args = args
 
-        struct_file = reader.open(args.struct_file)
-        self.struct_filename = struct_file.filename
-        self.npoints = struct_file.nlines
-
-        self.idxs_thread = p_index.get_idxs_thread(comm, self.npoints)
-
-        if hasattr(struct_file, '_skip'): # multi-thread reading
-            coords_thread = struct_file.readlines(self.idxs_thread)
-            self.coords = np.vstack(comm.allgather(coords_thread))
-        else: # serial reading
-            if rank == 0:
-                self.coords = struct_file.readlines()
-            else:
-                self.coords = None
-            self.coords = comm.bcast(self.coords, root=0)
+        if args.struct_file[0].endswith('.npy'): # binary coordinates, memory-mapped by every thread
+            frames = coords.load(args.struct_file[0])
+            self.struct_filename = args.struct_file[0]
+            self.npoints = frames.nframes
+            self.idxs_thread = p_index.get_idxs_thread(comm, self.npoints)
+            self.coords = frames.to_lsdmap()
+        else:
+            struct_file = reader.open(args.struct_file)
+            self.struct_filename = struct_file.filename
+            self.npoints = struct_file.nlines
+
+            self.idxs_thread = p_index.get_idxs_thread(comm, self.npoints)
+
+            if hasattr(struct_file, '_skip'): # multi-thread reading
+                coords_thread = struct_file.readlines(self.idxs_thread)
+                self.coords = np.vstack(comm.allgather(coords_thread))
+            else: # serial reading
+                if rank == 0:
+                    self.coords = struct_file.readlines()
+                else:
+                    self.coords = None
+                self.coords = comm.bcast(self.coords, root=0)
 
         logging.info('input coordinates loaded')
 
@@ -124,7 +133,7 @@ class LSDMap(object):
             dest="struct_file",
             required=True,
             nargs='*',
-            help = 'Structure file (input): gro, xvg')
+            help = 'Structure file (input): gro, xvg, npy')
 
         # other options
         parser.add_argument("-o",
@@ -8,7 +8,8 @@ Purpose :   This file merges the results of the simulation stage into one
             into one common file in linear order.
 
 Arguments : num_CUs = number of compute units
-            md_output_file = name of the resulting output file
+            md_output_file = name of the resulting output file, .gro or
+                             .npy for the binary format (see coords.py)
             path = path of the corresponding compute unit to read from
 
 '''
@@ -21,10 +22,23 @@ if __name__ == '__main__':
     md_output_file = sys.argv[2]
     path = sys.argv[3]
 
-    with open(md_output_file, 'w') as output_grofile:
-        for i in range(0,num_CUs):
-            with open('%s/out%s.gro' % (path,i), 'r') as output_file:
-                for line in output_file:
-                    print >> output_grofile, line.replace("\n", "")
-                    
-    os.system('echo 2 | trjconv -f tmp.gro -s tmp.gro -o tmpha.gro')
\ No newline at end of file
+    if md_output_file.endswith('.npy'):
+        import coords
+
+        # binary handoff: the .gro outputs are parsed once, the heavy atoms
+        # are selected by trjconv on the first frame only
+        frames = coords.read_gro(['%s/out%s.gro' % (path,i) for i in range(0,num_CUs)])
+        coords.save(md_output_file, frames)
+
+        coords.write_gro('first.gro', frames.select([0]))
+        os.system('echo 2 | trjconv -f first.gro -s first.gro -o firstha.gro')
+        coords.save('tmpha.npy', frames.select_atoms(coords.get_atom_idxs(frames, 'firstha.gro')))
+
+    else:
+        with open(md_output_file, 'w') as output_grofile:
+            for i in range(0,num_CUs):
+                with open('%s/out%s.gro' % (path,i), 'r') as output_file:
+                    for line in output_file:
+                        print >> output_grofile, line.replace("\n", "")
+
+        os.system('echo 2 | trjconv -f tmp.gro -s tmp.gro -o tmpha.gro')
\ No newline at end of file
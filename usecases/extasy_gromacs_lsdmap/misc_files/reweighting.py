@@ -8,6 +8,8 @@ import numpy as np
 from lsdmap.rw import reader
 from lsdmap.rw import writer
 
+import coords
+
 class ReweightingStep(object):
     """
     ReweightingStep()
@@ -18,9 +20,14 @@ class ReweightingStep(object):
     def initialize(self, args):
 
         # read structure file
-        struct_file = reader.open(args.struct_file, velocities=True)
-        self.struct_filename = struct_file.filename
-        self.coords = struct_file.readlines()
+        if args.struct_file[0].endswith('.npy'):
+            self.frames = coords.load(args.struct_file[0])
+            self.struct_filename = args.struct_file[0]
+            self.coords = self.frames.coords
+        else:
+            struct_file = reader.open(args.struct_file, velocities=True)
+            self.struct_filename = struct_file.filename
+            self.coords = struct_file.readlines()
 
         self.npoints = self.coords.shape[0]
 
@@ -58,7 +65,7 @@ class ReweightingStep(object):
             dest="struct_file",
             required=True,
             nargs='*',
-            help = 'Structure file (input): gro, xvg')
+            help = 'Structure file (input): gro, xvg, npy')
 
         parser.add_argument("-n",
             type=str,
@@ -77,7 +84,7 @@ class ReweightingStep(object):
             dest="output_file",
             required=True,
             nargs='*',
-            help = 'Structure file (output): gro, xvg')
+            help = 'Structure file (output): gro, xvg, npy')
 
         # other options
         parser.add_argument("-w",
@@ -119,8 +126,11 @@ class ReweightingStep(object):
 
         # save new coordinates
         format_output_file = os.path.splitext(args.output_file[0])[1]
-        struct_file_writer = writer.open(format_output_file, pattern=args.struct_file[0])
-        struct_file_writer.write(self.new_coords, args.output_file[0])
+        if format_output_file == '.npy':
+            coords.save(args.output_file[0], self.frames.select(self.new_idxs))
+        else:
+            struct_file_writer = writer.open(format_output_file, pattern=args.struct_file[0])
+            struct_file_writer.write(self.coords[self.new_idxs], args.output_file[0])
 
         # save wfile
         wfile_writer = writer.open('.w')
@@ -191,16 +201,16 @@ class ReweightingStep(object):
         self.ncopiess[self.weights<cutoff] = 0        
 
         # build vector of new coords and new weights
-        new_coords = []
+        new_idxs = []
         new_weights = []
-        for ncopies, weight, coord in it.izip(self.ncopiess, self.weights, self.coords):
+        for idx, (ncopies, weight) in enumerate(it.izip(self.ncopiess, self.weights)):
             if ncopies > 0:
                 new_weight = weight/ncopies
                 for ncopy in range(ncopies):
-                    new_coords.append(coord)
+                    new_idxs.append(idx)
                     new_weights.append(new_weight)
 
-        self.new_coords = np.array(new_coords)
+        self.new_idxs = np.array(new_idxs, dtype=int)
         self.new_weights = np.array(new_weights)
 
         sum_old_weights=int(round(np.sum(self.weights)))
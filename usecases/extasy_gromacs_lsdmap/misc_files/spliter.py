@@ -6,7 +6,8 @@ Purpose :   This file is used to split the large input coordinate file into
             It uses the gro.py file to get the specifics of the system in question.
 
 Arguments : num_tasks = number of compute units
-            grofile_name = name of the coordinate file
+            grofile_name = name of the coordinate file, .gro or .npy for the
+                           binary format (see coords.py)
 
 '''
 
@@ -24,14 +25,20 @@ if __name__ == '__main__':
 
     print 'Prepare grofiles..'
 
-    grofile_obj = gro.GroFile(os.path.dirname(os.path.abspath(__file__)) + '/' + grofile_name)
+    if grofile_name.endswith('.npy'):
+        import coords
+        frames = coords.load(curdir + '/' + grofile_name)
+        nruns = frames.nframes
+    else:
+        grofile_obj = gro.GroFile(os.path.dirname(os.path.abspath(__file__)) + '/' + grofile_name)
+        nruns = grofile_obj.nruns
 
-    if grofile_obj.nruns<num_tasks:
+    if nruns<num_tasks:
         print "###ERROR: number of runs should be greater or equal to the number of tasks."
         sys.exit(1)
 
-    nruns_per_task = [grofile_obj.nruns/num_tasks for _ in xrange(num_tasks)]
-    nextraruns=grofile_obj.nruns%num_tasks
+    nruns_per_task = [nruns/num_tasks for _ in xrange(num_tasks)]
+    nextraruns=nruns%num_tasks
 
     for idx in xrange(nextraruns):
         nruns_per_task[idx] += 1
@@ -40,6 +47,14 @@ if __name__ == '__main__':
         shutil.rmtree('%s/temp' % curdir)
     os.mkdir('%s/temp'%curdir)
 
+    if grofile_name.endswith('.npy'):
+        # the .gro files are only written for the MD engine
+        start = 0
+        for idx in xrange(num_tasks):
+            coords.write_gro(curdir + '/temp/start%s.gro'%idx, frames.select(range(start, start+nruns_per_task[idx])))
+            start += nruns_per_task[idx]
+        sys.exit(0)
+
     with open(grofile_obj.filename, 'r') as grofile:
         for idx in xrange(num_tasks):
             start_grofile_name = curdir + '/temp/start%s.gro'%idx
@@ -0,0 +1,141 @@
+""" Tests cases
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import coords
+
+# Two frames of three atoms with velocities.
+GRO_FRAMES = """\
+Frame 1 t=   0.00000
+    3
+    1SOL     OW    1   0.126   1.624   1.679  0.1227 -0.0580  0.0434
+    1SOL    HW1    2   0.190   1.661   1.747  0.8085  0.3191 -0.7791
+    1SOL    HW2    3   0.177   1.568   1.613 -0.9045 -2.6469  1.3180
+   1.86206   1.86206   1.86206
+Frame 2 t=  10.00000
+    3
+    1SOL     OW    1   0.136   1.614   1.689  0.2227 -0.1580  0.1434
+    1SOL    HW1    2   0.200   1.651   1.757  0.7085  0.4191 -0.6791
+    1SOL    HW2    3   0.187   1.558   1.623 -0.8045 -2.5469  1.2180
+   1.86306   1.86306   1.86306
+"""
+
+# A selection of two of the atoms, as written by trjconv.
+GRO_SELECTION = """\
+Selection
+    2
+    1SOL    HW2    3   0.177   1.568   1.613
+    1SOL     OW    1   0.126   1.624   1.679
+   1.86206   1.86206   1.86206
+"""
+
+#-----------------------------------------------------------------------------
+#
+def _strip_velocities(text):
+    """Returns the .gro 'text' without the velocity columns.
+    """
+    lines = list()
+    for line in text.splitlines():
+        if len(line) >= 68:
+            line = line[:44]
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+#-----------------------------------------------------------------------------
+#
+class CoordsTestCases(unittest.TestCase):
+
+    def setUp(self):
+        # clean up fragments from previous tests
+        self._tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        # clean up after ourselves
+        shutil.rmtree(self._tmpdir)
+
+    def _write(self, name, text):
+        path = os.path.join(self._tmpdir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def _round_trip(self, text):
+        grofile = self._write('in.gro', text)
+        npyfile = os.path.join(self._tmpdir, 'coords.npy')
+        outfile = os.path.join(self._tmpdir, 'out.gro')
+
+        coords.save(npyfile, coords.read_gro([grofile]))
+        frames = coords.load(npyfile)
+        coords.write_gro(outfile, frames)
+
+        with open(outfile, 'r') as f:
+            assert f.read() == text
+        return frames
+
+    #-------------------------------------------------------------------------
+    #
+    def test__round_trip_velocities(self):
+        """ Tests that frames with velocities survive .gro -> .npy -> .gro.
+        """
+        frames = self._round_trip(GRO_FRAMES)
+        assert frames.coords.shape == (2, 3, 6)
+        assert list(frames.titles) == ["Frame 1 t=   0.00000", "Frame 2 t=  10.00000"]
+        assert abs(frames.coords[1, 2, 5] - 1.2180) < 1e-6
+
+    #-------------------------------------------------------------------------
+    #
+    def test__round_trip_positions(self):
+        """ Tests that frames without velocities survive .gro -> .npy -> .gro.
+        """
+        frames = self._round_trip(_strip_velocities(GRO_FRAMES))
+        assert frames.coords.shape == (2, 3, 3)
+
+        # Velocities aren't read if they aren't wanted.
+        grofile = self._write('velocities.gro', GRO_FRAMES)
+        assert coords.read_gro([grofile], velocities=False).coords.shape == (2, 3, 3)
+
+    #-------------------------------------------------------------------------
+    #
+    def test__read_files(self):
+        """ Tests that the frames of several .gro files are read in order.
+        """
+        frames = coords.read_gro([self._write('a.gro', GRO_FRAMES), self._write('b.gro', GRO_FRAMES)])
+        assert frames.nframes == 4
+        assert frames.natoms == 3
+        assert list(frames.titles[1:3]) == ["Frame 2 t=  10.00000", "Frame 1 t=   0.00000"]
+
+    #-------------------------------------------------------------------------
+    #
+    def test__select(self):
+        """ Tests the selection of frames and atoms.
+        """
+        frames = coords.read_gro([self._write('in.gro', GRO_FRAMES)])
+
+        selected = frames.select([1, 0, 1])
+        assert selected.coords.shape == (3, 3, 6)
+        assert list(selected.titles) == ["Frame 2 t=  10.00000", "Frame 1 t=   0.00000", "Frame 2 t=  10.00000"]
+        assert list(selected.boxes) == [frames.boxes[1], frames.boxes[0], frames.boxes[1]]
+        assert (selected.coords[0] == frames.coords[1]).all()
+
+        atoms = frames.select_atoms([2, 0])
+        assert atoms.coords.shape == (2, 2, 3)
+        assert list(atoms.atoms) == [frames.atoms[2], frames.atoms[0]]
+        assert (atoms.coords[:, 1] == frames.coords[:, 0, :3]).all()
+
+        assert frames.to_lsdmap().shape == (2, 3, 3)
+        assert (frames.to_lsdmap()[1, :, 2] == frames.coords[1, 2, :3]).all()
+
+    #-------------------------------------------------------------------------
+    #
+    def test__get_atom_idxs(self):
+        """ Tests that the atoms of a selection are found in the frames.
+        """
+        frames = coords.read_gro([self._write('in.gro', GRO_FRAMES)])
+        idxs = coords.get_atom_idxs(frames, self._write('selection.gro', GRO_SELECTION))
+        assert list(idxs) == [2, 0]
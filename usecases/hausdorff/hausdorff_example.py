@@ -20,6 +20,9 @@ from radical.ensemblemd import SingleClusterEnvironment
 from radical.ensemblemd.engine import get_engine
 from radical.ensemblemd.kernel_plugins.kernel_base import KernelBase
 
+# The number of cores used by each comparison task.
+CORES_PER_COMPARISON = 1
+
 #-------------------------------------------------------------------------------
 #
 _KERNEL_INFO_QPC = {
@@ -84,99 +87,9 @@ class MyQPC(KernelBase):
         self._pre_exec    = cfg["pre_exec"]
         self._post_exec   = None
 
-#-------------------------------------------------------------------------------
-#
-_KERNEL_INFO_HS = {
-    "name":         "my.hausdorff",
-    "description":  "This Kernel calculates the Hausdorff distance.",
-    "arguments":   {"--dist_file=":
-                        {
-                        "mandatory": True,
-                        "description": "The file that contains the Hausdorff Calculator"
-                        },
-                    "--inputfile1=":
-                        {
-                        "mandatory": True,
-                        "description": "The first input Trajectory file."
-                        },
-                    "--inputfile2=":
-                        {
-                        "mandatory": True,
-                        "description": "The second input Trajectory file."
-                        },
-                    "--outputfile=":
-                        {
-                        "mandatory": True,
-                        "description": "The output file containing the difference count."
-                        },
-
-                    },
-    "machine_configs":
-    {
-        "*": {
-            "environment"   : None,
-            "pre_exec"      : [],
-            "executable"    : ":",
-            "uses_mpi"      : False
-        },
-        "xsede.stampede": {
-            "environment"   : None,
-            "pre_exec"      : ["module load python/2.7.3-epd-7.3.2"],
-            "executable"    : ":",
-            "uses_mpi"      : False
-        }
-    }
-}
-
-#-------------------------------------------------------------------------------
-#
-class MyHausdorff(KernelBase):
-
-    def __init__(self):
-        """Le constructor.
-        """
-        super(MyHausdorff, self).__init__(_KERNEL_INFO_HS)
-
-    @staticmethod
-    def get_name():
-        return _KERNEL_INFO_HS["name"]
-
-    def _bind_to_resource(self, resource_key):
-        """This function binds the Kernel to a specific resource defined in
-           "resource_key".
-        """
-        if resource_key not in _KERNEL_INFO_HS["machine_configs"]:
-            if "*" in _KERNEL_INFO_HS["machine_configs"]:
-                # Fall-back to generic resource key
-                resource_key = "*"
-            else:
-                raise NoKernelConfigurationError(kernel_name=_KERNEL_INFO_HS["name"], resource_key=resource_key)
-
-        cfg = _KERNEL_INFO_HS["machine_configs"][resource_key]
-        executable = "python"
-        ARG1 = self.get_arg("--inputfile1=")
-        ARG2 = self.get_arg("--inputfile2=")
-
-        ARG1 = ast.literal_eval(ARG1)
-        ARG2 = ast.literal_eval(ARG2)
-
-        arguments  = [self.get_arg("--dist_file="),"--element_set1"]
-        arguments.extend(ARG1)
-        arguments.extend(["--element_set2"])
-        arguments.extend(ARG2)
-        arguments.extend(["--output_file",self.get_arg("--outputfile=")])
-
-        self._executable  = executable
-        self._arguments   = arguments
-        self._environment = cfg["environment"]
-        self._uses_mpi    = cfg["uses_mpi"]
-        self._pre_exec    = cfg["pre_exec"]
-        self._post_exec   = None
-
 # ------------------------------------------------------------------------------
 # Register the user-defined kernel with Ensemble MD Toolkit.
 get_engine().add_kernel_plugin(MyQPC)
-get_engine().add_kernel_plugin(MyHausdorff)
 
 # ------------------------------------------------------------------------------
 #
@@ -219,11 +132,14 @@ class HausdorffAP(AllPairs):
 
         print "Element Comparison {0} - {1}".format(elements1,elements2)
 
-        k = Kernel(name="my.hausdorff")
-        k.arguments            = ["--dist_file=hausdorff_kernel.py",
+        # misc.comparison_runner compares all pairs of the two windows in
+        # parallel on the kernel's cores and loads every trajectory only once.
+        k = Kernel(name="misc.comparison_runner")
+        k.arguments            = ["--comparator=hausdorff_kernel.py:hausdorff",
                                   "--inputfile1={0}".format(input_filenames1),
                                   "--inputfile2={0}".format(input_filenames2),
                                   "--outputfile={0}".format(output_filename)]
+        k.cores = CORES_PER_COMPARISON
         k.upload_input_data = ["hausdorff_kernel.py"]
 
         # If the input data are in in a web server use the following
@@ -4,6 +4,13 @@ import sys, getopt,ast
 import numpy as np
 import argparse
 
+try:
+    # Node-local, memory-mapped trajectory cache shipped with Ensemble MD.
+    from trajcache import load_all
+except ImportError:
+    def load_all(paths):
+        return [np.load(i) for i in paths]
+
 def dH((P, Q)):
     def vsqnorm(v, axis=None):
         return np.sum(v*v, axis=axis)
@@ -11,6 +18,10 @@ def dH((P, Q)):
     d = np.array([vsqnorm(pt - Q, axis=1) for pt in P])
     return ( max(d.min(axis=0).max(), d.min(axis=1).max())*Ni )**0.5
 
+def hausdorff(P, Q):
+    # Entry point for the misc.comparison_runner kernel.
+    return dH((P, Q))
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -23,10 +34,10 @@ if __name__ == "__main__":
     set2 = args.element_set2
     out_file = open(args.output_file,'w')
 
-    trj_list1 = [np.load(i) for i in set1]
+    trj_list1 = load_all(set1)
 
     if set2 != set1:
-        trj_list2 = [np.load(i) for i in set2]
+        trj_list2 = load_all(set2)
     else:
         trj_list2 = trj_list1
 